@@ -0,0 +1 @@
+"""Execution layer behind the OSINT Tools API (main.py)."""
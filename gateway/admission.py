@@ -0,0 +1,162 @@
+"""Admission control: a global cap on tool runs, per-client rate limits, priority classes."""
+import asyncio
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Dict, FrozenSet, Optional
+
+from .config import API_KEYS, BATCH_SHARE, CLIENT_MAX_SCANS, MAX_TOOL_RUNS, RATE_BURST, RATE_LIMIT, TRUSTED_PROXIES
+
+INTERACTIVE, BATCH = "interactive", "batch"
+
+# What a saturated interactive request is told to wait before retrying.
+SATURATED_RETRY_AFTER = 5
+
+
+class Rejected(Exception):
+    """Turned into a 429 with Retry-After by the API."""
+
+    def __init__(self, reason: str, retry_after: float):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = max(1, int(retry_after + 0.999))
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+    def take(self, cost: float = 1) -> float:
+        """Take cost tokens; returns 0 on success, else the seconds until there are enough."""
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= cost:
+            self.tokens -= cost
+            return 0
+        return (cost - self.tokens) / self.rate
+
+
+class ToolSlots:
+    """Counts tool runs against one global capacity.
+
+    Interactive work reserves its slots up front or is rejected; batch work
+    waits for slots but never takes more than batch_share of the capacity,
+    so interactive requests always find headroom.
+    """
+
+    def __init__(self, capacity: int = MAX_TOOL_RUNS, batch_share: float = BATCH_SHARE):
+        self.capacity = max(1, capacity)
+        self.batch_share = batch_share
+        self.in_use = {INTERACTIVE: 0, BATCH: 0}
+        self.rejected = 0
+        self._freed = asyncio.Condition()
+
+    def limit(self, priority: str) -> int:
+        if priority == BATCH:
+            return max(1, int(self.capacity * self.batch_share))
+        return self.capacity
+
+    def _fits(self, n: int, priority: str) -> bool:
+        used = sum(self.in_use.values()) if priority == INTERACTIVE else self.in_use[BATCH]
+        return used + n <= self.limit(priority) and sum(self.in_use.values()) + n <= self.capacity
+
+    @asynccontextmanager
+    async def reserve(self, n: int, priority: str = INTERACTIVE):
+        """Hold n slots; raises Rejected when they are not free right now."""
+        n = min(n, self.limit(priority))
+        if not self._fits(n, priority):
+            self.rejected += 1
+            raise Rejected(f"Server is at capacity ({self.capacity} concurrent tool runs)", SATURATED_RETRY_AFTER)
+        self.in_use[priority] += n
+        try:
+            yield
+        finally:
+            await self._release(n, priority)
+
+    @asynccontextmanager
+    async def hold(self, n: int = 1, priority: str = BATCH):
+        """Hold n slots, waiting for them to be free."""
+        n = min(n, self.limit(priority))
+        async with self._freed:
+            await self._freed.wait_for(lambda: self._fits(n, priority))
+            self.in_use[priority] += n
+        try:
+            yield
+        finally:
+            await self._release(n, priority)
+
+    async def _release(self, n: int, priority: str):
+        self.in_use[priority] -= n
+        async with self._freed:
+            self._freed.notify_all()
+
+
+def client_key(
+    api_key: Optional[str],
+    peer: Optional[str],
+    forwarded: Optional[str] = None,
+    api_keys: FrozenSet[str] = API_KEYS,
+    trusted_proxies: FrozenSet[str] = TRUSTED_PROXIES,
+) -> str:
+    """Who a request is counted against: a configured API key, else the caller's IP.
+
+    Both headers are the caller's to choose, so an unknown API key counts for
+    nothing, and X-Forwarded-For is only read when the peer is a trusted
+    proxy: the caller is the last hop that is not one of them.
+    """
+    if api_key and api_key in api_keys:
+        return f"key:{api_key}"
+    ip = peer or "unknown"
+    if forwarded and ip in trusted_proxies:
+        for hop in reversed([hop.strip() for hop in forwarded.split(",")]):
+            if hop and hop not in trusted_proxies:
+                return f"ip:{hop}"
+    return f"ip:{ip}"
+
+
+class ClientLimits:
+    """Per-client token buckets and open-scan counts, keyed by API key or IP."""
+
+    def __init__(self, rate_per_minute: float = RATE_LIMIT, burst: int = RATE_BURST, max_scans: int = CLIENT_MAX_SCANS, max_clients: int = 10000):
+        self.rate = rate_per_minute / 60
+        self.burst = burst
+        self.max_scans = max_scans
+        self.max_clients = max_clients
+        self.buckets: "OrderedDict[str, TokenBucket]" = OrderedDict()
+        self.open_scans: Dict[str, int] = {}
+        self.rejected = {"rate": 0, "concurrency": 0}
+
+    def check_rate(self, client: str):
+        bucket = self.buckets.get(client)
+        if bucket is None:
+            bucket = self.buckets[client] = TokenBucket(self.rate, self.burst)
+            if len(self.buckets) > self.max_clients:
+                self.buckets.popitem(last=False)
+        self.buckets.move_to_end(client)
+        wait = bucket.take()
+        if wait:
+            self.rejected["rate"] += 1
+            raise Rejected("Rate limit exceeded", wait)
+
+    @asynccontextmanager
+    async def scan(self, client: str):
+        """One open scan for client, after its rate and concurrency checks."""
+        self.check_rate(client)
+        if self.open_scans.get(client, 0) >= self.max_scans:
+            self.rejected["concurrency"] += 1
+            raise Rejected(f"At most {self.max_scans} concurrent scans per client", SATURATED_RETRY_AFTER)
+        self.open_scans[client] = self.open_scans.get(client, 0) + 1
+        try:
+            yield
+        finally:
+            self.open_scans[client] -= 1
+            if not self.open_scans[client]:
+                del self.open_scans[client]
+
+
+tool_slots = ToolSlots()
+client_limits = ClientLimits()
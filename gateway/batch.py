@@ -0,0 +1,141 @@
+"""Scan long lists of targets and stream one NDJSON line per target."""
+import asyncio
+import json
+import time
+from typing import AsyncIterator, Dict, Iterable, Optional, Tuple
+
+from .admission import BATCH, tool_slots
+from .cache import normalize_target
+from .config import BATCH_CONCURRENCY, TOOL_DEADLINES
+from .orchestrator import run_tool
+
+_DONE = object()
+
+
+def iter_targets(lines: Iterable[str]) -> Iterable[str]:
+    """Non-empty lines that are not comments, stripped."""
+    for line in lines:
+        target = line.strip()
+        if target and not target.startswith("#"):
+            yield target
+
+
+def ndjson(data: Dict) -> str:
+    return json.dumps(data, default=str) + "\n"
+
+
+class BatchScan:
+    """One batch: de-duplicates targets and shares username scans between them.
+
+    Emails are scanned with holehe and ghunt, and their username part with
+    sherlock and maigret like /scan/full, except that each username is
+    scanned once per batch however many emails share it (its sections are
+    kept until the batch ends). At most
+    `concurrency` targets are in flight; the bounded queues between the
+    reader, the workers and the response make a slow client slow the
+    scans down instead of piling up results in memory.
+    """
+
+    def __init__(self, refresh: bool = False, concurrency: int = BATCH_CONCURRENCY, deadlines: Optional[Dict[str, float]] = None):
+        self.refresh = refresh
+        self.concurrency = max(1, concurrency)
+        self.deadlines = {**TOOL_DEADLINES, **(deadlines or {})}
+        # every tool run of the batch, so a later target sharing one gets its result
+        self.runs: Dict[Tuple[str, str], asyncio.Future] = {}
+        self.seen: Dict[str, int] = {}
+        self.stats = {"targets": 0, "scanned": 0, "duplicates": 0, "errors": 0}
+
+    def plan(self, target: str) -> Dict:
+        if "@" in target:
+            username = target.split("@")[0]
+            return {"type": "email", "username": username, "tools": {"holehe": target, "ghunt": target, "sherlock": username, "maigret": username}}
+        return {"type": "username", "username": target, "tools": {"sherlock": target, "maigret": target}}
+
+    async def run_one(self, tool: str, value: str) -> Dict:
+        async def run():
+            async with tool_slots.hold(1, BATCH):
+                return await run_tool(tool, value, self.deadlines[tool], refresh=self.refresh)
+
+        key = (tool, normalize_target(value))
+        if key not in self.runs:
+            self.runs[key] = asyncio.ensure_future(run())
+        return await self.runs[key]
+
+    async def scan(self, index: int, target: str) -> Dict:
+        started = time.monotonic()
+        plan = self.plan(target)
+        sections = await asyncio.gather(*(self.run_one(tool, value) for tool, value in plan["tools"].items()))
+        sections = dict(zip(plan["tools"], sections))
+        return {
+            "index": index,
+            "input": target,
+            "type": plan["type"],
+            "username": plan["username"],
+            **sections,
+            "timed_out": [tool for tool, section in sections.items() if section["status"] == "timeout"],
+            "elapsed": round(time.monotonic() - started, 2),
+        }
+
+    async def run(self, targets: Iterable[str]) -> AsyncIterator[str]:
+        started = time.monotonic()
+        pending: asyncio.Queue = asyncio.Queue(maxsize=self.concurrency)
+        results: asyncio.Queue = asyncio.Queue(maxsize=self.concurrency)
+
+        async def read():
+            for index, target in enumerate(iter_targets(targets)):
+                self.stats["targets"] += 1
+                key = normalize_target(target)
+                if key in self.seen:
+                    self.stats["duplicates"] += 1
+                    await results.put({"index": index, "input": target, "duplicate_of": self.seen[key]})
+                    continue
+                self.seen[key] = index
+                await pending.put((index, target))
+            for _ in range(self.concurrency):
+                await pending.put(_DONE)
+
+        async def work():
+            while True:
+                item = await pending.get()
+                if item is _DONE:
+                    return
+                try:
+                    line = await self.scan(*item)
+                    self.stats["scanned"] += 1
+                except Exception as e:
+                    line = {"index": item[0], "input": item[1], "error": f"{type(e).__name__}: {e}"}
+                    self.stats["errors"] += 1
+                await results.put(line)
+
+        async def run_all():
+            tasks = [asyncio.ensure_future(read()), *(asyncio.ensure_future(work()) for _ in range(self.concurrency))]
+            try:
+                await asyncio.gather(*tasks)
+            except Exception as e:
+                # Reading the targets failed: the batch stops, saying why.
+                await results.put({"error": f"{type(e).__name__}: {e}"})
+            finally:
+                for task in tasks:
+                    task.cancel()
+            # Reached unless the response itself went away: the consumer
+            # stops on it however the batch ended.
+            await results.put(_DONE)
+
+        runner = asyncio.create_task(run_all())
+        try:
+            while True:
+                item = await results.get()
+                if item is _DONE:
+                    break
+                yield ndjson(item)
+            await runner
+            elapsed = time.monotonic() - started
+            yield ndjson({
+                "summary": {
+                    **self.stats,
+                    "elapsed": round(elapsed, 2),
+                    "targets_per_minute": round(self.stats["targets"] * 60 / elapsed, 1) if elapsed else None,
+                }
+            })
+        finally:
+            runner.cancel()
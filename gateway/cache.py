@@ -0,0 +1,124 @@
+"""Two-tier cache for tool results: in-memory LRU backed by SQLite."""
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+from .config import CACHE_DB, CACHE_ENABLED, CACHE_SIZE, CACHE_STALE_TTL, CACHE_TTLS
+
+
+def normalize_target(target: str) -> str:
+    return target.strip().lower()
+
+
+class CacheEntry:
+    def __init__(self, stored_at: float, section: Dict, ttl: float):
+        self.stored_at = stored_at
+        self.section = section
+        self.ttl = ttl
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.stored_at
+
+    @property
+    def fresh(self) -> bool:
+        return self.age < self.ttl
+
+
+class ScanCache:
+    def __init__(
+        self,
+        path: Optional[str] = CACHE_DB,
+        max_entries: int = CACHE_SIZE,
+        ttls: Dict[str, float] = CACHE_TTLS,
+        stale_ttl: float = CACHE_STALE_TTL,
+    ):
+        self.max_entries = max_entries
+        self.ttls = ttls
+        self.stale_ttl = stale_ttl
+        self.stats = {"hit": 0, "stale": 0, "miss": 0}
+        self._memory: "OrderedDict[str, Tuple[float, Dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._refreshing: Dict[str, asyncio.Task] = {}
+        self._db: Optional[sqlite3.Connection] = None
+        if path:
+            try:
+                self._db = sqlite3.connect(path, check_same_thread=False)
+                self._db.execute("PRAGMA journal_mode=WAL")
+                self._db.execute(
+                    "CREATE TABLE IF NOT EXISTS scan_cache ("
+                    " key TEXT PRIMARY KEY, tool TEXT NOT NULL, stored_at REAL NOT NULL, section TEXT NOT NULL)"
+                )
+                self._db.commit()
+            except sqlite3.Error as e:
+                print(f"⚠️ Scan cache at {path} unavailable, keeping results in memory only: {e}")
+                self._db = None
+
+    @staticmethod
+    def make_key(tool: str, target: str, options: Optional[Dict] = None) -> str:
+        return json.dumps([tool, normalize_target(target), options or {}], sort_keys=True)
+
+    def get(self, tool: str, key: str) -> Optional[CacheEntry]:
+        """Entry for key if it is fresh or still inside the stale window."""
+        ttl = self.ttls.get(tool, 0)
+        with self._lock:
+            item = self._memory.get(key)
+            if item is not None:
+                self._memory.move_to_end(key)
+            elif self._db is not None:
+                row = self._db.execute(
+                    "SELECT stored_at, section FROM scan_cache WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    item = (row[0], json.loads(row[1]))
+                    self._remember(key, item)
+        if item is None or time.time() - item[0] >= ttl + self.stale_ttl:
+            return None
+        return CacheEntry(item[0], item[1], ttl)
+
+    def put(self, tool: str, key: str, section: Dict):
+        item = (time.time(), section)
+        with self._lock:
+            self._remember(key, item)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO scan_cache (key, tool, stored_at, section) VALUES (?, ?, ?, ?)",
+                    (key, tool, item[0], json.dumps(section, default=str)),
+                )
+                self._db.commit()
+
+    def _remember(self, key: str, item: Tuple[float, Dict]):
+        self._memory[key] = item
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def refresh(self, key: str, compute: Callable[[], Awaitable[Dict]]):
+        """Recompute a stale entry in the background, at most once at a time per key."""
+        if key in self._refreshing:
+            return
+        task = asyncio.create_task(compute())
+        self._refreshing[key] = task
+        task.add_done_callback(lambda _: self._refreshing.pop(key, None))
+
+    def purge_expired(self) -> int:
+        """Drop rows that are past their stale window from the SQLite tier."""
+        if self._db is None:
+            return 0
+        now = time.time()
+        removed = 0
+        with self._lock:
+            for tool, ttl in self.ttls.items():
+                removed += self._db.execute(
+                    "DELETE FROM scan_cache WHERE tool = ? AND stored_at < ?",
+                    (tool, now - ttl - self.stale_ttl),
+                ).rowcount
+            self._db.commit()
+        return removed
+
+
+scan_cache: Optional[ScanCache] = ScanCache() if CACHE_ENABLED else None
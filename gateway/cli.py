@@ -0,0 +1,94 @@
+"""Run the OSINT tools as command-line programs."""
+import os
+import signal
+import subprocess
+import threading
+import time
+from typing import Dict, List, Optional
+
+from .resolver import TOOL_ENV, tool_resolver
+
+# How often a running tool is checked for cancellation (seconds).
+POLL_INTERVAL = 0.2
+
+
+def _failure(tool: str, args: List[str], stderr: str, method: str = "none") -> Dict:
+    return {
+        "success": False,
+        "stdout": "",
+        "stderr": stderr,
+        "return_code": -1,
+        "tool": tool,
+        "args": args,
+        "method": method,
+    }
+
+
+def _run(command: List[str], timeout: float, cancelled: Optional[threading.Event]) -> subprocess.CompletedProcess:
+    """subprocess.run in its own process group, killed as a whole on timeout or when cancelled is set."""
+    proc = subprocess.Popen(
+        command,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+        cwd="/",
+        env=TOOL_ENV,
+        start_new_session=True,
+    )
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            stdout, stderr = proc.communicate(timeout=POLL_INTERVAL)
+            return subprocess.CompletedProcess(command, proc.returncode, stdout, stderr)
+        except subprocess.TimeoutExpired:
+            if time.monotonic() < deadline and not (cancelled and cancelled.is_set()):
+                continue
+            try:
+                os.killpg(proc.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+            proc.communicate()
+            raise subprocess.TimeoutExpired(command, timeout)
+
+
+def run_cli_tool(tool: str, args: List[str], timeout: int = 30, cancelled: Optional[threading.Event] = None) -> Dict:
+    """Run a CLI tool through the invocation the resolver found for it.
+
+    A call that cannot start the tool, or that exits non-zero without any
+    output, invalidates the resolution; the tool is then probed again and,
+    if it is now found elsewhere, run once more. Setting cancelled kills the
+    tool's process tree.
+    """
+    previous = None
+    for _ in range(2):
+        entry = tool_resolver.resolve(tool)
+        if entry.invocation is None:
+            return _failure(tool, args, f"All execution methods failed for {tool}: {entry.error}")
+        if entry.invocation == previous:
+            break
+        previous = entry.invocation
+
+        try:
+            result = _run(entry.invocation + args, timeout, cancelled)
+        except subprocess.TimeoutExpired:
+            if cancelled and cancelled.is_set():
+                return _failure(tool, args, f"{tool} was cancelled", entry.method)
+            return _failure(tool, args, f"{tool} did not finish within {timeout}s", entry.method)
+        except OSError as e:
+            tool_resolver.invalidate(tool)
+            failure = _failure(tool, args, f"{type(e).__name__}: {e}", entry.method)
+            continue
+
+        if result.returncode == 0 or result.stdout.strip():
+            return {
+                "success": result.returncode == 0,
+                "stdout": result.stdout,
+                "stderr": result.stderr,
+                "return_code": result.returncode,
+                "tool": tool,
+                "args": args,
+                "method": entry.method,
+            }
+        tool_resolver.invalidate(tool)
+        failure = {**_failure(tool, args, result.stderr, entry.method), "return_code": result.returncode}
+    return failure
@@ -0,0 +1,143 @@
+"""Gateway settings, read once from the environment."""
+import os
+import tempfile
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, default))
+    except ValueError:
+        return default
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except ValueError:
+        return default
+
+
+# "auto" runs a tool in-process when it can be imported and falls back to
+# the CLI otherwise; "inprocess" and "subprocess" force one of the two;
+# "workers" runs the engines in pre-forked worker processes (see below).
+EXECUTION_MODE = os.getenv("OSINT_EXECUTION_MODE", "auto").lower()
+
+# Long-lived threads that run the blocking engines (sherlock, holehe under trio).
+ENGINE_THREADS = _env_int("OSINT_ENGINE_THREADS", 8)
+
+# Load every engine when the gateway starts instead of on the first request.
+PRELOAD_ENGINES = os.getenv("OSINT_PRELOAD_ENGINES", "1") not in ("0", "false", "no")
+
+# Per-tool deadlines (seconds) for fan-out scans; a tool still running at its
+# deadline is reported as timed out and the rest of the response is returned.
+TOOL_DEADLINES = {
+    "holehe": _env_float("OSINT_HOLEHE_DEADLINE", 60),
+    "ghunt": _env_float("OSINT_GHUNT_DEADLINE", 45),
+    "sherlock": _env_float("OSINT_SHERLOCK_DEADLINE", 90),
+    "maigret": _env_float("OSINT_MAIGRET_DEADLINE", 120),
+}
+
+# How long before its deadline an engine is asked to wrap up, so the partial
+# results it has are returned instead of a timeout.
+DEADLINE_MARGIN = _env_float("OSINT_DEADLINE_MARGIN", 2)
+
+# Scan result cache: an in-memory LRU in front of a SQLite file that survives
+# restarts. A result is fresh for its tool's TTL, then served stale (and
+# refreshed in the background) for CACHE_STALE_TTL more seconds.
+CACHE_ENABLED = os.getenv("OSINT_CACHE", "1") not in ("0", "false", "no")
+CACHE_DB = os.getenv("OSINT_CACHE_DB", os.path.join(tempfile.gettempdir(), "osint_scan_cache.db"))
+CACHE_SIZE = _env_int("OSINT_CACHE_SIZE", 512)
+CACHE_TTLS = {
+    "holehe": _env_float("OSINT_HOLEHE_CACHE_TTL", 24 * 3600),
+    "ghunt": _env_float("OSINT_GHUNT_CACHE_TTL", 24 * 3600),
+    "sherlock": _env_float("OSINT_SHERLOCK_CACHE_TTL", 6 * 3600),
+    "maigret": _env_float("OSINT_MAIGRET_CACHE_TTL", 6 * 3600),
+}
+CACHE_STALE_TTL = _env_float("OSINT_CACHE_STALE_TTL", 24 * 3600)
+
+# Background jobs (POST /jobs): a SQLite-backed queue drained by JOB_WORKERS
+# scans at a time, with at most JOB_TOOL_LIMITS[tool] runs of each tool.
+# Jobs are not bound to an HTTP request, so their tools get JOB_DEADLINE.
+JOB_DB = os.getenv("OSINT_JOB_DB", os.path.join(tempfile.gettempdir(), "osint_jobs.db"))
+JOB_WORKERS = _env_int("OSINT_JOB_WORKERS", 4)
+JOB_TOOL_LIMITS = {
+    "holehe": _env_int("OSINT_HOLEHE_JOB_LIMIT", 2),
+    "ghunt": _env_int("OSINT_GHUNT_JOB_LIMIT", 2),
+    "sherlock": _env_int("OSINT_SHERLOCK_JOB_LIMIT", 2),
+    "maigret": _env_int("OSINT_MAIGRET_JOB_LIMIT", 1),
+}
+JOB_DEADLINE = _env_float("OSINT_JOB_DEADLINE", 1800)
+
+# CLI resolution: each tool's working invocation is probed once at startup and
+# again after it fails, or in the background once it is older than
+# TOOL_REPROBE_INTERVAL seconds.
+TOOL_REPROBE_INTERVAL = _env_float("OSINT_TOOL_REPROBE_INTERVAL", 600)
+TOOL_PROBE_TIMEOUT = _env_float("OSINT_TOOL_PROBE_TIMEOUT", 30)
+
+# Targets of a /scan/batch request that are scanned at the same time.
+BATCH_CONCURRENCY = _env_int("OSINT_BATCH_CONCURRENCY", 4)
+
+# Admission control. At most MAX_TOOL_RUNS tool runs execute at once; batch
+# work (jobs, /scan/batch) may use BATCH_SHARE of them and waits for a slot,
+# while interactive /scan/* requests get a 429 when none is free. Each client
+# has a token bucket of RATE_LIMIT requests per minute with bursts of
+# RATE_BURST, and at most CLIENT_MAX_SCANS open scans. A client is its
+# X-API-Key when that is one of API_KEYS, else its IP: the peer address, or
+# the X-Forwarded-For hop a TRUSTED_PROXIES peer appended for it. Loopback is
+# trusted by default: the bundled server.js forwards its browsers' addresses.
+MAX_TOOL_RUNS = _env_int("OSINT_MAX_TOOL_RUNS", 16)
+BATCH_SHARE = _env_float("OSINT_BATCH_SHARE", 0.5)
+RATE_LIMIT = _env_float("OSINT_RATE_LIMIT", 30)
+RATE_BURST = _env_int("OSINT_RATE_BURST", 10)
+CLIENT_MAX_SCANS = _env_int("OSINT_CLIENT_MAX_SCANS", 4)
+API_KEYS = frozenset(key.strip() for key in os.getenv("OSINT_API_KEYS", "").split(",") if key.strip())
+TRUSTED_PROXIES = frozenset(
+    ip.strip() for ip in os.getenv("OSINT_TRUSTED_PROXIES", "127.0.0.1,::1").split(",") if ip.strip()
+)
+
+# OSINT_EXECUTION_MODE=workers runs the engines in a pool of worker processes
+# forked from a parent that has already loaded them. Each worker is replaced
+# after WORKER_MAX_JOBS scans to bound memory growth.
+WORKER_PROCESSES = _env_int("OSINT_WORKER_PROCESSES", 2)
+WORKER_MAX_JOBS = _env_int("OSINT_WORKER_MAX_JOBS", 50)
+
+# Scan history: every fresh tool result, one row per site, kept for queries
+# and diffs across scans (/history/*). Scans older than HISTORY_RETENTION_DAYS
+# are dropped (0 keeps everything).
+HISTORY_ENABLED = os.getenv("OSINT_HISTORY", "1") not in ("0", "false", "no")
+HISTORY_DB = os.getenv("OSINT_HISTORY_DB", os.path.join(tempfile.gettempdir(), "osint_history.db"))
+HISTORY_RETENTION_DAYS = _env_float("OSINT_HISTORY_RETENTION_DAYS", 90)
+
+# Incremental rescans: sherlock and maigret skip the sites whose verdict in
+# the last scan of the same target is younger than the freshness for its
+# outcome, and reuse that verdict. Outcomes set to 0 are always re-checked.
+INCREMENTAL_ENABLED = os.getenv("OSINT_INCREMENTAL", "1") not in ("0", "false", "no")
+INCREMENTAL_TOOLS = ("sherlock", "maigret")
+SITE_FRESHNESS = {
+    "claimed": _env_float("OSINT_FRESH_CLAIMED", 24 * 3600),
+    "available": _env_float("OSINT_FRESH_AVAILABLE", 7 * 24 * 3600),
+    "illegal": _env_float("OSINT_FRESH_ILLEGAL", 7 * 24 * 3600),
+    "unknown": _env_float("OSINT_FRESH_UNKNOWN", 600),
+    "error": _env_float("OSINT_FRESH_ERROR", 600),
+    "waf": _env_float("OSINT_FRESH_WAF", 600),
+    "rate_limited": _env_float("OSINT_FRESH_RATE_LIMITED", 600),
+}
+
+# Shared probes: when sherlock and maigret run in-process, their site requests
+# go through one HTTP client that fetches each distinct request once and hands
+# the response to both. Responses are kept PROBE_TTL seconds (at most
+# PROBE_CACHE_SIZE of them) so a tool that gets to a site later still shares it.
+# Bodies are read no further than PROBE_MAX_BYTES, or than the largest size a
+# maigret site sharing the probe asks for.
+PROBES_ENABLED = os.getenv("OSINT_SHARED_PROBES", "1") not in ("0", "false", "no")
+PROBE_TTL = _env_float("OSINT_PROBE_TTL", 120)
+PROBE_CACHE_SIZE = _env_int("OSINT_PROBE_CACHE_SIZE", 1024)
+PROBE_CONNECTIONS = _env_int("OSINT_PROBE_CONNECTIONS", 100)
+PROBE_MAX_BYTES = _env_int("OSINT_PROBE_MAX_BYTES", 5 * 1024 * 1024)
+
+# Pivot scans (/scan/pivot): identifiers the tools find are scanned in turn,
+# up to PIVOT_MAX_DEPTH hops from the input and PIVOT_MAX_TARGETS identifiers
+# per pivot scan, PIVOT_CONCURRENCY of them at a time.
+PIVOT_MAX_DEPTH = _env_int("OSINT_PIVOT_MAX_DEPTH", 2)
+PIVOT_MAX_TARGETS = _env_int("OSINT_PIVOT_MAX_TARGETS", 25)
+PIVOT_CONCURRENCY = _env_int("OSINT_PIVOT_CONCURRENCY", 4)
@@ -0,0 +1,44 @@
+"""Request deadlines: the time a response is due, shared by every tool working on it."""
+import time
+
+
+class Deadline:
+    """A point on the monotonic clock that work must be over by.
+
+    The clock is system-wide, so a deadline keeps its meaning when it is
+    pickled into a worker process.
+    """
+
+    def __init__(self, seconds: float):
+        self.at = time.monotonic() + seconds
+
+    def remaining(self) -> float:
+        return max(0.0, self.at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def cap(self, seconds: float) -> float:
+        """seconds, or the time left if that is shorter."""
+        return min(seconds, self.remaining())
+
+    def request_timeout(self, default: float, share: float = 0.5) -> float:
+        """A per-request timeout: default, but at most `share` of the time left.
+
+        Leaves room to start further requests after the first ones time out.
+        """
+        return max(0.1, min(default, self.remaining() * share))
+
+    def __repr__(self):
+        return f"Deadline({self.remaining():.2f}s left)"
+
+
+def engine_deadline(seconds: float, margin: float) -> Deadline:
+    """The deadline an engine is given for a tool run bounded by `seconds`.
+
+    It comes `margin` early (at most half the run), so the engine returns
+    its partial results before the run is given up on.
+    """
+    return Deadline(seconds - min(margin, seconds / 2))
+
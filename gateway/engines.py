@@ -0,0 +1,629 @@
+"""In-process tool engines.
+
+Every engine imports its tool once, keeps the loaded state (site databases,
+holehe module list) resident in the gateway process and runs scans as library
+calls instead of starting a new interpreter per request.
+"""
+import asyncio
+import inspect
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import CancelledError, ThreadPoolExecutor
+from functools import partialmethod
+from typing import Callable, Dict, List, Optional
+
+from .config import ENGINE_THREADS
+from .deadline import Deadline
+from .probes import ProbeError, SharedProbes
+
+Emit = Optional[Callable[[Dict], None]]
+
+# Long-lived worker threads for the engines that block (sherlock uses
+# requests-futures, holehe runs on trio).
+_pool = ThreadPoolExecutor(max_workers=ENGINE_THREADS, thread_name_prefix="osint-engine")
+
+# How often a tool thread checks whether its scan was cancelled (seconds).
+CANCEL_POLL_INTERVAL = 0.2
+
+# Timeout of GHunt's own HTTP client (seconds), lowered when a deadline is closer.
+GHUNT_TIMEOUT = 15
+
+
+class EngineUnavailable(Exception):
+    """The tool can't be imported into the gateway process."""
+
+
+class ScanCancelled(Exception):
+    """Raised inside a tool thread to stop a scan nobody is waiting for."""
+
+
+class _NotifyAdapter:
+    """Duck-typed QueryNotify for sherlock and maigret that forwards every site result.
+
+    With a `cancelled` event, the next site result after it is set aborts the scan.
+    """
+
+    def __init__(self, callback: Optional[Callable] = None, cancelled: Optional[threading.Event] = None):
+        self.callback = callback
+        self.cancelled = cancelled
+
+    def start(self, *args, **kwargs):
+        pass
+
+    def update(self, result, *args, **kwargs):
+        if self.cancelled is not None and self.cancelled.is_set():
+            raise ScanCancelled()
+        if self.callback:
+            self.callback(result)
+
+    def finish(self, *args, **kwargs):
+        pass
+
+    def warning(self, *args, **kwargs):
+        pass
+
+    success = info = warning
+
+
+class _ReportingList(list):
+    """holehe's `out` list that reports every module result as it is appended."""
+
+    def __init__(self, callback: Optional[Callable] = None):
+        super().__init__()
+        self.callback = callback
+
+    def append(self, item):
+        super().append(item)
+        if self.callback:
+            self.callback(item)
+
+
+class _ProbeSession:
+    """sherlock session whose requests go through the shared probes on the gateway loop.
+
+    Like requests-futures, every request returns a concurrent future of a
+    requests.Response, so sherlock's detection code runs unchanged.
+    """
+
+    _ERRORS = {"timeout": "Timeout", "connect": "ConnectionError", "disconnected": "ConnectionError"}
+
+    def __init__(self, probes: SharedProbes, loop: asyncio.AbstractEventLoop, requests):
+        self.probes = probes
+        self.loop = loop
+        self.requests = requests
+
+    def request(self, method: str, url: str, headers=None, allow_redirects=True, timeout=60, json=None, **kwargs):
+        return asyncio.run_coroutine_threadsafe(self._fetch(method, url, headers, allow_redirects, timeout, json), self.loop)
+
+    get = partialmethod(request, "GET")
+    head = partialmethod(request, "HEAD")
+    post = partialmethod(request, "POST")
+    put = partialmethod(request, "PUT")
+
+    async def _fetch(self, method, url, headers, allow_redirects, timeout, payload):
+        try:
+            probe = await self.probes.fetch(method, url, headers, allow_redirects, timeout, payload)
+        except ProbeError as e:
+            error = getattr(self.requests.exceptions, self._ERRORS.get(e.kind, "RequestException"))
+            raise error(str(e)) from e
+        response = self.requests.Response()
+        response.status_code = probe.status
+        response._content = probe.content
+        response.encoding = probe.charset
+        response.url = probe.url
+        response.headers = self.requests.structures.CaseInsensitiveDict(probe.headers)
+        # sherlock's own session reports elapsed as seconds, not a timedelta.
+        response.elapsed = probe.elapsed
+        return response
+
+
+class _ProbeChecker:
+    """maigret clearweb checker on the shared probes, answering like SimpleAiohttpChecker."""
+
+    _ERRORS = {"timeout": "Request timeout", "connect": "Connecting failure", "disconnected": "Server disconnected"}
+
+    def __init__(self, probes: SharedProbes, check_error):
+        self.probes = probes
+        self.CheckError = check_error
+        self.request = None
+
+    def prepare(self, url, headers=None, allow_redirects=True, timeout=0, method="get", matcher=None):
+        self.request = (method, url, headers, allow_redirects, timeout, matcher)
+
+    async def check(self):
+        # maigret uses one checker for every site and calls prepare() right
+        # before check(), so the request must be read before the first await.
+        method, url, headers, allow_redirects, timeout, matcher = self.request
+        try:
+            # The matcher is fed as the body streams in, and reading stops at
+            # the site's maxBytes or once the check is decided.
+            probe = await self.probes.fetch(
+                method,
+                url,
+                headers,
+                allow_redirects,
+                timeout or 10,
+                max_bytes=matcher.max_bytes if matcher is not None else None,
+                matcher=matcher,
+            )
+        except ProbeError as e:
+            return "", 0, self.CheckError(self._ERRORS.get(e.kind, "Unexpected"), str(e))
+        return probe.text, probe.status, self.CheckError("Connection lost") if probe.status == 0 else None
+
+    async def close(self):
+        pass
+
+
+def _threadsafe(emit: Emit, loop: asyncio.AbstractEventLoop) -> Emit:
+    """Wrap emit so worker threads can call it; emit always runs on the gateway loop."""
+    if emit is None:
+        return None
+    return lambda item: loop.call_soon_threadsafe(emit, item)
+
+
+def _seconds(query_time) -> Optional[float]:
+    if query_time is None:
+        return None
+    if hasattr(query_time, "total_seconds"):
+        return round(query_time.total_seconds(), 3)
+    return round(float(query_time), 3)
+
+
+class ToolEngine:
+    name = ""
+
+    def __init__(self):
+        self.loaded = False
+        self.load_error: Optional[str] = None
+        self.load_time: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def load(self) -> bool:
+        """Import the tool and build its resident state; cheap after the first call."""
+        with self._lock:
+            if self.loaded or self.load_error:
+                return self.loaded
+            started = time.monotonic()
+            try:
+                self._load()
+            except Exception as e:
+                self.load_error = f"{type(e).__name__}: {e}"
+                print(f"⚠️ {self.name} engine unavailable: {self.load_error}")
+            else:
+                self.loaded = True
+                self.load_time = time.monotonic() - started
+                print(f"🔥 {self.name} engine loaded in {self.load_time:.2f}s")
+            return self.loaded
+
+    async def ensure_loaded(self) -> bool:
+        if self.loaded:
+            return True
+        return await asyncio.get_running_loop().run_in_executor(_pool, self.load)
+
+    async def run(self, target: str, options: Optional[Dict] = None, emit: Emit = None) -> Dict:
+        """Scan target; emit (if given) is called on the event loop with every site result.
+
+        sherlock and maigret take options["skip"], site names not to check,
+        and return every site verdict under "checks" next to the claimed profiles.
+        With options["probes"] (a SharedProbes), they send their site requests through it.
+        With options["deadline"] (a Deadline), every engine caps its request
+        timeouts to it and stops starting site checks that could not finish in
+        time; a section cut short that way has "partial" and "unchecked".
+        """
+        if not await self.ensure_loaded():
+            raise EngineUnavailable(self.load_error)
+        return await self._run(target, options or {}, emit)
+
+    async def close(self):
+        """Release what the engine keeps open between scans."""
+
+    def _load(self):
+        raise NotImplementedError
+
+    async def _run(self, target: str, options: Dict, emit: Emit) -> Dict:
+        raise NotImplementedError
+
+
+class HoleheEngine(ToolEngine):
+    name = "holehe"
+
+    def _load(self):
+        import httpx
+        import trio
+        from holehe import core
+
+        self.httpx, self.trio, self.core = httpx, trio, core
+        self.websites = core.get_functions(core.import_submodules("holehe.modules"))
+
+    async def _run(self, email: str, options: Dict, emit: Emit) -> Dict:
+        loop = asyncio.get_running_loop()
+        report = _threadsafe(emit, loop)
+        timeout = options.get("timeout", 10)
+        deadline = options.get("deadline")
+        if deadline is not None:
+            timeout = deadline.cap(timeout)
+        cancelled = threading.Event()
+        try:
+            out = await loop.run_in_executor(_pool, self._scan, email, timeout, report, cancelled, deadline)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+        accounts = [holehe_account(r) for r in sorted(out, key=lambda r: r.get("name", ""))]
+        section = {"accounts": accounts, "total": len(accounts)}
+        if len(out) < len(self.websites):
+            section.update(partial=True, unchecked=len(self.websites) - len(out))
+        return section
+
+    def _scan(
+        self,
+        email: str,
+        timeout: float,
+        report: Emit,
+        cancelled: threading.Event,
+        deadline: Optional[Deadline] = None,
+    ) -> List[Dict]:
+        """Modules still running when the deadline passes are cancelled and left out."""
+        callback = (lambda r: report({"tool": self.name, **holehe_account(r)})) if report else None
+        out = _ReportingList(callback)
+
+        async def watch(scope):
+            while not cancelled.is_set() and not (deadline is not None and deadline.expired):
+                await self.trio.sleep(CANCEL_POLL_INTERVAL)
+            scope.cancel()
+
+        async def scan():
+            client = self.httpx.AsyncClient(timeout=timeout)
+            try:
+                async with self.trio.open_nursery() as nursery:
+                    nursery.start_soon(watch, nursery.cancel_scope)
+                    async with self.trio.open_nursery() as modules:
+                        for website in self.websites:
+                            modules.start_soon(self.core.launch_module, website, email, client, out)
+                    nursery.cancel_scope.cancel()
+            finally:
+                await client.aclose()
+
+        self.trio.run(scan)
+        return list(out)
+
+
+def holehe_account(result: Dict) -> Dict:
+    """One holehe `out` entry with a readable status; every original field is kept."""
+    if result.get("rateLimit"):
+        status = "rate limit"
+    elif result.get("error"):
+        status = "error"
+    elif result.get("exists"):
+        status = "used"
+    else:
+        status = "not used"
+    return {
+        "site": result.get("domain"),
+        "status": status,
+        **result,
+        "exists": result.get("exists") is True,
+    }
+
+
+class GHuntEngine(ToolEngine):
+    name = "ghunt"
+
+    def _load(self):
+        from ghunt.helpers.utils import get_httpx_client
+        from ghunt.modules.email import hunt
+
+        self.get_httpx_client, self.hunt = get_httpx_client, hunt
+
+    async def _run(self, email: str, options: Dict, emit: Emit) -> Dict:
+        # hunt() only exposes its GHuntEncoder JSON through a file.
+        fd, json_path = tempfile.mkstemp(prefix="ghunt_", suffix=".json")
+        os.close(fd)
+        client = self.get_httpx_client()
+        deadline = options.get("deadline")
+        if deadline is not None:
+            # hunt() only reports at the end, so its requests are all capped to the time left.
+            client.timeout = deadline.cap(GHUNT_TIMEOUT)
+        try:
+            try:
+                await self.hunt(client, email, json_file=json_path)
+            except SystemExit:
+                return {"google_info": {}, "error": "Target is not a public Google account"}
+            finally:
+                await client.aclose()
+            with open(json_path, encoding="utf-8") as f:
+                content = f.read()
+        finally:
+            os.unlink(json_path)
+
+        data = json.loads(content) if content else {}
+        info = ghunt_summary(data)
+        if emit:
+            for key, value in info.items():
+                emit({"tool": self.name, "section": key, "value": value})
+        return {"google_info": info, "json": data}
+
+
+def _profile_field(section: Optional[Dict], field: str):
+    return ((section or {}).get("PROFILE") or {}).get(field)
+
+
+def ghunt_summary(data: Dict) -> Dict:
+    """Flatten the GHuntEncoder JSON into the key/value view the API has always returned."""
+    container = data.get("PROFILE_CONTAINER") or {}
+    profile = container.get("profile") or {}
+    info = {}
+
+    info["Gaia ID"] = profile.get("personId")
+    info["Email"] = _profile_field(profile.get("emails"), "value")
+    info["Name"] = _profile_field(profile.get("names"), "fullname")
+    info["Last profile edit"] = _profile_field(profile.get("sourceIds"), "lastUpdated")
+    photo = (profile.get("profilePhotos") or {}).get("PROFILE") or {}
+    if photo and not photo.get("isDefault"):
+        info["Profile picture"] = photo.get("url")
+    cover = (profile.get("coverPhotos") or {}).get("PROFILE") or {}
+    if cover and not cover.get("isDefault"):
+        info["Cover picture"] = cover.get("url")
+    apps = _profile_field(profile.get("inAppReachability"), "apps")
+    if apps:
+        info["Activated Google services"] = ", ".join(apps)
+    dynamite = ((profile.get("extendedData") or {}).get("dynamiteData")) or {}
+    info["Entity Type"] = dynamite.get("entityType")
+    info["Customer ID"] = dynamite.get("customerId")
+
+    player = ((container.get("play_games") or {}).get("profile")) or {}
+    if player:
+        info["Play Games username"] = player.get("display_name")
+        info["Player ID"] = player.get("id")
+    maps = container.get("maps") or {}
+    if maps.get("reviews"):
+        info["Maps reviews"] = len(maps["reviews"])
+    if container.get("calendar"):
+        info["Public calendar"] = True
+
+    return {k: v for k, v in info.items() if v not in (None, "")}
+
+
+class SherlockEngine(ToolEngine):
+    name = "sherlock"
+
+    def _load(self):
+        import requests
+        import sherlock_project
+        from sherlock_project.result import QueryStatus
+        from sherlock_project.sherlock import sherlock
+        from sherlock_project.sites import SitesInformation
+
+        if "session" not in inspect.signature(sherlock).parameters:
+            # The shared probes hook in through the bundled sherlock's session argument.
+            raise EngineUnavailable(
+                "the installed sherlock_project takes no session; install the bundled one (pip install -e ./sherlock)"
+            )
+        data_file = os.path.join(os.path.dirname(sherlock_project.__file__), "resources", "data.json")
+        sites = SitesInformation(data_file)
+        sites.remove_nsfw_sites()
+        self.site_data = {site.name: site.information for site in sites}
+        self.search, self.QueryStatus, self.requests = sherlock, QueryStatus, requests
+
+    async def _run(self, username: str, options: Dict, emit: Emit) -> Dict:
+        loop = asyncio.get_running_loop()
+        report = _threadsafe(emit, loop)
+        # sherlock() stores its request futures in the site dicts, so every
+        # scan gets its own shallow copies.
+        skip = set(options.get("skip", ()))
+        site_data = {name: dict(info) for name, info in self.site_data.items() if name not in skip}
+        probes = options.get("probes")
+        session = _ProbeSession(probes, loop, self.requests) if probes else None
+        timeout = options.get("timeout", 60)
+        deadline = options.get("deadline")
+        stop = None
+        if deadline is not None:
+            timeout = deadline.request_timeout(timeout)
+            # Requests still queued in sherlock's own session when they could
+            # no longer finish in time are dropped before they are sent. The
+            # shared probes send every request at once, each capped at
+            # timeout, so they all end by the deadline: they are left alone,
+            # cancelling them would only lose answers.
+            if session is None:
+                stop = loop.call_later(deadline.remaining() - timeout, _drop_requests, site_data)
+        cancelled = threading.Event()
+        try:
+            results = await loop.run_in_executor(
+                _pool, self._scan, username, site_data, timeout, report, cancelled, session
+            )
+        except asyncio.CancelledError:
+            # Drop the requests that have not started; sherlock's thread stops
+            # at the next result it reads.
+            cancelled.set()
+            _drop_requests(site_data)
+            raise
+        finally:
+            if stop is not None:
+                stop.cancel()
+
+        profiles, checks = [], []
+        unchecked = 0
+        for site, r in results.items():
+            status = r.get("status")
+            if status is None:
+                continue
+            future = site_data[site].get("request_future")
+            if future is not None and future.cancelled():
+                unchecked += 1
+                continue
+            profile = sherlock_profile(status, r.get("http_status"))
+            checks.append(profile)
+            if status.status == self.QueryStatus.CLAIMED:
+                profiles.append(profile)
+        section = {"profiles": profiles, "total": len(profiles), "checked": len(checks), "checks": checks}
+        if unchecked:
+            section.update(partial=True, unchecked=unchecked)
+        return section
+
+    def _scan(
+        self,
+        username: str,
+        site_data: Dict,
+        timeout: float,
+        report: Emit,
+        cancelled: threading.Event,
+        session=None,
+    ) -> Dict:
+        callback = (lambda r: report({"tool": self.name, **sherlock_profile(r)})) if report else None
+        kwargs = {"timeout": timeout}
+        if session is not None:
+            kwargs["session"] = session
+        try:
+            return self.search(username, site_data, _NotifyAdapter(callback, cancelled), **kwargs)
+        except (ScanCancelled, CancelledError):
+            return {}
+
+
+def _drop_requests(site_data: Dict):
+    """Cancel the sherlock requests that have not been sent yet."""
+    for info in site_data.values():
+        future = info.get("request_future")
+        if future is not None:
+            future.cancel()
+
+
+def sherlock_profile(result, http_status=None) -> Dict:
+    profile = {
+        "site": result.site_name,
+        "url": result.site_url_user,
+        "status": str(result.status),
+        "query_time": _seconds(result.query_time),
+    }
+    if result.context:
+        profile["context"] = result.context
+    if http_status is not None:
+        profile["http_status"] = http_status
+    return profile
+
+
+class MaigretEngine(ToolEngine):
+    name = "maigret"
+
+    def _load(self):
+        import maigret
+        from maigret.checking import SimpleAiohttpChecker
+        from maigret.checking import maigret as search
+        from maigret.errors import CheckError
+        from maigret.settings import Settings
+        from maigret.sites import MaigretDatabase
+
+        # The snapshot, the pooled checker and deadlines are hooks of the bundled maigret.
+        hooks = {
+            "MaigretDatabase.load_from_file(snapshot_path=)": (MaigretDatabase.load_from_file, "snapshot_path"),
+            "maigret(checker=)": (search, "checker"),
+            "maigret(deadline=)": (search, "deadline"),
+        }
+        missing = [hook for hook, (func, name) in hooks.items() if name not in inspect.signature(func).parameters]
+        if missing:
+            raise EngineUnavailable(
+                f"the installed maigret has no {', '.join(missing)}; install the bundled one (pip install -e ./maigret)"
+            )
+        settings = Settings()
+        loaded, err = settings.load()
+        if not loaded:
+            raise RuntimeError(err)
+        db_file = os.path.join(os.path.dirname(maigret.__file__), settings.sites_db_path)
+
+        self.settings = settings
+        self.db = MaigretDatabase().load_from_file(db_file, snapshot_path=settings.sites_db_snapshot_path)
+        self.search = search
+        self.CheckError = CheckError
+        self.logger = logging.getLogger("maigret")
+        self.logger.setLevel(logging.ERROR)
+        # One pooled keep-alive session for every scan (opened by the first one).
+        self.checker = SimpleAiohttpChecker(logger=self.logger, connections=settings.max_connections)
+
+    async def close(self):
+        if self.loaded:
+            await self.checker.close()
+
+    async def _run(self, username: str, options: Dict, emit: Emit) -> Dict:
+        id_type = options.get("id_type", "username")
+        site_dict = self.db.ranked_sites_dict(
+            top=options.get("top_sites", self.settings.top_sites_count),
+            disabled=False,
+            id_type=id_type,
+        )
+        skip = set(options.get("skip", ()))
+        if skip:
+            # Verdicts name mirror sites "Name [Source]", so match on that.
+            site_dict = {name: site for name, site in site_dict.items() if site.pretty_name not in skip}
+        callback = (lambda r: emit({"tool": self.name, **maigret_profile(r)})) if emit else None
+        timeout = options.get("timeout", self.settings.timeout)
+        deadline = options.get("deadline")
+        if deadline is not None:
+            timeout = deadline.request_timeout(timeout)
+
+        results = await self.search(
+            username=username,
+            site_dict=site_dict,
+            logger=self.logger,
+            query_notify=_NotifyAdapter(callback),
+            timeout=timeout,
+            is_parsing_enabled=self.settings.info_extracting,
+            id_type=id_type,
+            max_connections=options.get("max_connections", self.settings.max_connections),
+            retries=self.settings.retries_count,
+            no_progressbar=True,
+            checker=_ProbeChecker(options["probes"], self.CheckError) if options.get("probes") else self.checker,
+            # Sites that could not be checked by then are not started.
+            deadline=deadline.at if deadline is not None else None,
+        )
+
+        profiles, checks = [], []
+        for site, r in results.items():
+            status = r.get("status")
+            if status is None:
+                continue
+            profile = maigret_profile(status, r)
+            checks.append(profile)
+            if status.is_found():
+                profiles.append(profile)
+        section = {"profiles": profiles, "total": len(profiles), "checked": len(results), "checks": checks}
+        if len(results) < len(site_dict):
+            section.update(partial=True, unchecked=len(site_dict) - len(results))
+        return section
+
+
+def maigret_profile(result, site_result: Optional[Dict] = None) -> Dict:
+    profile = {
+        "site": result.site_name,
+        "url": result.site_url_user,
+        "status": str(result.status),
+        "query_time": _seconds(result.query_time),
+    }
+    if result.ids_data:
+        profile["ids"] = result.ids_data
+    if result.tags:
+        profile["tags"] = result.tags
+    if result.error:
+        profile["error"] = str(result.error)
+    if site_result:
+        for key in ("http_status", "rank", "ids_usernames", "ids_links"):
+            if site_result.get(key) not in (None, ""):
+                profile[key] = site_result[key]
+    return profile
+
+
+ENGINES: Dict[str, ToolEngine] = {
+    engine.name: engine
+    for engine in (HoleheEngine(), GHuntEngine(), SherlockEngine(), MaigretEngine())
+}
+
+
+def get_engine(tool: str) -> Optional[ToolEngine]:
+    return ENGINES.get(tool)
+
+
+async def warm_up() -> Dict[str, bool]:
+    """Load all engines in the worker threads; returns which ones are usable."""
+    loaded = await asyncio.gather(*(engine.ensure_loaded() for engine in ENGINES.values()))
+    return dict(zip(ENGINES, loaded))
@@ -0,0 +1,105 @@
+"""Run a tool against one target, in-process when possible and via the CLI otherwise."""
+import asyncio
+import threading
+from typing import Callable, Dict, List, Optional
+
+from . import metrics, workers
+from .cli import run_cli_tool
+from .config import EXECUTION_MODE, PROBES_ENABLED
+from .engines import Emit, EngineUnavailable, get_engine
+from .ingest import option_args, run_structured
+from .parsers import (
+    parse_ghunt_output,
+    parse_holehe_output,
+    parse_maigret_output,
+    parse_sherlock_output,
+)
+from .probes import shared_probes
+
+CLI_ARGS: Dict[str, Callable[[str], List[str]]] = {
+    "holehe": lambda value: [value],
+    "ghunt": lambda value: ["email", value],
+    "sherlock": lambda value: [value],
+    "maigret": lambda value: [value],
+}
+
+# In-process engines that send their site requests through the shared probes.
+PROBE_TOOLS = ("sherlock", "maigret")
+
+PARSERS: Dict[str, Callable[[str], Dict]] = {
+    "holehe": parse_holehe_output,
+    "ghunt": parse_ghunt_output,
+    "sherlock": parse_sherlock_output,
+    "maigret": parse_maigret_output,
+}
+
+
+def _emit_items(tool: str, section: Dict, emit: Emit):
+    if emit:
+        for item in section.get("accounts", section.get("profiles", [])):
+            emit({"tool": tool, **item})
+
+
+async def execute_tool(
+    tool: str,
+    value: str,
+    options: Optional[Dict] = None,
+    emit: Emit = None,
+    timeout: Optional[float] = None,
+) -> Dict:
+    """Return the tool's section of a scan response; errors come back as {"error": ...}.
+
+    timeout only bounds the CLI fallback, where it kills the subprocess. The
+    CLI fallback reads the tool's structured report and only scrapes stdout
+    when the installed tool did not produce one.
+    """
+    if EXECUTION_MODE == "workers":
+        try:
+            result = await workers.run(tool, value, options)
+        except EngineUnavailable:
+            pass
+        except Exception as e:
+            return {"error": f"{type(e).__name__}: {e}", "method": "worker"}
+        else:
+            _emit_items(tool, result, emit)
+            result["method"] = "worker"
+            return result
+
+    engine = get_engine(tool) if EXECUTION_MODE not in ("subprocess", "workers") else None
+    if engine is not None:
+        if PROBES_ENABLED and tool in PROBE_TOOLS:
+            options = {**(options or {}), "probes": shared_probes}
+        try:
+            result = await engine.run(value, options, emit)
+            result["method"] = "in-process"
+            return result
+        except EngineUnavailable as e:
+            if EXECUTION_MODE == "inprocess":
+                return {"error": f"{tool} can't run in-process: {e}", "method": "in-process"}
+        except Exception as e:
+            return {"error": f"{type(e).__name__}: {e}", "method": "in-process"}
+
+    metrics.cli_processes.inc(tool=tool)
+    try:
+        result = await run_structured(tool, value, timeout or 30, emit, options)
+        if result is not None:
+            return result
+
+        cancelled = threading.Event()
+        try:
+            cli_result = await asyncio.get_running_loop().run_in_executor(
+                None, run_cli_tool, tool, CLI_ARGS[tool](value) + option_args(tool, options), int(timeout or 30), cancelled
+            )
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+    finally:
+        metrics.cli_processes.dec(tool=tool)
+    if cli_result["success"]:
+        result = PARSERS[tool](cli_result["stdout"])
+        # The CLI only reports once it has exited.
+        _emit_items(tool, result, emit)
+    else:
+        result = {"error": cli_result["stderr"]}
+    result["method"] = cli_result.get("method", "unknown")
+    return result
@@ -0,0 +1,246 @@
+"""Persistent scan history: one row per (target, tool, site) verdict, indexed for cross-target queries."""
+import json
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional
+
+from .cache import normalize_target
+from .config import HISTORY_DB, HISTORY_ENABLED
+from .metrics import site_outcome
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS scans (
+    id INTEGER PRIMARY KEY,
+    target TEXT NOT NULL,
+    tool TEXT NOT NULL,
+    scanned_at REAL NOT NULL,
+    elapsed REAL,
+    sites INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS scans_target ON scans (target, tool, scanned_at);
+
+CREATE TABLE IF NOT EXISTS site_results (
+    id INTEGER PRIMARY KEY,
+    scan_id INTEGER NOT NULL REFERENCES scans (id),
+    target TEXT NOT NULL,
+    tool TEXT NOT NULL,
+    site TEXT NOT NULL,
+    outcome TEXT NOT NULL,
+    status TEXT,
+    url TEXT,
+    http_status INTEGER,
+    scanned_at REAL NOT NULL,
+    checked_at REAL,
+    ids TEXT
+);
+CREATE INDEX IF NOT EXISTS site_results_site ON site_results (site, outcome, scanned_at);
+CREATE INDEX IF NOT EXISTS site_results_scan ON site_results (scan_id);
+CREATE INDEX IF NOT EXISTS site_results_time ON site_results (scanned_at);
+"""
+
+# External-content FTS index over the ids maigret extracts (names, uids, links...).
+_FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS ids_fts USING fts5 (ids, content='site_results', content_rowid='id');
+"""
+
+
+def _site_items(section: Dict) -> List[Dict]:
+    return section.get("accounts", section.get("profiles", []))
+
+
+class ScanHistory:
+    """Writes happen in worker threads (record() is blocking); reads are single indexed queries.
+
+    A scan stores every site verdict the tool reported: all of them from the
+    in-process engines, only the claimed sites from the sherlock and maigret
+    CLI reports. checked_at is when a verdict was actually observed, which
+    is older than scanned_at for verdicts an incremental rescan reused.
+    """
+
+    def __init__(self, path: str = HISTORY_DB):
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+        columns = [row[1] for row in self._db.execute("PRAGMA table_info(site_results)")]
+        if "checked_at" not in columns:
+            self._db.execute("ALTER TABLE site_results ADD COLUMN checked_at REAL")
+        try:
+            self._db.executescript(_FTS_SCHEMA)
+            self.fts = True
+        except sqlite3.OperationalError:
+            print("⚠️ SQLite has no FTS5, /history/search falls back to LIKE")
+            self.fts = False
+        self._db.commit()
+        self._lock = threading.Lock()
+
+    def record(
+        self,
+        tool: str,
+        target: str,
+        section: Dict,
+        checks: Optional[List[Dict]] = None,
+        scanned_at: Optional[float] = None,
+    ):
+        """Store a scan; checks (every site verdict) replace the section's own site list when given."""
+        scanned_at = scanned_at or time.time()
+        target = normalize_target(target)
+        items = [item for item in (_site_items(section) if checks is None else checks) if item.get("site")]
+        with self._lock, self._db:
+            scan_id = self._db.execute(
+                "INSERT INTO scans (target, tool, scanned_at, elapsed, sites) VALUES (?, ?, ?, ?, ?)",
+                (target, tool, scanned_at, section.get("elapsed"), len(items)),
+            ).lastrowid
+            for item in items:
+                ids = json.dumps(item["ids"], ensure_ascii=False) if item.get("ids") else None
+                http_status = item.get("http_status")
+                row_id = self._db.execute(
+                    "INSERT INTO site_results"
+                    " (scan_id, target, tool, site, outcome, status, url, http_status, scanned_at, checked_at, ids)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        scan_id,
+                        target,
+                        tool,
+                        item["site"],
+                        item.get("outcome") or site_outcome(item),
+                        str(item.get("status")),
+                        item.get("url"),
+                        http_status if isinstance(http_status, int) else None,
+                        scanned_at,
+                        item.get("checked_at") or scanned_at,
+                        ids,
+                    ),
+                ).lastrowid
+                if ids and self.fts:
+                    self._db.execute("INSERT INTO ids_fts (rowid, ids) VALUES (?, ?)", (row_id, ids))
+
+    def _query(self, sql: str, params=()) -> List[Dict]:
+        with self._lock:
+            return [dict(row) for row in self._db.execute(sql, params).fetchall()]
+
+    def targets_on_site(self, site: str, outcome: str = "claimed", since: float = 0, limit: int = 100) -> List[Dict]:
+        """Targets with `outcome` on site since a timestamp, most recent first."""
+        return self._query(
+            "SELECT target, tool, MAX(scanned_at) AS last_seen, COUNT(*) AS times, url FROM site_results"
+            " WHERE site = ? AND outcome = ? AND scanned_at >= ?"
+            " GROUP BY target, tool ORDER BY last_seen DESC LIMIT ?",
+            (site, outcome, since, limit),
+        )
+
+    def scans(self, target: str, tool: Optional[str] = None, limit: int = 20) -> List[Dict]:
+        sql = "SELECT id, tool, scanned_at, elapsed, sites FROM scans WHERE target = ?"
+        params: list = [normalize_target(target)]
+        if tool:
+            sql += " AND tool = ?"
+            params.append(tool)
+        return self._query(sql + " ORDER BY scanned_at DESC LIMIT ?", params + [limit])
+
+    def sites(self, scan_id: int) -> List[Dict]:
+        rows = self._query(
+            "SELECT site, outcome, status, url, http_status, COALESCE(checked_at, scanned_at) AS checked_at, ids"
+            " FROM site_results WHERE scan_id = ? ORDER BY site",
+            (scan_id,),
+        )
+        for row in rows:
+            row["ids"] = json.loads(row["ids"]) if row["ids"] else None
+        return rows
+
+    def _scan_at(self, target: str, tool: str, at: float, before: bool = True) -> Optional[int]:
+        """The last scan at or before `at`, or with before=False the first one after it."""
+        where, order = ("<=", "DESC") if before else (">", "ASC")
+        rows = self._query(
+            f"SELECT id FROM scans WHERE target = ? AND tool = ? AND scanned_at {where} ? ORDER BY scanned_at {order} LIMIT 1",
+            (target, tool, at),
+        )
+        return rows[0]["id"] if rows else None
+
+    def diff(self, target: str, since: float, until: Optional[float] = None) -> Dict[str, Dict]:
+        """Per tool: what changed between the scan as of `since` and the last scan at `until` (default now).
+
+        When a tool has no scan that old, its first scan after `since` is the baseline.
+        """
+        target = normalize_target(target)
+        until = until or time.time()
+        tools = [row["tool"] for row in self._query("SELECT DISTINCT tool FROM scans WHERE target = ?", (target,))]
+        changes = {}
+        for tool in tools:
+            old_id = self._scan_at(target, tool, since) or self._scan_at(target, tool, since, before=False)
+            new_id = self._scan_at(target, tool, until)
+            if new_id is None or old_id == new_id:
+                continue
+            old = {row["site"]: row for row in self.sites(old_id)}
+            new = {row["site"]: row for row in self.sites(new_id)}
+            changes[tool] = {
+                "from_scan": old_id,
+                "to_scan": new_id,
+                "added": [new[site] for site in sorted(new.keys() - old.keys())],
+                "removed": [old[site] for site in sorted(old.keys() - new.keys())],
+                "changed": [
+                    {"site": site, "from": old[site]["outcome"], "to": new[site]["outcome"]}
+                    for site in sorted(new.keys() & old.keys())
+                    if old[site]["outcome"] != new[site]["outcome"]
+                ],
+            }
+        return changes
+
+    def reusable(self, tool: str, target: str, freshness: Dict[str, float]) -> Dict[str, Dict]:
+        """Site verdicts from the last scan of target that are still fresh, by site.
+
+        freshness maps an outcome to the seconds its verdicts stay valid;
+        outcomes it does not list are always re-checked.
+        """
+        scan_id = self._scan_at(normalize_target(target), tool, time.time())
+        if scan_id is None:
+            return {}
+        now = time.time()
+        return {
+            row["site"]: row
+            for row in self.sites(scan_id)
+            if now - row["checked_at"] < freshness.get(row["outcome"], 0)
+        }
+
+    def prune(self, older_than: float) -> int:
+        """Delete scans made before a timestamp, with their site results; returns how many."""
+        with self._lock, self._db:
+            if self.fts:
+                for row in self._db.execute(
+                    "SELECT id, ids FROM site_results WHERE scanned_at < ? AND ids IS NOT NULL", (older_than,)
+                ).fetchall():
+                    self._db.execute("INSERT INTO ids_fts (ids_fts, rowid, ids) VALUES ('delete', ?, ?)", tuple(row))
+            self._db.execute("DELETE FROM site_results WHERE scanned_at < ?", (older_than,))
+            return self._db.execute("DELETE FROM scans WHERE scanned_at < ?", (older_than,)).rowcount
+
+    def search(self, query: str, limit: int = 50) -> List[Dict]:
+        """Site results whose extracted ids match query (FTS5 syntax when available)."""
+        if self.fts:
+            rows = self._query(
+                "SELECT r.target, r.tool, r.site, r.url, r.scanned_at, r.ids FROM ids_fts"
+                " JOIN site_results r ON r.id = ids_fts.rowid"
+                " WHERE ids_fts MATCH ? ORDER BY rank LIMIT ?",
+                (query, limit),
+            )
+        else:
+            rows = self._query(
+                "SELECT target, tool, site, url, scanned_at, ids FROM site_results"
+                " WHERE ids LIKE ? ORDER BY scanned_at DESC LIMIT ?",
+                (f"%{query}%", limit),
+            )
+        for row in rows:
+            row["ids"] = json.loads(row["ids"]) if row["ids"] else None
+        return rows
+
+
+def _open() -> Optional[ScanHistory]:
+    if not HISTORY_ENABLED:
+        return None
+    try:
+        return ScanHistory()
+    except sqlite3.Error as e:
+        print(f"⚠️ Scan history at {HISTORY_DB} unavailable, results will not be kept: {e}")
+        return None
+
+
+scan_history: Optional[ScanHistory] = _open()
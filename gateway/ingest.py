@@ -0,0 +1,245 @@
+"""Structured CLI ingestion: run a tool with its machine-readable report enabled and stream that report.
+
+Every tool can write a report file next to its coloured terminal output:
+holehe a CSV of its `out` dicts, sherlock a CSV with http status and response
+time, maigret one JSON object per found account (ndjson) and GHunt its
+GHuntEncoder JSON. Reports are read a row or a line at a time, and the
+terminal output is drained into a fixed-size tail, so memory stays flat no
+matter how many sites a scan covers.
+"""
+import asyncio
+import csv
+import glob
+import json
+import os
+import signal
+import tempfile
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from .engines import Emit, ghunt_summary, holehe_account
+from .resolver import TOOL_ENV, tool_resolver
+
+MAX_LINE = 1 << 20
+TAIL_BYTES = 4096
+CHUNK_SIZE = 1 << 16
+# sherlock and maigret name their report after the target.
+NAMED_REPORTS = ("sherlock", "maigret")
+PATH_SEPARATORS = {"/", os.sep, "\0"}
+
+
+def _flag(value: str) -> Optional[bool]:
+    return {"True": True, "False": False}.get(value)
+
+
+def _number(value: str) -> Optional[float]:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def iter_csv(path: str) -> Iterator[Dict[str, str]]:
+    with open(path, newline="", encoding="utf-8") as f:
+        yield from csv.DictReader(f)
+
+
+def iter_ndjson(path: str, max_line: int = MAX_LINE) -> Iterator[Dict]:
+    """One object per line; a line longer than max_line is skipped without being held in memory."""
+    with open(path, encoding="utf-8") as f:
+        while True:
+            line = f.readline(max_line)
+            if not line:
+                return
+            if not line.endswith("\n") and len(line) == max_line:
+                while line and not line.endswith("\n"):
+                    line = f.readline(max_line)
+                print(f"⚠️ Skipped a report line over {max_line} bytes in {path}")
+                continue
+            if line.strip():
+                yield json.loads(line)
+
+
+def holehe_row(row: Dict[str, str]) -> Dict:
+    """A row of holehe's --csv report, typed back into the `out` dict it was written from."""
+    result = {
+        **row,
+        "exists": _flag(row.get("exists")),
+        "rateLimit": _flag(row.get("rateLimit")),
+        "frequent_rate_limit": _flag(row.get("frequent_rate_limit")),
+    }
+    for field in ("emailrecovery", "phoneNumber", "others"):
+        if not result.get(field):
+            result[field] = None
+    return holehe_account(result)
+
+
+def sherlock_row(row: Dict[str, str]) -> Dict:
+    profile = {
+        "site": row["name"],
+        "url": row["url_user"],
+        "status": row["exists"],
+        "query_time": _number(row.get("response_time_s")),
+    }
+    if row.get("url_main"):
+        profile["url_main"] = row["url_main"]
+    if row.get("http_status"):
+        profile["http_status"] = int(row["http_status"]) if row["http_status"].isdigit() else row["http_status"]
+    return profile
+
+
+def maigret_row(data: Dict) -> Dict:
+    status = data.get("status") or {}
+    profile = {
+        "site": data.get("sitename") or status.get("site_name"),
+        "url": status.get("url") or data.get("url_user"),
+        "status": status.get("status"),
+    }
+    if status.get("ids"):
+        profile["ids"] = status["ids"]
+    if status.get("tags"):
+        profile["tags"] = status["tags"]
+    for key in ("http_status", "rank", "ids_usernames", "ids_links", "url_main", "is_similar"):
+        if data.get(key) not in (None, ""):
+            profile[key] = data[key]
+    return profile
+
+
+# tool -> (arguments for a run writing into outdir, report files it leaves there)
+def _holehe_args(value: str, outdir: str) -> Tuple[List[str], str]:
+    # holehe writes its CSV into the working directory.
+    return [value, "--no-color", "--no-clear", "--csv"], os.path.join(outdir, "holehe_*_results.csv")
+
+
+def _sherlock_args(value: str, outdir: str) -> Tuple[List[str], str]:
+    # --local: the bundled site list, like the in-process engine, instead of fetching it.
+    args = [value, "--local", "--csv", "--print-all", "--no-color", "--no-txt", "--folderoutput", outdir]
+    return args, os.path.join(outdir, f"{glob.escape(value)}.csv")
+
+
+def _maigret_args(value: str, outdir: str) -> Tuple[List[str], str]:
+    args = [value, "--json", "ndjson", "--no-color", "--no-progressbar", "--folderoutput", outdir]
+    return args, os.path.join(outdir, f"report_{glob.escape(value)}_ndjson.json")
+
+
+def _ghunt_args(value: str, outdir: str) -> Tuple[List[str], str]:
+    path = os.path.join(outdir, "ghunt.json")
+    return ["email", value, "--json", path], path
+
+
+REPORT_ARGS: Dict[str, Callable[[str, str], Tuple[List[str], str]]] = {
+    "holehe": _holehe_args,
+    "sherlock": _sherlock_args,
+    "maigret": _maigret_args,
+    "ghunt": _ghunt_args,
+}
+
+
+def option_args(tool: str, options: Optional[Dict]) -> List[str]:
+    """Extra CLI arguments for the engine options a CLI understands."""
+    id_type = (options or {}).get("id_type", "username")
+    if tool == "maigret" and id_type != "username":
+        return ["--id-type", id_type]
+    return []
+
+
+def read_report(tool: str, path: str, emit: Emit = None) -> Dict:
+    """The tool's scan section, built from its report file a row at a time."""
+    if tool == "ghunt":
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        info = ghunt_summary(data)
+        if emit:
+            for key, value in info.items():
+                emit({"tool": tool, "section": key, "value": value})
+        return {"google_info": info, "json": data}
+
+    if tool == "maigret":
+        # The ndjson report only lists the accounts that were found.
+        profiles = []
+        for data in iter_ndjson(path):
+            profile = maigret_row(data)
+            profiles.append(profile)
+            if emit:
+                emit({"tool": tool, **profile})
+        return {"profiles": profiles, "total": len(profiles)}
+
+    items, checked = [], 0
+    convert = holehe_row if tool == "holehe" else sherlock_row
+    for row in iter_csv(path):
+        item = convert(row)
+        checked += 1
+        if emit:
+            emit({"tool": tool, **item})
+        if tool == "holehe" or item["status"] == "Claimed":
+            items.append(item)
+    if tool == "holehe":
+        return {"accounts": items, "total": len(items)}
+    return {"profiles": items, "total": len(items), "checked": checked}
+
+
+async def _drain(stream: asyncio.StreamReader) -> bytes:
+    """Read a pipe to EOF, keeping only its last TAIL_BYTES for error messages."""
+    tail = b""
+    while True:
+        chunk = await stream.read(CHUNK_SIZE)
+        if not chunk:
+            return tail
+        tail = (tail + chunk)[-TAIL_BYTES:]
+
+
+async def run_structured(tool: str, value: str, timeout: float, emit: Emit = None, options: Optional[Dict] = None) -> Optional[Dict]:
+    """Run tool's CLI with its report enabled; None when no report came out of it.
+
+    A tool that does not start or does not understand the report flags (an
+    older install) returns None, and the caller falls back to parsing stdout.
+    A target that would put a report outside the run's directory is refused.
+    """
+    if tool in NAMED_REPORTS and any(sep in value for sep in PATH_SEPARATORS):
+        return {"error": f"{tool} targets can't contain a path separator: {value!r}", "method": "cli report"}
+
+    entry = await asyncio.get_running_loop().run_in_executor(None, tool_resolver.resolve, tool)
+    if entry.invocation is None:
+        return None
+
+    with tempfile.TemporaryDirectory(prefix=f"osint_{tool}_") as outdir:
+        args, pattern = REPORT_ARGS[tool](value, outdir)
+        args += option_args(tool, options)
+        try:
+            proc = await asyncio.create_subprocess_exec(
+                *entry.invocation,
+                *args,
+                cwd=outdir,
+                stdin=asyncio.subprocess.DEVNULL,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+                env=TOOL_ENV,
+                start_new_session=True,
+            )
+        except OSError:
+            tool_resolver.invalidate(tool)
+            return None
+
+        output = asyncio.gather(_drain(proc.stdout), _drain(proc.stderr), proc.wait())
+        # When wait_for gives up, nobody awaits the gather's CancelledError again.
+        output.add_done_callback(lambda f: f.cancelled() or f.exception())
+        try:
+            stdout_tail, stderr_tail, _ = await asyncio.wait_for(output, timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            try:
+                os.killpg(proc.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+            await proc.wait()
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            return {"error": f"{tool} did not finish within {timeout}s", "method": "cli report"}
+
+        reports = sorted(glob.glob(pattern))
+        if not reports:
+            message = (stderr_tail or stdout_tail).decode("utf-8", "replace").strip()
+            print(f"⚠️ {tool} left no report (exit {proc.returncode}): {message[-200:]}")
+            return None
+
+        result = read_report(tool, reports[-1], emit)
+        result["method"] = "cli report"
+        return result
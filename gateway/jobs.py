@@ -0,0 +1,190 @@
+"""Background scan jobs: a SQLite-backed queue drained by a bounded worker pool."""
+import asyncio
+import json
+import sqlite3
+import time
+import uuid
+from typing import AsyncIterator, Dict, List, Optional
+
+from .admission import BATCH, tool_slots
+from .config import JOB_DB, JOB_DEADLINE, JOB_TOOL_LIMITS, JOB_WORKERS
+from .orchestrator import run_tool
+from .streaming import KEEPALIVE_INTERVAL, sse
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+_COLUMNS = ("id", "plan", "refresh", "deadlines", "status", "created_at", "started_at", "finished_at", "result", "error")
+
+
+class JobQueue:
+    """Jobs are rows in SQLite, so queued and interrupted jobs survive a restart.
+
+    Up to `workers` jobs run at once, and each tool has its own cap across
+    all of them (maigret runs are far heavier than holehe ones).
+    """
+
+    def __init__(
+        self,
+        path: str = JOB_DB,
+        workers: int = JOB_WORKERS,
+        tool_limits: Dict[str, int] = JOB_TOOL_LIMITS,
+        deadline: float = JOB_DEADLINE,
+    ):
+        self.workers = max(1, workers)
+        self.tool_limits = tool_limits
+        self.deadline = deadline
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " id TEXT PRIMARY KEY, plan TEXT NOT NULL, refresh INTEGER NOT NULL, deadlines TEXT NOT NULL,"
+            " status TEXT NOT NULL, created_at REAL NOT NULL, started_at REAL, finished_at REAL,"
+            " result TEXT, error TEXT)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at)")
+        self._db.commit()
+        self._pending: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        self._busy = 0
+        self._tool_slots: Dict[str, asyncio.Semaphore] = {}
+        self._tools_running = {tool: 0 for tool in tool_limits}
+        self._listeners: Dict[str, List[asyncio.Queue]] = {}
+        self._progress: Dict[str, Dict[str, Dict]] = {}
+
+    async def start(self):
+        """Start the workers and requeue whatever was queued or running at shutdown."""
+        self._pending = asyncio.Queue()
+        self._tool_slots = {tool: asyncio.Semaphore(max(1, limit)) for tool, limit in self.tool_limits.items()}
+        recovered = self._db.execute(
+            "UPDATE jobs SET status = ?, started_at = NULL WHERE status = ?", (QUEUED, RUNNING)
+        ).rowcount
+        self._db.commit()
+        for (job_id,) in self._db.execute(
+            "SELECT id FROM jobs WHERE status = ? ORDER BY created_at", (QUEUED,)
+        ).fetchall():
+            self._pending.put_nowait(job_id)
+        self._workers = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+        print(f"📋 Job queue started: {self.workers} workers, {self._pending.qsize()} queued ({recovered} recovered)")
+
+    async def stop(self):
+        """Stop the workers; jobs they were running stay "running" and are requeued by the next start()."""
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    def submit(self, plan: Dict[str, str], refresh: bool = False, deadlines: Optional[Dict[str, float]] = None) -> Dict:
+        job_id = uuid.uuid4().hex
+        self._db.execute(
+            "INSERT INTO jobs (id, plan, refresh, deadlines, status, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+            (job_id, json.dumps(plan), int(refresh), json.dumps(deadlines or {}), QUEUED, time.time()),
+        )
+        self._db.commit()
+        self._pending.put_nowait(job_id)
+        return self.get(job_id)
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        row = self._db.execute(f"SELECT {', '.join(_COLUMNS)} FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(zip(_COLUMNS, row))
+        for field in ("plan", "deadlines", "result"):
+            if job[field] is not None:
+                job[field] = json.loads(job[field])
+        job["refresh"] = bool(job["refresh"])
+        if job["status"] == RUNNING:
+            job["progress"] = {tool: section["status"] for tool, section in self._progress.get(job_id, {}).items()}
+        return job
+
+    def stats(self) -> Dict:
+        counts = dict(self._db.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+        return {
+            "queue_depth": self._pending.qsize() if self._pending else counts.get(QUEUED, 0),
+            "jobs": {status: counts.get(status, 0) for status in (QUEUED, RUNNING, DONE, FAILED)},
+            "workers": {"total": self.workers, "busy": self._busy, "utilization": round(self._busy / self.workers, 2)},
+            "tools": {
+                tool: {"running": self._tools_running[tool], "limit": limit}
+                for tool, limit in self.tool_limits.items()
+            },
+        }
+
+    async def _work(self):
+        while True:
+            job_id = await self._pending.get()
+            self._busy += 1
+            try:
+                await self._run(job_id)
+            except Exception as e:
+                print(f"❌ Job {job_id} failed: {type(e).__name__}: {e}")
+                self._finish(job_id, FAILED, error=f"{type(e).__name__}: {e}")
+            finally:
+                self._busy -= 1
+
+    async def _run(self, job_id: str):
+        job = self.get(job_id)
+        if job is None or job["status"] != QUEUED:
+            return
+        self._db.execute("UPDATE jobs SET status = ?, started_at = ? WHERE id = ?", (RUNNING, time.time(), job_id))
+        self._db.commit()
+        self._progress[job_id] = {}
+        self._publish(job_id, {"event": "running"})
+
+        async def run(tool: str, value: str):
+            async with self._tool_slots[tool], tool_slots.hold(1, BATCH):
+                self._tools_running[tool] += 1
+                try:
+                    section = await run_tool(
+                        tool,
+                        value,
+                        job["deadlines"].get(tool, self.deadline),
+                        emit=lambda item: self._publish(job_id, {"event": "site", **item}),
+                        refresh=job["refresh"],
+                    )
+                finally:
+                    self._tools_running[tool] -= 1
+            self._progress[job_id][tool] = section
+            self._publish(job_id, {"event": "tool", "tool": tool, "section": section})
+
+        await asyncio.gather(*(run(tool, value) for tool, value in job["plan"].items()))
+        self._finish(job_id, DONE, result=self._progress.pop(job_id))
+
+    def _finish(self, job_id: str, status: str, result: Optional[Dict] = None, error: Optional[str] = None):
+        self._progress.pop(job_id, None)
+        self._db.execute(
+            "UPDATE jobs SET status = ?, finished_at = ?, result = ?, error = ? WHERE id = ?",
+            (status, time.time(), json.dumps(result, default=str) if result is not None else None, error, job_id),
+        )
+        self._db.commit()
+        self._publish(job_id, {"event": "finished"})
+
+    def _publish(self, job_id: str, item: Dict):
+        for listener in self._listeners.get(job_id, []):
+            listener.put_nowait(item)
+
+    async def events(self, job_id: str) -> AsyncIterator[str]:
+        """SSE messages for a job: "site" and "tool" while it runs, then "done" with the stored job."""
+        listener: asyncio.Queue = asyncio.Queue()
+        self._listeners.setdefault(job_id, []).append(listener)
+        try:
+            job = self.get(job_id)
+            yield sse("job", {key: job[key] for key in ("id", "status", "plan", "created_at")})
+            for tool, section in self._progress.get(job_id, {}).items():
+                yield sse("tool", {"tool": tool, **section})
+            while job["status"] in (QUEUED, RUNNING):
+                try:
+                    item = await asyncio.wait_for(listener.get(), KEEPALIVE_INTERVAL)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                event = item.pop("event")
+                if event == "site":
+                    yield sse("site", item)
+                elif event == "tool":
+                    yield sse("tool", {"tool": item["tool"], **item["section"]})
+                elif event == "finished":
+                    job = self.get(job_id)
+            yield sse("done", job)
+        finally:
+            self._listeners[job_id].remove(listener)
+            if not self._listeners[job_id]:
+                del self._listeners[job_id]
@@ -0,0 +1,185 @@
+"""Prometheus text-format metrics for the gateway, built from the tools' own results.
+
+Kept dependency-free: counters and histograms are plain dicts rendered in
+the text exposition format on each scrape, and gauges are read from the
+components that own them (job queue, cache, worker pools) at scrape time.
+"""
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.5, 1, 2.5, 5, 10, 20, 30, 60, 90, 120, 300, 600, 1800)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+_lock = threading.Lock()
+
+
+def _labels(labels: Labels, extra: Iterable[Tuple[str, str]] = ()) -> str:
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    body = ",".join(f'{name}="{_escape(value)}"' for name, value in pairs)
+    return "{" + body + "}"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, help: str):
+        self.name = name
+        self.help = help
+        self.values: Dict[Labels, float] = {}
+
+    def inc(self, value: float = 1, **labels):
+        key = tuple(sorted(labels.items()))
+        with _lock:
+            self.values[key] = self.values.get(key, 0) + value
+
+    def samples(self) -> List[str]:
+        return [f"{self.name}{_labels(key)} {_number(value)}" for key, value in sorted(self.values.items())]
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(buckets) + (float("inf"),)
+        self.values: Dict[Labels, List[float]] = {}
+
+    def observe(self, value: float, **labels):
+        key = tuple(sorted(labels.items()))
+        with _lock:
+            # one slot per bucket, then sum and count
+            series = self.values.setdefault(key, [0] * len(self.buckets) + [0.0, 0])
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def samples(self) -> List[str]:
+        lines = []
+        for key, series in sorted(self.values.items()):
+            for bound, count in zip(self.buckets, series):
+                lines.append(f"{self.name}_bucket{_labels(key, [('le', _number(bound))])} {count}")
+            lines.append(f"{self.name}_sum{_labels(key)} {_number(series[-2])}")
+            lines.append(f"{self.name}_count{_labels(key)} {series[-1]}")
+        return lines
+
+
+class Gauge:
+    """Set through inc()/dec(), or read at scrape time from collect().
+
+    collect() returns {labels: value} with labels as a tuple of (name, value)
+    pairs. A collected metric that only ever goes up (a counter kept by
+    another component) is exposed with kind="counter".
+    """
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        collect: Optional[Callable[[], Dict[Labels, float]]] = None,
+        kind: str = "gauge",
+    ):
+        self.name = name
+        self.help = help
+        self.collect = collect
+        self.kind = kind
+        self.values: Dict[Labels, float] = {}
+
+    def inc(self, value: float = 1, **labels):
+        key = tuple(sorted(labels.items()))
+        with _lock:
+            self.values[key] = self.values.get(key, 0) + value
+
+    def dec(self, value: float = 1, **labels):
+        self.inc(-value, **labels)
+
+    def samples(self) -> List[str]:
+        values = self.collect() if self.collect else self.values
+        return [f"{self.name}{_labels(key)} {_number(value)}" for key, value in sorted(values.items())]
+
+
+REGISTRY: List = []
+
+
+def register(metric):
+    REGISTRY.append(metric)
+    return metric
+
+
+def collected(name: str, help: str, collect: Callable[[], Dict[Labels, float]], kind: str = "gauge") -> Gauge:
+    return register(Gauge(name, help, collect, kind))
+
+
+def render() -> str:
+    lines = []
+    for metric in REGISTRY:
+        try:
+            samples = metric.samples()
+        except Exception as e:
+            print(f"⚠️ Metric {metric.name} failed: {type(e).__name__}: {e}")
+            continue
+        lines.append(f"# HELP {metric.name} {metric.help}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        lines.extend(samples)
+    return "\n".join(lines) + "\n"
+
+
+tool_runs = register(Counter("osint_tool_runs_total", "Tool runs by outcome (ok, error, timeout)."))
+tool_latency = register(Histogram("osint_tool_duration_seconds", "Wall time of a tool run, including runs that timed out."))
+tools_running = register(Gauge("osint_tools_running", "Tool runs in progress."))
+site_checks = register(Counter("osint_site_checks_total", "Per-site verdicts by outcome."))
+site_checks_reused = register(Counter("osint_site_checks_reused_total", "Per-site verdicts an incremental rescan reused instead of checking again."))
+site_query_seconds = register(Counter("osint_site_query_seconds_total", "Summed per-site response time, for finding slow sites."))
+cli_processes = register(Gauge("osint_cli_processes", "Tool CLI processes currently running."))
+
+# Strings the tools use for per-site verdicts, mapped to one outcome vocabulary.
+_OUTCOMES = {
+    "claimed": "claimed",
+    "used": "claimed",
+    "available": "available",
+    "not used": "available",
+    "unknown": "unknown",
+    "illegal": "illegal",
+    "waf": "waf",
+    "rate limit": "rate_limited",
+    "error": "error",
+}
+
+# maigret CheckError types that mean the site put a wall in front of us.
+_WAF_ERRORS = ("Captcha", "Bot protection", "Access denied", "Request blocked", "Just a moment", "Censorship")
+
+
+def site_outcome(item: Dict) -> str:
+    """Outcome of one emitted site result: a holehe account or a sherlock/maigret profile."""
+    error = str(item.get("error") or "")
+    if item.get("http_status") == 429 or "Too many requests" in error:
+        return "rate_limited"
+    if error.startswith(_WAF_ERRORS):
+        return "waf"
+    return _OUTCOMES.get(str(item.get("status", "")).lower(), "unknown")
+
+
+def record_site(tool: str, item: Dict):
+    site = item.get("site")
+    if site is None:
+        return
+    site_checks.inc(tool=tool, site=site, outcome=site_outcome(item))
+    if item.get("query_time") is not None:
+        site_query_seconds.inc(item["query_time"], tool=tool, site=site)
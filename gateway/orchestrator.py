@@ -0,0 +1,190 @@
+"""Fan a scan out to several tools at once, each under its own deadline."""
+import asyncio
+import time
+from typing import Dict, List, Optional
+
+from . import metrics
+from .admission import BATCH, tool_slots
+from .cache import scan_cache
+from .config import DEADLINE_MARGIN, INCREMENTAL_ENABLED, INCREMENTAL_TOOLS, SITE_FRESHNESS, TOOL_DEADLINES
+from .deadline import Deadline, engine_deadline
+from .engines import Emit
+from .execution import execute_tool
+from .history import scan_history
+
+
+async def run_with_deadline(tool: str, value: str, deadline: float, emit: Emit = None, options: Optional[Dict] = None) -> Dict:
+    """Run one tool; give up on it (and cancel it) once its deadline passes.
+
+    The engine gets the deadline too, DEADLINE_MARGIN early, so it can
+    return what it checked by then (a "partial" section) instead of timing
+    out. Site verdicts still fresh from the last scan of value are not
+    checked again but merged into the result (see _reusable).
+    """
+
+    def report(item: Dict):
+        metrics.record_site(tool, item)
+        if emit:
+            emit(item)
+
+    reused = await _reusable(tool, value)
+    options = {**(options or {}), "deadline": engine_deadline(deadline, DEADLINE_MARGIN)}
+    if reused:
+        options["skip"] = sorted(reused)
+    started = time.monotonic()
+    task = asyncio.create_task(execute_tool(tool, value, options, emit=report, timeout=deadline))
+    metrics.tools_running.inc(tool=tool)
+    try:
+        done, _ = await asyncio.wait({task}, timeout=deadline)
+    except asyncio.CancelledError:
+        task.cancel()
+        raise
+    finally:
+        metrics.tools_running.dec(tool=tool)
+    elapsed = round(time.monotonic() - started, 2)
+
+    if not done:
+        # Don't wait for the cancellation to settle: the caller must not pay
+        # for a tool that is slow to stop.
+        task.cancel()
+        print(f"⏱️ {tool} timed out after {deadline}s")
+        metrics.tool_runs.inc(tool=tool, status="timeout")
+        metrics.tool_latency.observe(elapsed, tool=tool)
+        return {"status": "timeout", "error": f"{tool} did not finish within {deadline}s", "elapsed": elapsed}
+
+    try:
+        result = task.result()
+    except Exception as e:
+        result = {"error": f"{type(e).__name__}: {e}"}
+    result["status"] = "error" if "error" in result else "ok"
+    result["elapsed"] = elapsed
+    metrics.tool_runs.inc(tool=tool, status=result["status"])
+    metrics.tool_latency.observe(elapsed, tool=tool)
+    checks = result.pop("checks", None)
+    # Only an engine that honoured "skip" returns checks; the CLIs scanned every site.
+    if reused and checks is not None:
+        _merge_reused(tool, result, reused, emit)
+        checks += reused.values()
+    # A partial scan would show its unchecked sites as gone in the history.
+    if result["status"] == "ok" and not result.get("partial"):
+        _record_history(tool, value, result, checks)
+    return result
+
+
+async def _reusable(tool: str, value: str) -> Dict[str, Dict]:
+    """Verdicts from the last scan of value still within SITE_FRESHNESS for their outcome, by site."""
+    if not INCREMENTAL_ENABLED or scan_history is None or tool not in INCREMENTAL_TOOLS:
+        return {}
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, scan_history.reusable, tool, value, SITE_FRESHNESS)
+    except Exception as e:
+        print(f"⚠️ Could not read {tool} history for {value}, checking every site: {type(e).__name__}: {e}")
+        return {}
+
+
+def _merge_reused(tool: str, section: Dict, reused: Dict[str, Dict], emit: Emit):
+    claimed = [
+        {key: row[key] for key in ("site", "url", "status", "http_status", "ids", "checked_at") if row[key] is not None}
+        for row in reused.values()
+        if row["outcome"] == "claimed"
+    ]
+    section.setdefault("profiles", []).extend(claimed)
+    section["total"] = len(section["profiles"])
+    section["incremental"] = {"checked": section.get("checked", 0), "reused": len(reused)}
+    section["checked"] = section.get("checked", 0) + len(reused)
+    metrics.site_checks_reused.inc(len(reused), tool=tool)
+    if emit:
+        for profile in claimed:
+            emit({"tool": tool, **profile})
+
+
+def _record_history(tool: str, value: str, section: Dict, checks: Optional[List[Dict]] = None):
+    """Write a fresh section to the scan history in a thread, without waiting for it."""
+    if scan_history is None:
+        return
+
+    def record():
+        try:
+            scan_history.record(tool, value, section, checks)
+        except Exception as e:
+            print(f"⚠️ Could not record {tool} scan of {value} in history: {type(e).__name__}: {e}")
+
+    asyncio.get_running_loop().run_in_executor(None, record)
+
+
+def _replay(tool: str, section: Dict, emit: Emit):
+    if emit:
+        for item in section.get("accounts", section.get("profiles", [])):
+            emit({"tool": tool, **item})
+
+
+async def run_tool(
+    tool: str,
+    value: str,
+    deadline: float,
+    emit: Emit = None,
+    refresh: bool = False,
+    options: Optional[Dict] = None,
+) -> Dict:
+    """run_with_deadline behind the scan cache.
+
+    Fresh entries are returned directly. Stale ones are returned too, and the
+    tool is re-run in the background to replace them, holding a batch tool
+    slot like any other unattended run. refresh skips the lookup.
+    Only complete, successful sections are stored. options (e.g. maigret's
+    id_type) are part of the cache key. Cache reads and writes run in a
+    thread, as they may hit SQLite.
+    """
+    if scan_cache is None:
+        return await run_with_deadline(tool, value, deadline, emit, options)
+
+    loop = asyncio.get_running_loop()
+    key = scan_cache.make_key(tool, value, options)
+    entry = None if refresh else await loop.run_in_executor(None, scan_cache.get, tool, key)
+    if entry is not None:
+        state = "hit" if entry.fresh else "stale"
+        scan_cache.stats[state] += 1
+        if state == "stale":
+            scan_cache.refresh(key, lambda: _refresh(tool, value, deadline, options))
+        _replay(tool, entry.section, emit)
+        return {**entry.section, "cache": {"state": state, "age": round(entry.age, 1)}}
+
+    scan_cache.stats["miss"] += 1
+    section = await run_with_deadline(tool, value, deadline, emit, options)
+    if section["status"] == "ok" and not section.get("partial"):
+        await loop.run_in_executor(None, scan_cache.put, tool, key, section)
+    return {**section, "cache": {"state": "miss"}}
+
+
+async def _refresh(tool: str, value: str, deadline: float, options: Optional[Dict]) -> Dict:
+    async with tool_slots.hold(1, BATCH):
+        return await run_tool(tool, value, deadline, refresh=True, options=options)
+
+
+async def fan_out(
+    plan: Dict[str, str],
+    deadlines: Optional[Dict[str, float]] = None,
+    refresh: bool = False,
+    deadline: Optional[Deadline] = None,
+) -> Dict[str, Dict]:
+    """Run every tool in plan ({tool: target}) concurrently.
+
+    Wall time is bounded by the largest deadline instead of the sum of all
+    tool run times, and by `deadline` (the request's) when it is sooner.
+    Tools that miss their deadline come back with status "timeout";
+    everything that finished is returned as is.
+    """
+    deadlines = {**TOOL_DEADLINES, **(deadlines or {})}
+    if deadline is not None:
+        deadlines = {tool: deadline.cap(seconds) for tool, seconds in deadlines.items()}
+    for tool, value in plan.items():
+        print(f"🔍 Running {tool} on: {value} (deadline {deadlines[tool]}s)")
+
+    sections = await asyncio.gather(
+        *(run_tool(tool, value, deadlines[tool], refresh=refresh) for tool, value in plan.items())
+    )
+    results = dict(zip(plan, sections))
+    for tool, result in results.items():
+        print(f"🔧 {tool.capitalize()} result: status={result['status']}, method={result.get('method', 'n/a')}, elapsed={result['elapsed']}s")
+    return results
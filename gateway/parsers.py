@@ -0,0 +1,54 @@
+"""Turn the text output of the OSINT tools into JSON-friendly dicts."""
+import re
+from typing import Dict
+
+
+def parse_holehe_output(stdout: str) -> Dict:
+    results = []
+    lines = stdout.split('\n')
+    for line in lines:
+        if '[' in line and ']' in line:
+            match = re.search(r'\[([^\]]+)\]\s+(.+)', line)
+            if match:
+                site = match.group(1).strip()
+                status = match.group(2).strip()
+                exists = 'exists' in status.lower() or 'found' in status.lower()
+                results.append({"site": site, "exists": exists, "status": status})
+    return {"accounts": results, "total": len(results)}
+
+
+def parse_sherlock_output(stdout: str) -> Dict:
+    profiles = []
+    lines = stdout.split('\n')
+    for line in lines:
+        if 'http' in line and '[' in line and ']' in line:
+            match = re.search(r'\[([^\]]+)\]\s+(https?://[^\s]+)', line)
+            if match:
+                site = match.group(1).strip()
+                url = match.group(2).strip()
+                profiles.append({"site": site, "url": url})
+    return {"profiles": profiles, "total": len(profiles)}
+
+
+def parse_maigret_output(stdout: str) -> Dict:
+    profiles = []
+    lines = stdout.split('\n')
+    for line in lines:
+        if 'http' in line:
+            urls = re.findall(r'https?://[^\s]+', line)
+            for url in urls:
+                profiles.append({"url": url})
+    return {"profiles": profiles, "total": len(profiles)}
+
+
+def parse_ghunt_output(stdout: str) -> Dict:
+    info = {}
+    lines = stdout.split('\n')
+    for line in lines:
+        if ':' in line:
+            parts = line.split(':', 1)
+            if len(parts) == 2:
+                key = parts[0].strip()
+                value = parts[1].strip()
+                info[key] = value
+    return {"google_info": info}
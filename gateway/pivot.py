@@ -0,0 +1,224 @@
+"""Pivot scans: scan a target, then the identifiers the tools found, and so on."""
+import asyncio
+import re
+import time
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+from .admission import BATCH, tool_slots
+from .batch import ndjson
+from .cache import normalize_target
+from .config import EXECUTION_MODE, PIVOT_CONCURRENCY, PIVOT_MAX_DEPTH, PIVOT_MAX_TARGETS, TOOL_DEADLINES
+from .engines import get_engine
+from .orchestrator import run_tool
+
+_DONE = object()
+
+# Identifier types maigret can search by besides usernames (maigret.checking.SUPPORTED_IDS).
+MAIGRET_ID_TYPES = (
+    "yandex_public_id",
+    "gaia_id",
+    "vk_id",
+    "ok_id",
+    "wikimapia_uid",
+    "steam_id",
+    "uidme_uguid",
+    "yelp_userid",
+)
+
+# GHunt summary fields worth pivoting on, and what they identify.
+GHUNT_FIELDS = (("Gaia ID", "gaia_id"), ("Play Games username", "username"), ("Email", "email"))
+
+# Profile links whose username can be read off the URL, for when maigret's
+# site database is not loaded in this process to resolve them.
+PROFILE_LINKS = tuple(
+    re.compile(pattern)
+    for pattern in (
+        r"https?://(?:www\.)?(?:github|gitlab)\.com/([\w.-]+)/?",
+        r"https?://(?:www\.|mobile\.)?(?:twitter|x)\.com/(\w+)/?",
+        r"https?://(?:www\.)?instagram\.com/([\w.]+)/?",
+        r"https?://(?:www\.|old\.)?reddit\.com/u(?:ser)?/([\w-]+)/?",
+        r"https?://t\.me/(\w+)/?",
+        r"https?://(?:www\.)?(?:youtube|tiktok|medium)\.com/@([\w.-]+)/?",
+    )
+)
+
+
+def tools_for(kind: str) -> Dict[str, Optional[Dict]]:
+    """The tools that scan an identifier of this kind, with their engine options."""
+    if kind == "email":
+        return {"holehe": None, "ghunt": None}
+    if kind == "username":
+        return {"sherlock": None, "maigret": None}
+    if kind in MAIGRET_ID_TYPES:
+        return {"maigret": {"id_type": kind}}
+    return {}
+
+
+def found_in(tool: str, section: Dict, maigret_db=None) -> List[Tuple[str, str, Optional[str]]]:
+    """(kind, value, site) for every identifier in a tool section that some tool can scan.
+
+    maigret links (ids_links) are resolved with maigret_db when the maigret
+    engine is loaded in this process, else only those PROFILE_LINKS match.
+    Masked holehe recovery emails ("ex****e@gmail.com") are not followed.
+    """
+    found = []
+    if tool == "ghunt":
+        info = section.get("google_info") or {}
+        for field, kind in GHUNT_FIELDS:
+            if info.get(field):
+                found.append((kind, str(info[field]), "Google"))
+    elif tool == "holehe":
+        for account in section.get("accounts", []):
+            recovery = account.get("emailrecovery")
+            if recovery and "*" not in recovery:
+                found.append(("email", recovery, account.get("site")))
+    elif tool == "maigret":
+        for profile in section.get("profiles", []):
+            for value, kind in (profile.get("ids_usernames") or {}).items():
+                found.append((kind, value, profile.get("site")))
+            for link in profile.get("ids_links") or []:
+                ids = maigret_db.extract_ids_from_url(link) if maigret_db is not None else _link_ids(link)
+                for value, kind in ids.items():
+                    found.append((kind, value, profile.get("site")))
+    return [(kind, str(value), site) for kind, value, site in found if tools_for(kind)]
+
+
+def _link_ids(link: str) -> Dict[str, str]:
+    for pattern in PROFILE_LINKS:
+        match = pattern.fullmatch(link)
+        if match:
+            return {match.group(1): "username"}
+    return {}
+
+
+class PivotScan:
+    """One pivot scan, sharing one set of seen identifiers across every hop.
+
+    The frontier is worked by `concurrency` workers, so identifiers found
+    at different depths are scanned side by side rather than hop by hop.
+    Identifiers past max_depth hops from the input, or once max_targets
+    have been queued, are reported but not scanned. An email's username
+    part is scanned at the email's own depth, like /scan/full does.
+    """
+
+    def __init__(
+        self,
+        refresh: bool = False,
+        max_depth: int = PIVOT_MAX_DEPTH,
+        max_targets: int = PIVOT_MAX_TARGETS,
+        concurrency: int = PIVOT_CONCURRENCY,
+        deadlines: Optional[Dict[str, float]] = None,
+    ):
+        self.refresh = refresh
+        self.max_depth = max_depth
+        self.max_targets = max(1, max_targets)
+        self.concurrency = max(1, concurrency)
+        self.deadlines = {**TOOL_DEADLINES, **(deadlines or {})}
+        self.seen: Dict[Tuple[str, str], int] = {}
+        self.stats = {"identifiers": 0, "scanned": 0, "duplicates": 0, "beyond_depth": 0, "over_limit": 0}
+        self.maigret_db = None
+        self._pending: Optional[asyncio.Queue] = None
+
+    def queue(self, kind: str, value: str, depth: int, via: Optional[Dict]) -> str:
+        """Queue an identifier unless it was seen or is out of bounds; returns what happened to it."""
+        key = (kind, normalize_target(value))
+        if key in self.seen:
+            self.stats["duplicates"] += 1
+            return "duplicate"
+        if depth > self.max_depth:
+            self.stats["beyond_depth"] += 1
+            return "beyond_depth"
+        if len(self.seen) >= self.max_targets:
+            self.stats["over_limit"] += 1
+            return "over_limit"
+        index = self.seen[key] = len(self.seen)
+        self.stats["identifiers"] += 1
+        self._pending.put_nowait((index, kind, value, depth, via))
+        return "queued"
+
+    async def run_one(self, tool: str, value: str, options: Optional[Dict]) -> Dict:
+        async with tool_slots.hold(1, BATCH):
+            return await run_tool(tool, value, self.deadlines[tool], refresh=self.refresh, options=options)
+
+    async def scan(self, index: int, kind: str, value: str, depth: int, via: Optional[Dict]) -> Dict:
+        started = time.monotonic()
+        plan = tools_for(kind)
+        sections = await asyncio.gather(*(self.run_one(tool, value, options) for tool, options in plan.items()))
+        sections = dict(zip(plan, sections))
+
+        found = []
+        if kind == "email":
+            username = value.split("@")[0]
+            found.append({
+                "kind": "username",
+                "value": username,
+                "tool": None,
+                "site": None,
+                "status": self.queue("username", username, depth, {"from": value, "tool": None, "site": None}),
+            })
+        for tool, section in sections.items():
+            if section["status"] != "ok":
+                continue
+            for found_kind, found_value, site in found_in(tool, section, self.maigret_db):
+                source = {"from": value, "tool": tool, "site": site}
+                found.append({
+                    "kind": found_kind,
+                    "value": found_value,
+                    "tool": tool,
+                    "site": site,
+                    "status": self.queue(found_kind, found_value, depth + 1, source),
+                })
+        return {
+            "index": index,
+            "kind": kind,
+            "value": value,
+            "depth": depth,
+            "via": via,
+            **sections,
+            "found": found,
+            "timed_out": [tool for tool, section in sections.items() if section["status"] == "timeout"],
+            "elapsed": round(time.monotonic() - started, 2),
+        }
+
+    async def run(self, value: str) -> AsyncIterator[str]:
+        started = time.monotonic()
+        # Load maigret only where scans would load it anyway; in subprocess
+        # and workers mode links fall back to PROFILE_LINKS.
+        maigret = get_engine("maigret")
+        if maigret.loaded or (EXECUTION_MODE not in ("subprocess", "workers") and await maigret.ensure_loaded()):
+            self.maigret_db = maigret.db
+        self._pending = asyncio.Queue()
+        results: asyncio.Queue = asyncio.Queue(maxsize=self.concurrency)
+        self.queue("email" if "@" in value else "username", value.strip(), 0, None)
+
+        async def work():
+            while True:
+                item = await self._pending.get()
+                try:
+                    await results.put(await self.scan(*item))
+                    self.stats["scanned"] += 1
+                except Exception as e:
+                    await results.put({"index": item[0], "kind": item[1], "value": item[2], "error": f"{type(e).__name__}: {e}"})
+                finally:
+                    self._pending.task_done()
+
+        async def run_all():
+            workers = [asyncio.create_task(work()) for _ in range(self.concurrency)]
+            try:
+                await self._pending.join()
+            finally:
+                for worker in workers:
+                    worker.cancel()
+            await results.put(_DONE)
+
+        runner = asyncio.create_task(run_all())
+        try:
+            while True:
+                item = await results.get()
+                if item is _DONE:
+                    break
+                yield ndjson(item)
+            await runner
+            yield ndjson({"summary": {**self.stats, "elapsed": round(time.monotonic() - started, 2)}})
+        finally:
+            runner.cancel()
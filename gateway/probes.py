@@ -0,0 +1,314 @@
+"""One HTTP client for the site probes of the in-process engines, fetching each distinct request once."""
+import asyncio
+import codecs
+import json
+import time
+from collections import OrderedDict
+from typing import Dict, Hashable, List, Optional, Tuple
+from urllib.parse import urlsplit, urlunsplit
+
+from .config import PROBE_CACHE_SIZE, PROBE_CONNECTIONS, PROBE_MAX_BYTES, PROBE_TTL
+from .singleflight import SingleFlight
+
+# Headers that do not change what a site answers about a profile, so two
+# probes differing only in them are the same probe. The first caller's are sent.
+IGNORED_HEADERS = frozenset(("user-agent", "accept", "accept-language", "accept-encoding", "connection", "cache-control"))
+
+_DEFAULT_PORTS = {"http": 80, "https": 443}
+
+CHUNK_SIZE = 1 << 16
+
+
+class ProbeError(Exception):
+    """A probe that got no response; kind is "timeout", "connect", "disconnected" or "other"."""
+
+    def __init__(self, kind: str, message: str):
+        super().__init__(message)
+        self.kind = kind
+
+
+class ProbeResponse:
+    """truncated: content is only the start of the body."""
+
+    def __init__(
+        self,
+        status: int,
+        url: str,
+        headers: Dict[str, str],
+        content: bytes,
+        charset: Optional[str],
+        elapsed: float,
+        truncated: bool = False,
+    ):
+        self.status = status
+        self.url = url
+        self.headers = headers
+        self.content = content
+        self.charset = charset
+        self.elapsed = elapsed
+        self.truncated = truncated
+
+    @property
+    def text(self) -> str:
+        return self.content.decode(self.charset or "utf-8", "ignore")
+
+
+class _Reader:
+    """One caller's share of a body being read: up to limit bytes (0: all of it), or until its matcher is decided.
+
+    The matcher (a maigret BodyMatcher) is fed the body as it streams in,
+    like SimpleAiohttpChecker._read_body feeds it.
+    """
+
+    def __init__(self, limit: int, matcher=None):
+        self.limit = limit
+        self.matcher = matcher
+        self.received = 0
+        self.done = False
+        self._status = 0
+        self._decoder = None
+
+    def start(self, status: int, charset: Optional[str]):
+        self._status = status
+        self._decoder = codecs.getincrementaldecoder(charset or "utf-8")("ignore")
+
+    def feed(self, chunk: bytes):
+        if self.done:
+            return
+        cut = bool(self.limit) and self.received + len(chunk) >= self.limit
+        if cut:
+            chunk = chunk[: self.limit - self.received]
+        self.received += len(chunk)
+        text = self._decoder.decode(chunk, final=cut)
+        if self.matcher is not None and self.matcher.feed(text, self._status) or cut:
+            self.done = True
+
+    def finish(self):
+        """The body ended before the reader had enough of it."""
+        if not self.done:
+            text = self._decoder.decode(b"", final=True)
+            if self.matcher is not None:
+                self.matcher.feed(text, self._status)
+            self.done = True
+
+    def replay(self, response: ProbeResponse):
+        """Feed a body that was already read."""
+        self.start(response.status, response.charset)
+        self.feed(response.content)
+        if not response.truncated:
+            self.finish()
+
+    def view(self, response: ProbeResponse) -> ProbeResponse:
+        """The response as far as this reader read it."""
+        content = response.content[: self.received]
+        truncated = response.truncated or len(content) < len(response.content)
+        return ProbeResponse(response.status, response.url, response.headers, content, response.charset, response.elapsed, truncated)
+
+
+class _Body:
+    """A body being read for every caller sharing its request; reading stops when all of them are done."""
+
+    def __init__(self):
+        self.readers: List[_Reader] = []
+        self.chunks: List[bytes] = []
+        self.head: Optional[Tuple[int, Optional[str]]] = None
+
+    def join(self, reader: _Reader):
+        self.readers.append(reader)
+        if self.head is not None:
+            reader.start(*self.head)
+            if self.chunks:
+                reader.feed(b"".join(self.chunks))
+
+    def start(self, status: int, charset: Optional[str]):
+        self.head = (status, charset)
+        for reader in self.readers:
+            reader.start(status, charset)
+
+    def feed(self, chunk: bytes) -> bool:
+        """Pass a chunk to every reader; returns whether none of them needs more."""
+        self.chunks.append(chunk)
+        for reader in self.readers:
+            reader.feed(chunk)
+        return all(reader.done for reader in self.readers)
+
+    def finish(self):
+        for reader in self.readers:
+            reader.finish()
+
+
+def normalize_url(url: str) -> str:
+    parts = urlsplit(url)
+    scheme, host = parts.scheme.lower(), (parts.hostname or "").lower()
+    netloc = host if parts.port in (None, _DEFAULT_PORTS.get(scheme)) else f"{host}:{parts.port}"
+    if parts.username:
+        netloc = f"{parts.username}@{netloc}"
+    return urlunsplit((scheme, netloc, parts.path or "/", parts.query, ""))
+
+
+def probe_key(method: str, url: str, headers: Optional[Dict[str, str]], allow_redirects: bool, payload=None) -> Tuple:
+    kept = tuple(sorted((k.lower(), str(v)) for k, v in (headers or {}).items() if k.lower() not in IGNORED_HEADERS))
+    body = json.dumps(payload, sort_keys=True) if payload is not None else None
+    return method.upper(), normalize_url(url), kept, bool(allow_redirects), body
+
+
+class SharedProbes:
+    """Fetches on behalf of several tools at once.
+
+    Concurrent identical probes share one request; a successful response is
+    also reused for PROBE_TTL seconds, and a GET response answers a HEAD for
+    the same request. Failures are shared only while in flight, so a tool's
+    retry really goes to the site again. Cookies are not kept between probes.
+    aiohttp (a maigret dependency) is imported on the first probe.
+
+    Every caller reads at most its own max_bytes of the body, and a shared
+    body is read only as far as the caller needing most of it. A caller's
+    matcher is fed the body as it arrives; once every caller sharing a
+    request is decided or has its max_bytes, the rest is not read.
+    """
+
+    def __init__(
+        self,
+        ttl: float = PROBE_TTL,
+        max_entries: int = PROBE_CACHE_SIZE,
+        connections: int = PROBE_CONNECTIONS,
+        max_bytes: int = PROBE_MAX_BYTES,
+    ):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.connections = connections
+        self.max_bytes = max_bytes
+        # Probes asked for, and requests actually sent for them.
+        self.stats = {"probes": 0, "fetched": 0}
+        self._flights = SingleFlight()
+        # Bodies being read, by request, for callers joining a request in flight.
+        self._bodies: Dict[Hashable, _Body] = {}
+        self._responses: "OrderedDict[Hashable, Tuple[float, ProbeResponse]]" = OrderedDict()
+        self._session = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _client(self):
+        import aiohttp
+
+        # A session belongs to the loop it was made on.
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session.closed or self._loop is not loop:
+            self._loop = loop
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(ssl=False, limit=self.connections),
+                cookie_jar=aiohttp.DummyCookieJar(),
+                trust_env=True,
+            )
+        return self._session
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+
+    def _cached(self, key: Hashable, limit: int) -> Optional[ProbeResponse]:
+        """A kept response with at least limit bytes of its body, or all of it."""
+        entry = self._responses.get(key)
+        if entry is None:
+            return None
+        if time.monotonic() - entry[0] > self.ttl:
+            del self._responses[key]
+            return None
+        response = entry[1]
+        if response.truncated and (not limit or len(response.content) < limit):
+            return None
+        return response
+
+    def _remember(self, key: Hashable, response: ProbeResponse):
+        self._responses[key] = (time.monotonic(), response)
+        self._responses.move_to_end(key)
+        while len(self._responses) > self.max_entries:
+            self._responses.popitem(last=False)
+
+    async def fetch(
+        self,
+        method: str,
+        url: str,
+        headers: Optional[Dict[str, str]] = None,
+        allow_redirects: bool = True,
+        timeout: float = 10,
+        payload=None,
+        max_bytes: Optional[int] = None,
+        matcher=None,
+    ) -> ProbeResponse:
+        """The response to a probe, from another caller's request when there is one; raises ProbeError.
+
+        Its body is cut at max_bytes (default PROBE_MAX_BYTES), or where
+        matcher (fed as the body arrives) was decided; truncated says so.
+        """
+        method = method.upper()
+        key = probe_key(method, url, headers, allow_redirects, payload)
+        reader = _Reader(max_bytes or self.max_bytes, matcher)
+        candidates = [key]
+        if method == "HEAD":
+            candidates.append(("GET",) + key[1:])
+        self.stats["probes"] += 1
+        for candidate in candidates:
+            response = self._cached(candidate, reader.limit)
+            if response is not None:
+                reader.replay(response)
+                return reader.view(response)
+        for candidate in candidates[1:]:
+            if candidate in self._flights:
+                key, method = candidate, "GET"
+        body = self._bodies.get(key)
+        if body is None:
+            body = self._bodies[key] = _Body()
+        body.join(reader)
+        # The first caller's timeout bounds the request for everyone sharing it.
+        response = await self._flights.run(key, lambda: self._fetch(key, method, url, headers, allow_redirects, timeout, payload, body))
+        if not reader.done:
+            # Joined when the others had already stopped reading short of what this caller needs.
+            body = _Body()
+            body.join(reader)
+            response = await self._fetch(key, method, url, headers, allow_redirects, timeout, payload, body)
+        return reader.view(response)
+
+    async def _fetch(self, key, method, url, headers, allow_redirects, timeout, payload, body: _Body) -> ProbeResponse:
+        import aiohttp
+
+        self.stats["fetched"] += 1
+        started = time.monotonic()
+        try:
+            async with self._client().request(
+                method,
+                url,
+                headers=headers,
+                allow_redirects=allow_redirects,
+                timeout=aiohttp.ClientTimeout(total=timeout),
+                json=payload,
+            ) as r:
+                body.start(r.status, r.charset)
+                truncated = False
+                async for chunk in r.content.iter_chunked(CHUNK_SIZE):
+                    if body.feed(chunk):
+                        truncated = not r.content.at_eof()
+                        # The rest is not read: drop the connection rather than drain it.
+                        r.close()
+                        break
+                else:
+                    body.finish()
+                content = b"".join(body.chunks)
+                response = ProbeResponse(
+                    r.status, str(r.url), dict(r.headers), content, r.charset, time.monotonic() - started, truncated
+                )
+        except asyncio.TimeoutError as e:
+            raise ProbeError("timeout", str(e) or f"No response within {timeout}s") from e
+        except aiohttp.ClientConnectorError as e:
+            raise ProbeError("connect", str(e)) from e
+        except aiohttp.ServerDisconnectedError as e:
+            raise ProbeError("disconnected", str(e)) from e
+        except aiohttp.ClientError as e:
+            raise ProbeError("other", f"{type(e).__name__}: {e}") from e
+        finally:
+            if self._bodies.get(key) is body:
+                del self._bodies[key]
+        self._remember(key, response)
+        return response
+
+
+shared_probes = SharedProbes()
@@ -0,0 +1,135 @@
+"""Find out once how each tool can be started, instead of on every call."""
+import os
+import shutil
+import subprocess
+import threading
+import time
+from typing import Dict, List, Optional, Set, Tuple
+
+from .config import TOOL_PROBE_TIMEOUT, TOOL_REPROBE_INTERVAL
+
+TOOLS = ("holehe", "ghunt", "sherlock", "maigret")
+
+# pipx installs on Render land in the first two.
+TOOL_PATH = "/opt/render/.local/bin:/home/render/.local/bin:/usr/local/bin:/usr/bin:/bin"
+TOOL_ENV = {**os.environ, "PATH": f"{TOOL_PATH}:{os.environ.get('PATH', '')}"}
+
+
+class Resolution:
+    def __init__(self, tool: str):
+        self.tool = tool
+        self.invocation: Optional[List[str]] = None
+        self.method = "none"
+        self.cold_start: Optional[float] = None
+        self.probed_at: Optional[float] = None
+        self.error: Optional[str] = None
+
+    def json(self) -> Dict:
+        return {
+            "available": self.invocation is not None,
+            "method": self.method,
+            "invocation": self.invocation,
+            "cold_start": self.cold_start,
+            "probed_at": self.probed_at,
+            "error": self.error,
+        }
+
+
+def candidates(tool: str) -> List[Tuple[str, List[str]]]:
+    """(method label, command prefix) in the order run_cli_tool used to try them."""
+    found = []
+    for path in (f"/opt/render/.local/bin/{tool}", f"/home/render/.local/bin/{tool}", f"/usr/local/bin/{tool}", f"/usr/bin/{tool}"):
+        if os.access(path, os.X_OK):
+            found.append((f"direct: {path}", [path]))
+    on_path = shutil.which(tool, path=TOOL_ENV["PATH"])
+    if on_path and all(prefix != [on_path] for _, prefix in found):
+        found.append((f"direct: {on_path}", [on_path]))
+    pipx = shutil.which("pipx", path=TOOL_ENV["PATH"])
+    if pipx:
+        found.append(("pipx run", [pipx, "run", tool]))
+    for python_cmd in ("python3", "python", "/usr/bin/python3"):
+        python = shutil.which(python_cmd, path=TOOL_ENV["PATH"])
+        if python:
+            found.append((f"python -m: {python_cmd}", [python, "-m", tool]))
+    return found
+
+
+class ToolResolver:
+    """Registry of the working invocation per tool.
+
+    A tool is probed (`<tool> --help`) on first use and after invalidate(),
+    by the call that needs it. Once its entry is older than reprobe_interval
+    it is probed again in a background thread, and callers get the entry
+    they had until the new one is in. Every other call reuses the recorded
+    invocation without spawning anything extra.
+    """
+
+    def __init__(self, tools=TOOLS, reprobe_interval: float = TOOL_REPROBE_INTERVAL, probe_timeout: float = TOOL_PROBE_TIMEOUT):
+        self.reprobe_interval = reprobe_interval
+        self.probe_timeout = probe_timeout
+        self.entries: Dict[str, Resolution] = {tool: Resolution(tool) for tool in tools}
+        self._locks = {tool: threading.Lock() for tool in tools}
+        # Tools with a background re-probe running.
+        self._reprobing: Set[str] = set()
+
+    def probe(self, tool: str) -> Resolution:
+        entry = Resolution(tool)
+        errors = []
+        for method, prefix in candidates(tool):
+            started = time.monotonic()
+            try:
+                result = subprocess.run(
+                    prefix + ["--help"],
+                    capture_output=True,
+                    text=True,
+                    timeout=self.probe_timeout,
+                    cwd="/",
+                    env=TOOL_ENV,
+                )
+            except Exception as e:
+                errors.append(f"{method}: {type(e).__name__}")
+                continue
+            if result.returncode == 0 or result.stdout.strip():
+                entry.invocation, entry.method = prefix, method
+                entry.cold_start = round(time.monotonic() - started, 3)
+                break
+            errors.append(f"{method}: exit {result.returncode}")
+        if entry.invocation is None:
+            entry.error = "; ".join(errors) or f"{tool} is not installed"
+        entry.probed_at = time.time()
+        self.entries[tool] = entry
+        status = f"{entry.method} ({entry.cold_start}s cold start)" if entry.invocation else f"unavailable ({entry.error})"
+        print(f"🔎 {tool} CLI: {status}")
+        return entry
+
+    def resolve(self, tool: str) -> Resolution:
+        with self._locks[tool]:
+            entry = self.entries[tool]
+            if entry.probed_at is None:
+                return self.probe(tool)
+            if time.time() - entry.probed_at > self.reprobe_interval and tool not in self._reprobing:
+                self._reprobing.add(tool)
+                threading.Thread(target=self._reprobe, args=(tool,), name=f"reprobe-{tool}", daemon=True).start()
+            return entry
+
+    def _reprobe(self, tool: str):
+        try:
+            self.probe(tool)
+        finally:
+            self._reprobing.discard(tool)
+
+    def invalidate(self, tool: str):
+        """Forget the recorded invocation so the next resolve() probes again."""
+        with self._locks[tool]:
+            self.entries[tool].probed_at = None
+
+    def probe_all(self) -> Dict[str, bool]:
+        threads = [threading.Thread(target=self.resolve, args=(tool,)) for tool in self.entries]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return {tool: entry.invocation is not None for tool, entry in self.entries.items()}
+
+
+tool_resolver = ToolResolver()
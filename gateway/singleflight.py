@@ -0,0 +1,45 @@
+"""Coalesce identical concurrent scans into a single execution."""
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, List
+
+
+class SingleFlight:
+    """Callers asking for the same key while it is in flight share one run.
+
+    The run is a task of its own, so a caller that goes away does not cancel
+    it for the others; it is cancelled only when its last caller is gone.
+    """
+
+    def __init__(self):
+        self.stats = {"started": 0, "coalesced": 0}
+        # key -> [task, number of callers waiting on it]
+        self._calls: Dict[Hashable, List] = {}
+
+    def in_flight(self) -> int:
+        return len(self._calls)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._calls
+
+    async def run(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        call = self._calls.get(key)
+        if call is None:
+            call = [asyncio.create_task(fn()), 0]
+            self._calls[key] = call
+            call[0].add_done_callback(lambda _: self._forget(key, call))
+            self.stats["started"] += 1
+        else:
+            self.stats["coalesced"] += 1
+
+        task = call[0]
+        call[1] += 1
+        try:
+            return await asyncio.shield(task)
+        finally:
+            call[1] -= 1
+            if call[1] == 0 and not task.done():
+                task.cancel()
+
+    def _forget(self, key: Hashable, call: List):
+        if self._calls.get(key) is call:
+            del self._calls[key]
@@ -0,0 +1,83 @@
+"""Server-sent events for scans: one event per site verdict, as soon as it exists."""
+import asyncio
+import json
+import time
+from typing import AsyncIterator, Dict, List, Optional
+
+from .config import TOOL_DEADLINES
+from .deadline import Deadline
+from .orchestrator import run_tool
+
+KEEPALIVE_INTERVAL = 15
+
+_DONE = object()
+
+
+def sse(event: str, data: Dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+async def stream_scan(
+    plan: Dict[str, str],
+    deadlines: Optional[Dict[str, float]] = None,
+    refresh: bool = False,
+    deadline: Optional[Deadline] = None,
+) -> AsyncIterator[str]:
+    """Run plan ({tool: target}) like fan_out and yield SSE messages while it runs.
+
+    Events: "start", then "site" for every per-site result, "tool" when a tool
+    finishes or times out (with its full section), "error" when running a
+    tool raised, and "done" at the end, listing the tools that timed out,
+    returned partial results or failed.
+    """
+    deadlines = {**TOOL_DEADLINES, **(deadlines or {})}
+    if deadline is not None:
+        deadlines = {tool: deadline.cap(seconds) for tool, seconds in deadlines.items()}
+    queue: asyncio.Queue = asyncio.Queue()
+    statuses: Dict[str, str] = {}
+    partial: List[str] = []
+    started = time.monotonic()
+
+    async def run(tool: str, value: str):
+        try:
+            section = await run_tool(tool, value, deadlines[tool], emit=queue.put_nowait, refresh=refresh)
+        except Exception as e:
+            queue.put_nowait({"event": "error", "tool": tool, "error": f"{type(e).__name__}: {e}"})
+        else:
+            queue.put_nowait({"event": "tool", "tool": tool, "section": section})
+
+    async def run_all():
+        try:
+            await asyncio.gather(*(run(tool, value) for tool, value in plan.items()))
+        finally:
+            # The stream ends however the tools did.
+            queue.put_nowait(_DONE)
+
+    runner = asyncio.create_task(run_all())
+    try:
+        yield sse("start", {"plan": plan, "deadlines": {tool: deadlines[tool] for tool in plan}})
+        while True:
+            try:
+                item = await asyncio.wait_for(queue.get(), KEEPALIVE_INTERVAL)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            if item is _DONE:
+                break
+            if item.get("event") == "tool":
+                statuses[item["tool"]] = item["section"]["status"]
+                if item["section"].get("partial"):
+                    partial.append(item["tool"])
+                yield sse("tool", {"tool": item["tool"], **item["section"]})
+            elif item.get("event") == "error":
+                statuses[item["tool"]] = "failed"
+                yield sse("error", {"tool": item["tool"], "error": item["error"]})
+            elif item.get("tool") not in statuses:
+                # Late results from a tool that already timed out are dropped.
+                yield sse("site", item)
+        timed_out = [tool for tool, status in statuses.items() if status == "timeout"]
+        failed = [tool for tool, status in statuses.items() if status == "failed"]
+        yield sse("done", {"elapsed": round(time.monotonic() - started, 2), "timed_out": timed_out, "partial": partial, "failed": failed})
+    finally:
+        # Stops the scan when the client goes away mid-stream.
+        runner.cancel()
@@ -0,0 +1,88 @@
+"""Pre-forked worker processes that run the in-process engines.
+
+The pool uses a forkserver whose preload imports gateway.zygote, so the
+tools are imported and their databases loaded once in the fork server and
+every worker is forked from that warm state instead of loading its own.
+Workers are replaced after WORKER_MAX_JOBS scans.
+"""
+import asyncio
+import multiprocessing
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional
+
+from .config import WORKER_MAX_JOBS, WORKER_PROCESSES
+from .engines import ENGINES, get_engine
+
+_pool: Optional[ProcessPoolExecutor] = None
+# In a worker: its event loop, kept across scans so what the engines hold
+# open between scans (maigret's pooled HTTP session) stays usable.
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_lock = threading.Lock()
+_running = 0
+# Which engines loaded in the fork server, as reported by the first worker.
+loaded: Dict[str, bool] = {}
+
+
+def run_engine(tool: str, value: str, options: Optional[Dict] = None) -> Dict:
+    """Runs in a worker process; site results come back with the section, not as they happen."""
+    global _loop
+    if _loop is None:
+        _loop = asyncio.new_event_loop()
+    return _loop.run_until_complete(get_engine(tool).run(value, options))
+
+
+def _loaded() -> Dict[str, bool]:
+    return {name: engine.loaded for name, engine in ENGINES.items()}
+
+
+def start(processes: int = WORKER_PROCESSES, max_jobs: int = WORKER_MAX_JOBS) -> ProcessPoolExecutor:
+    """Start the fork server and the workers (blocking; the engines load in the fork server)."""
+    global _pool
+    with _lock:
+        if _pool is None:
+            _pool = _start(processes, max_jobs)
+        return _pool
+
+
+def _start(processes: int, max_jobs: int) -> ProcessPoolExecutor:
+    context = multiprocessing.get_context("forkserver")
+    # "__main__" first, so workers do not each re-run the main script on start.
+    context.set_forkserver_preload(["__main__", "gateway.zygote"])
+    kwargs = {}
+    if sys.version_info >= (3, 11):
+        kwargs["max_tasks_per_child"] = max_jobs
+    else:
+        print("⚠️ Worker recycling needs Python 3.11+, workers will live until shutdown")
+    pool = ProcessPoolExecutor(max_workers=processes, mp_context=context, **kwargs)
+    # Fork every worker now rather than on the first scans.
+    loaded.update([future.result() for future in [pool.submit(_loaded) for _ in range(processes)]][0])
+    print(f"🍴 {processes} warm workers forked (recycled every {max_jobs} scans), engines: {loaded}")
+    return pool
+
+
+def stop():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+async def run(tool: str, value: str, options: Optional[Dict] = None) -> Dict:
+    global _running
+    pool = _pool or await asyncio.get_running_loop().run_in_executor(None, start)
+    _running += 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(pool, run_engine, tool, value, options)
+    finally:
+        _running -= 1
+
+
+def stats() -> Dict:
+    return {
+        "processes": len(_pool._processes) if _pool is not None and _pool._processes else 0,
+        "running": _running,
+        "size": WORKER_PROCESSES,
+        "max_jobs": WORKER_MAX_JOBS,
+    }
@@ -0,0 +1,7 @@
+"""Imported by the worker pool's fork server: loads every engine once, so the
+workers it forks start with the tools imported and their site databases in
+memory (shared copy-on-write until a worker writes to them)."""
+from .engines import ENGINES
+
+for _engine in ENGINES.values():
+    _engine.load()
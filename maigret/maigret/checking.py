@@ -1,18 +1,19 @@
 # Standard library imports
 import ast
 import asyncio
+import codecs
 import logging
 import random
 import re
 import ssl
 import sys
 from typing import Dict, List, Optional, Tuple
-from urllib.parse import quote
+from urllib.parse import quote, urlparse
 
 # Third party imports
 import aiodns
 from alive_progress import alive_bar
-from aiohttp import ClientSession, TCPConnector, http_exceptions
+from aiohttp import ClientSession, DummyCookieJar, TCPConnector, http_exceptions
 from aiohttp.client_exceptions import ClientConnectorError, ServerDisconnectedError
 from python_socks import _errors as proxy_errors
 from socid_extractor import extract
@@ -26,10 +27,11 @@ except ImportError:
 from . import errors
 from .activation import ParsingActivator, import_aiohttp_cookies
 from .errors import CheckError
-from .executors import AsyncioQueueGeneratorExecutor
+from .executors import AsyncioAdaptiveQueueGeneratorExecutor
+from .matching import BodyMatcher
 from .result import MaigretCheckResult, MaigretCheckStatus
 from .sites import MaigretDatabase, MaigretSite
-from .types import QueryOptions, QueryResultWrapper
+from .types import QueryDraft, QueryOptions, QueryResultWrapper
 from .utils import ascii_data_display, get_random_user_agent
 
 
@@ -47,35 +49,145 @@ SUPPORTED_IDS = (
 
 BAD_CHARS = "#"
 
+# response bodies are cut at this size unless a site sets its own maxBytes
+MAX_BODY_BYTES = 5 * 1024 * 1024
+
 
 class CheckerBase:
     pass
 
 
 class SimpleAiohttpChecker(CheckerBase):
+    """Checks sites through one pooled keep-alive session.
+
+    The session is opened by the first check and kept until close(), so
+    connections, TLS sessions and DNS answers are reused across sites,
+    retries and every maigret() call given the same checker.
+
+    Bodies are read as they stream in and no further than the site's
+    BodyMatcher needs to decide the check, nor than max_bytes.
+    """
+
     def __init__(self, *args, **kwargs):
         self.proxy = kwargs.get('proxy')
         self.cookie_jar = kwargs.get('cookie_jar')
         self.logger = kwargs.get('logger', Mock())
+        self.connections = kwargs.get('connections', 100)
+        self.connections_per_host = kwargs.get('connections_per_host', 8)
+        self.dns_cache_ttl = kwargs.get('dns_cache_ttl', 300)
+        self.max_bytes = kwargs.get('max_bytes', MAX_BODY_BYTES)
         self.url = None
         self.headers = None
         self.allow_redirects = True
         self.timeout = 0
         self.method = 'get'
-
-    def prepare(self, url, headers=None, allow_redirects=True, timeout=0, method='get'):
+        self.matcher = None
+        self._session = None
+        self._loop = None
+
+    def prepare(
+        self,
+        url,
+        headers=None,
+        allow_redirects=True,
+        timeout=0,
+        method='get',
+        matcher=None,
+    ):
         self.url = url
         self.headers = headers
         self.allow_redirects = allow_redirects
         self.timeout = timeout
         self.method = method
+        self.matcher = matcher
         return None
 
+    def _get_session(self) -> ClientSession:
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session.closed or self._loop is not loop:
+            from aiohttp_socks import ProxyConnector
+
+            self._close_stale_session()
+
+            connector_args = dict(
+                ssl=False,
+                limit=self.connections,
+                limit_per_host=self.connections_per_host,
+                use_dns_cache=True,
+                ttl_dns_cache=self.dns_cache_ttl,
+            )
+            connector = (
+                ProxyConnector.from_url(self.proxy, **connector_args)
+                if self.proxy
+                else TCPConnector(**connector_args)
+            )
+            self._session = ClientSession(
+                connector=connector,
+                trust_env=True,
+                # cookies a site sets must not follow the session to other
+                # sites and searches, only those of a given cookie file do
+                cookie_jar=self.cookie_jar or DummyCookieJar(),
+            )
+            self._loop = loop
+        return self._session
+
+    def _close_stale_session(self):
+        """Close a session opened on another event loop, on that loop."""
+        session, loop = self._session, self._loop
+        self._session = None
+        if session is None or session.closed:
+            return
+        if loop.is_running():
+            asyncio.run_coroutine_threadsafe(session.close(), loop)
+        elif not loop.is_closed():
+            # done the next time that loop runs
+            loop.create_task(session.close())
+        else:
+            # its connections went with the loop
+            session.detach()
+
     async def close(self):
-        pass
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def _read_body(self, response, matcher, logger) -> str:
+        """The body decoded, as far as the matcher and the size limit let it be read.
+
+        When reading stops early the response is closed, so its connection
+        is dropped rather than drained.
+        """
+        limit = (matcher and matcher.max_bytes) or self.max_bytes
+        decoder = codecs.getincrementaldecoder(response.charset or "utf-8")("ignore")
+        parts: List[str] = []
+        received = 0
+
+        async for chunk in response.content.iter_any():
+            cut = bool(limit) and received + len(chunk) >= limit
+            if cut:
+                chunk = chunk[: limit - received]
+            received += len(chunk)
+            text = decoder.decode(chunk, final=cut)
+            parts.append(text)
+
+            if matcher and matcher.feed(text, response.status):
+                logger.debug(f"Stopped reading {response.url} at {received} bytes")
+                response.close()
+                break
+            if cut:
+                logger.debug(f"Body of {response.url} cut at {limit} bytes")
+                response.close()
+                break
+        else:
+            text = decoder.decode(b'', final=True)
+            parts.append(text)
+            if matcher:
+                matcher.feed(text, response.status)
+
+        return ''.join(parts)
 
     async def _make_request(
-        self, session, url, headers, allow_redirects, timeout, method, logger
+        self, session, url, headers, allow_redirects, timeout, method, logger, matcher=None
     ) -> Tuple[str, int, Optional[CheckError]]:
         try:
             request_method = session.get if method == 'get' else session.head
@@ -86,9 +198,7 @@ class SimpleAiohttpChecker(CheckerBase):
                 timeout=timeout,
             ) as response:
                 status_code = response.status
-                response_content = await response.content.read()
-                charset = response.charset or "utf-8"
-                decoded_content = response_content.decode(charset, "ignore")
+                decoded_content = await self._read_body(response, matcher, logger)
 
                 error = CheckError("Connection lost") if status_code == 0 else None
                 logger.debug(decoded_content)
@@ -118,42 +228,27 @@ class SimpleAiohttpChecker(CheckerBase):
                 return None, 0, CheckError("Unexpected", str(e))
 
     async def check(self) -> Tuple[str, int, Optional[CheckError]]:
-        from aiohttp_socks import ProxyConnector
-
-        connector = (
-            ProxyConnector.from_url(self.proxy)
-            if self.proxy
-            else TCPConnector(ssl=False)
+        # the request is read from prepare() before the first await, as one
+        # checker serves every site
+        html_text, status_code, error = await self._make_request(
+            self._get_session(),
+            self.url,
+            self.headers,
+            self.allow_redirects,
+            self.timeout,
+            self.method,
+            self.logger,
+            self.matcher,
         )
-        connector.verify_ssl = False
-
-        async with ClientSession(
-            connector=connector,
-            trust_env=True,
-            # TODO: tests
-            cookie_jar=self.cookie_jar if self.cookie_jar else None,
-        ) as session:
-            html_text, status_code, error = await self._make_request(
-                session,
-                self.url,
-                self.headers,
-                self.allow_redirects,
-                self.timeout,
-                self.method,
-                self.logger,
-            )
 
-            if error and str(error) == "Invalid proxy response":
-                self.logger.debug(error, exc_info=True)
+        if error and str(error) == "Invalid proxy response":
+            self.logger.debug(error, exc_info=True)
 
-            return str(html_text) if html_text else '', status_code, error
+        return str(html_text) if html_text else '', status_code, error
 
 
 class ProxiedAiohttpChecker(SimpleAiohttpChecker):
-    def __init__(self, *args, **kwargs):
-        self.proxy = kwargs.get('proxy')
-        self.cookie_jar = kwargs.get('cookie_jar')
-        self.logger = kwargs.get('logger', Mock())
+    pass
 
 
 class AiodnsDomainResolver(CheckerBase):
@@ -165,7 +260,15 @@ class AiodnsDomainResolver(CheckerBase):
         self.logger = kwargs.get('logger', Mock())
         self.resolver = aiodns.DNSResolver(loop=loop)
 
-    def prepare(self, url, headers=None, allow_redirects=True, timeout=0, method='get'):
+    def prepare(
+        self,
+        url,
+        headers=None,
+        allow_redirects=True,
+        timeout=0,
+        method='get',
+        matcher=None,
+    ):
         self.url = url
         return None
 
@@ -191,7 +294,15 @@ class CheckerMock:
     def __init__(self, *args, **kwargs):
         pass
 
-    def prepare(self, url, headers=None, allow_redirects=True, timeout=0, method='get'):
+    def prepare(
+        self,
+        url,
+        headers=None,
+        allow_redirects=True,
+        timeout=0,
+        method='get',
+        matcher=None,
+    ):
         return None
 
     async def check(self) -> Tuple[str, int, Optional[CheckError]]:
@@ -204,15 +315,18 @@ class CheckerMock:
 
 # TODO: move to separate class
 def detect_error_page(
-    html_text, status_code, fail_flags, ignore_403
+    html_text, status_code, fail_flags, ignore_403, found=None
 ) -> Optional[CheckError]:
+    # the markers found in html_text, if already known, save scanning it again
+    haystack = html_text if found is None else found
+
     # Detect service restrictions such as a country restriction
     for flag, msg in fail_flags.items():
-        if flag in html_text:
+        if flag in haystack:
             return CheckError("Site-specific", msg)
 
     # Detect common restrictions such as provider censorship and bot protection
-    err = errors.detect(html_text)
+    err = errors.detect(haystack)
     if err:
         return err
 
@@ -263,6 +377,11 @@ def process_site_result(
 
     html_text, status_code, check_error = response
 
+    # every detection string of the site found in the page, in one go
+    matcher = results_info.pop("matcher", None)
+    markers = site.markers
+    found = matcher.found_in(html_text) if matcher else markers.find(html_text)
+
     # TODO: add elapsed request time counting
     response_time = None
 
@@ -272,12 +391,12 @@ def process_site_result(
     # additional check for errors
     if status_code and not check_error:
         check_error = detect_error_page(
-            html_text, status_code, site.errors_dict, site.ignore403
+            html_text, status_code, markers.site_errors, site.ignore403, found
         )
 
     # parsing activation
     is_need_activation = any(
-        [s for s in site.activation.get("marks", []) if s in html_text]
+        [s for s in markers.activation_marks if s in found]
     )
 
     if site.activation and html_text and is_need_activation:
@@ -302,7 +421,7 @@ def process_site_result(
     site_name = site.pretty_name
     # presense flags
     # True by default
-    presense_flags = site.presense_strs
+    presense_flags = markers.presence
     is_presense_detected = False
 
     if html_text:
@@ -311,7 +430,7 @@ def process_site_result(
             site.stats["presense_flag"] = None
         else:
             for presense_flag in presense_flags:
-                if presense_flag in html_text:
+                if presense_flag in found:
                     is_presense_detected = True
                     site.stats["presense_flag"] = presense_flag
                     logger.debug(presense_flag)
@@ -343,7 +462,7 @@ def process_site_result(
     elif check_type == "message":
         # Checks if the error message is in the HTML
         is_absence_detected = any(
-            [(absence_flag in html_text) for absence_flag in site.absence_strs]
+            [(absence_flag in found) for absence_flag in markers.absence]
         )
         if not is_absence_detected and is_presense_detected:
             result = build_result(MaigretCheckStatus.CLAIMED)
@@ -411,8 +530,6 @@ def make_site_result(
 
     headers = {
         "User-Agent": get_random_user_agent(),
-        # tell server that we want to close connection after request
-        "Connection": "close",
     }
 
     headers.update(site.headers)
@@ -509,16 +626,19 @@ def make_site_result(
             # The final result of the request will be what is available.
             allow_redirects = True
 
+        matcher = BodyMatcher(site, parsing=options['parsing'])
         future = checker.prepare(
             method=request_method,
             url=url_probe,
             headers=headers,
             allow_redirects=allow_redirects,
             timeout=options['timeout'],
+            matcher=matcher,
         )
 
         # Store future request object in the results object
         results_site["future"] = future
+        results_site["matcher"] = matcher
 
     results_site["checker"] = checker
 
@@ -551,6 +671,36 @@ async def check_site_for_username(
     return site.name, response_result
 
 
+def site_concurrency_keys(task: QueryDraft) -> Tuple:
+    """Keys a site check holds in the adaptive executor: the host it requests.
+
+    Sites of one engine (uCoz, XenForo...) are on hosts of their own, so
+    they do not share a window. A site whose host cannot be told from its
+    URLs gets a window of its own.
+    """
+    site = task[1][0]
+    url = (site.url_probe or site.url).replace('{urlMain}', site.url_main)
+    url = url.replace('{urlSubpath}', site.url_subpath)
+    host = urlparse(url).hostname or urlparse(site.url_main).hostname
+    if not host:
+        return (('site', site.name),)
+    return (('host', host.removeprefix('www.')),)
+
+
+def is_throttled(result: Tuple[str, QueryResultWrapper]) -> Optional[bool]:
+    """Whether a site check was throttled (True), went through (False) or
+    failed for some other reason (None)."""
+    _, site_result = result
+    status = site_result.get('status')
+    if site_result.get('http_status') == 429:
+        return True
+    if not status:
+        return None
+    if status.error:
+        return True if errors.is_throttling(status.error.type) else None
+    return False
+
+
 async def debug_ip_request(checker, logger):
     checker.prepare(url="https://icanhazip.com")
     ip, status, check_error = await checker.check()
@@ -589,6 +739,8 @@ async def maigret(
     cookies=None,
     retries=0,
     check_domains=False,
+    checker=None,
+    deadline=None,
     *args,
     **kwargs,
 ) -> QueryResultWrapper:
@@ -613,6 +765,13 @@ async def maigret(
                               Default is 100.
     no_progressbar         -- Displaying of ASCII progressbar during scanner.
     cookies                -- Filename of a cookie jar file to use for each request.
+    checker                -- Checker for clearweb sites to use instead of a new
+                              SimpleAiohttpChecker, e.g. one kept open across
+                              searches or shared with other tools. It is not
+                              closed at the end of the search.
+    deadline               -- time.monotonic() value the search must be over by.
+                              Sites whose check could not finish by then are not
+                              checked and are left out of the results.
 
     Return Value:
     Dictionary containing results from report. Key of dictionary is the name
@@ -639,8 +798,11 @@ async def maigret(
         logger.debug(f"Using cookies jar file {cookies}")
         cookie_jar = import_aiohttp_cookies(cookies)
 
-    clearweb_checker = SimpleAiohttpChecker(
-        proxy=proxy, cookie_jar=cookie_jar, logger=logger
+    clearweb_checker = checker or SimpleAiohttpChecker(
+        proxy=proxy,
+        cookie_jar=cookie_jar,
+        logger=logger,
+        connections=max_connections,
     )
 
     # TODO
@@ -665,11 +827,15 @@ async def maigret(
     if logger.level == logging.DEBUG:
         await debug_ip_request(clearweb_checker, logger)
 
-    # setup parallel executor
-    executor = AsyncioQueueGeneratorExecutor(
+    # setup parallel executor, with concurrency per host adapting to
+    # captchas and rate limits on top of max_connections
+    executor = AsyncioAdaptiveQueueGeneratorExecutor(
         logger=logger,
         in_parallel=max_connections,
         timeout=timeout + 0.5,
+        deadline=deadline,
+        key=site_concurrency_keys,
+        feedback=is_throttled,
         *args,
         **kwargs,
     )
@@ -694,57 +860,65 @@ async def maigret(
     sites = list(site_dict.keys())
 
     attempts = retries + 1
-    while attempts:
-        tasks_dict = {}
-
-        for sitename, site in site_dict.items():
-            if sitename not in sites:
-                continue
-            default_result: QueryResultWrapper = {
-                'site': site,
-                'status': MaigretCheckResult(
-                    username,
-                    sitename,
-                    '',
-                    MaigretCheckStatus.UNKNOWN,
-                    error=CheckError('Request failed'),
-                ),
-            }
-            tasks_dict[sitename] = (
-                check_site_for_username,
-                [site, username, options, logger, query_notify],
-                {
-                    'default': (sitename, default_result),
-                    'retry': retries - attempts + 1,
-                },
-            )
-
-        cur_results = []
-        with alive_bar(
-            len(tasks_dict), title="Searching", force_tty=True, disable=no_progressbar
-        ) as progress:
-            async for result in executor.run(tasks_dict.values()):
-                cur_results.append(result)
-                progress()
-
-        all_results.update(cur_results)
-
-        # rerun for failed sites
-        sites = get_failed_sites(dict(cur_results))
-        attempts -= 1
-
-        if not sites:
-            break
-
-        if attempts:
-            query_notify.warning(
-                f'Restarting checks for {len(sites)} sites... ({attempts} attempts left)'
-            )
+    try:
+        while attempts:
+            tasks_dict = {}
+
+            for sitename, site in site_dict.items():
+                if sitename not in sites:
+                    continue
+                default_result: QueryResultWrapper = {
+                    'site': site,
+                    'status': MaigretCheckResult(
+                        username,
+                        sitename,
+                        '',
+                        MaigretCheckStatus.UNKNOWN,
+                        error=CheckError('Request failed'),
+                    ),
+                }
+                tasks_dict[sitename] = (
+                    check_site_for_username,
+                    [site, username, options, logger, query_notify],
+                    {
+                        'default': (sitename, default_result),
+                        'retry': retries - attempts + 1,
+                    },
+                )
 
-    # closing http client session
-    await clearweb_checker.close()
-    await tor_checker.close()
-    await i2p_checker.close()
+            cur_results = []
+            with alive_bar(
+                len(tasks_dict),
+                title="Searching",
+                force_tty=True,
+                disable=no_progressbar,
+            ) as progress:
+                async for result in executor.run(tasks_dict.values()):
+                    cur_results.append(result)
+                    progress()
+
+            all_results.update(cur_results)
+
+            # rerun for failed sites
+            sites = get_failed_sites(dict(cur_results))
+            attempts -= 1
+
+            if not sites:
+                break
+
+            if attempts:
+                query_notify.warning(
+                    f'Restarting checks for {len(sites)} sites... ({attempts} attempts left)'
+                )
+    finally:
+        # closing http client sessions, also when the search is cancelled
+        if checker is None:
+            await clearweb_checker.close()
+        await tor_checker.close()
+        await i2p_checker.close()
+
+    if executor.limiter.throttled:
+        logger.debug(f'{executor.limiter.throttled} site checks were throttled')
 
     # notify caller that all queries are finished
     query_notify.finish()
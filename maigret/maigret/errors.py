@@ -88,6 +88,15 @@ TEMPORARY_ERRORS_TYPES = [
     'Connection lost',
 ]
 
+# errors meaning the site (or a CDN in front of it) wants fewer requests from us
+THROTTLING_ERRORS_TYPES = [
+    'Captcha',
+    'Bot protection',
+    'Access denied',
+    'Request blocked',
+    'Just a moment: bot redirect challenge',
+]
+
 THRESHOLD = 3  # percent
 
 
@@ -99,6 +108,10 @@ def is_permanent(err_type):
     return err_type not in TEMPORARY_ERRORS_TYPES
 
 
+def is_throttling(err_type):
+    return err_type in THROTTLING_ERRORS_TYPES
+
+
 def detect(text):
     for flag, err in COMMON_ERRORS.items():
         if flag in text:
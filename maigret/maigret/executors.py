@@ -1,7 +1,8 @@
 import asyncio
 import sys
 import time
-from typing import Any, Iterable, List, Callable
+from collections import deque
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Tuple
 
 import alive_progress
 from alive_progress import alive_bar
@@ -186,10 +187,40 @@ class AsyncioQueueGeneratorExecutor:
         self.workers_count = kwargs.get('in_parallel', 10)
         self.queue = asyncio.Queue()
         self.timeout = kwargs.get('timeout')
+        # time.monotonic() value by which the run must be over: tasks that
+        # could not finish by then (within timeout) are not started
+        self.deadline = kwargs.get('deadline')
+        self.skipped = 0
         self.logger = kwargs['logger']
         self._results = asyncio.Queue()
         self._stop_signal = object()
 
+    async def _execute(self, task) -> Any:
+        """Run one task and put its result into the results queue, return it.
+
+        Tasks that could not finish by the deadline are skipped (None).
+        """
+        if self.deadline is not None and (
+            time.monotonic() + (self.timeout or 0) > self.deadline
+        ):
+            self.skipped += 1
+            return None
+
+        try:
+            f, args, kwargs = task
+            query_future = f(*args, **kwargs)
+            query_task = create_task_func()(query_future)
+
+            try:
+                result = await asyncio.wait_for(query_task, timeout=self.timeout)
+            except asyncio.TimeoutError:
+                result = kwargs.get('default')
+            await self._results.put(result)
+            return result
+        except Exception as e:
+            self.logger.error(f"Error in worker: {e}")
+            return None
+
     async def worker(self):
         """Process tasks from the queue and put results into the results queue."""
         while True:
@@ -199,37 +230,30 @@ class AsyncioQueueGeneratorExecutor:
                 break
 
             try:
-                f, args, kwargs = task
-                query_future = f(*args, **kwargs)
-                query_task = create_task_func()(query_future)
-
-                try:
-                    result = await asyncio.wait_for(query_task, timeout=self.timeout)
-                except asyncio.TimeoutError:
-                    result = kwargs.get('default')
-                await self._results.put(result)
-            except Exception as e:
-                self.logger.error(f"Error in worker: {e}")
+                await self._execute(task)
             finally:
                 self.queue.task_done()
 
+    async def _enqueue(self, queries: Iterable[Callable[..., Any]]):
+        for t in queries:
+            await self.queue.put(t)
+
+        # Add stop signals
+        for _ in range(self.workers_count):
+            await self.queue.put(self._stop_signal)
+
     async def run(self, queries: Iterable[Callable[..., Any]]):
         """Run workers to process queries in parallel."""
         start_time = time.time()
 
         # Add tasks to the queue
-        for t in queries:
-            await self.queue.put(t)
+        await self._enqueue(queries)
 
         # Create workers
         workers = [
             asyncio.create_task(self.worker()) for _ in range(self.workers_count)
         ]
 
-        # Add stop signals
-        for _ in range(self.workers_count):
-            await self.queue.put(self._stop_signal)
-
         try:
             while any(w.done() is False for w in workers) or not self._results.empty():
                 try:
@@ -238,7 +262,138 @@ class AsyncioQueueGeneratorExecutor:
                 except asyncio.TimeoutError:
                     pass
         finally:
-            # Ensure all workers are awaited
-            await asyncio.gather(*workers)
+            # Stop the workers if the consumer went away (cancelled or closed
+            # early) instead of letting them drain the queue, then await them
+            for w in workers:
+                if not w.done():
+                    w.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
             self.execution_time = time.time() - start_time
             self.logger.debug(f"Spent time: {self.execution_time}")
+
+
+class AIMDLimiter:
+    """Concurrency windows per key (host, engine...), adapted to how keys respond.
+
+    A window starts at `initial` and grows by one per success until the
+    key is first throttled (slow start), then by 1/window per success
+    (additive increase); each throttling response halves it
+    (multiplicative decrease). A task holding several keys needs room in
+    all of their windows.
+    """
+
+    def __init__(self, initial=2, minimum=1, maximum=None, decrease=0.5):
+        self.initial = initial
+        self.minimum = minimum
+        self.maximum = maximum
+        self.decrease = decrease
+        self.windows: Dict[Hashable, float] = {}
+        self.thresholds: Dict[Hashable, float] = {}
+        self.running: Dict[Hashable, int] = {}
+        self.throttled = 0
+
+    def window(self, key) -> float:
+        return self.windows.get(key, self.initial)
+
+    def saturated(self, keys) -> Optional[Hashable]:
+        """The first key without room for one more task, if any."""
+        for key in keys:
+            if self.running.get(key, 0) >= int(self.window(key)):
+                return key
+        return None
+
+    def start(self, keys):
+        for key in keys:
+            self.running[key] = self.running.get(key, 0) + 1
+
+    def finish(self, keys, throttled: Optional[bool] = None):
+        """Release keys; throttled is True/False for a throttling/successful
+        response and None when the outcome says nothing about load."""
+        for key in keys:
+            self.running[key] -= 1
+            if not self.running[key]:
+                del self.running[key]
+            window = self.window(key)
+            if throttled:
+                self.thresholds[key] = window * self.decrease
+                window = max(self.minimum, window * self.decrease)
+            elif throttled is False:
+                if window < self.thresholds.get(key, float('inf')):
+                    window += 1
+                else:
+                    window += 1 / window
+                if self.maximum:
+                    window = min(self.maximum, window)
+            self.windows[key] = window
+        if throttled:
+            self.throttled += 1
+
+
+class AsyncioAdaptiveQueueGeneratorExecutor(AsyncioQueueGeneratorExecutor):
+    """AsyncioQueueGeneratorExecutor with per-key concurrency on top of in_parallel.
+
+    key(task) gives the keys a task holds while it runs (e.g. its host),
+    feedback(result) tells the limiter whether the result was throttled.
+    Tasks with the same keys form a lane; lanes are served round robin and
+    a lane whose window is full waits, without holding up the others,
+    until one of its tasks finishes.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.key = kwargs['key']
+        self.feedback = kwargs.get('feedback', lambda result: None)
+        self.limiter = kwargs.get('limiter') or AIMDLimiter()
+        self._lanes: Dict[Tuple, deque] = {}
+        self._ready: deque = deque()
+        self._blocked: Dict[Hashable, List[Tuple]] = {}
+        self._wakeup = asyncio.Condition()
+
+    async def _enqueue(self, queries: Iterable[Callable[..., Any]]):
+        for t in queries:
+            lane = tuple(self.key(t))
+            if lane not in self._lanes:
+                self._lanes[lane] = deque()
+                self._ready.append(lane)
+            self._lanes[lane].append(t)
+
+    def _take(self) -> Optional[Tuple[Tuple, Any]]:
+        while self._ready:
+            lane = self._ready.popleft()
+            key = self.limiter.saturated(lane)
+            if key is not None:
+                self._blocked.setdefault(key, []).append(lane)
+                continue
+            tasks = self._lanes[lane]
+            task = tasks.popleft()
+            if tasks:
+                self._ready.append(lane)
+            else:
+                del self._lanes[lane]
+            return lane, task
+        return None
+
+    async def worker(self):
+        while True:
+            picked = self._take()
+            if picked is None:
+                if not self._lanes:
+                    break
+                # every lane left is waiting for a running task to finish
+                async with self._wakeup:
+                    await self._wakeup.wait()
+                continue
+
+            lane, task = picked
+            self.limiter.start(lane)
+            result = None
+            try:
+                result = await self._execute(task)
+            finally:
+                self.limiter.finish(
+                    lane, self.feedback(result) if result is not None else None
+                )
+                for key in lane:
+                    self._ready.extend(self._blocked.pop(key, []))
+                async with self._wakeup:
+                    self._wakeup.notify_all()
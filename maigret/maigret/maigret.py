@@ -22,7 +22,9 @@ from .checking import (
     self_check,
     BAD_CHARS,
     maigret,
+    SimpleAiohttpChecker,
 )
+from .activation import import_aiohttp_cookies
 from . import errors
 from .notify import QueryNotifyPrint
 from .report import (
@@ -537,7 +539,9 @@ async def main():
     )
 
     # Create object with all information about sites we are aware of.
-    db = MaigretDatabase().load_from_path(db_file)
+    db = MaigretDatabase().load_from_path(
+        db_file, snapshot_path=settings.sites_db_snapshot_path
+    )
     get_top_sites_for_id = lambda x: db.ranked_sites_dict(
         top=args.top_sites,
         tags=args.tags,
@@ -643,6 +647,16 @@ async def main():
     already_checked = set()
     general_results = []
 
+    # one pooled HTTP session for all the usernames
+    checker = SimpleAiohttpChecker(
+        proxy=args.proxy,
+        cookie_jar=(
+            import_aiohttp_cookies(args.cookie_file) if args.cookie_file else None
+        ),
+        logger=logger,
+        connections=args.connections,
+    )
+
     while usernames:
         username, id_type = list(usernames.items())[0]
         del usernames[username]
@@ -689,6 +703,7 @@ async def main():
             no_progressbar=args.no_progressbar,
             retries=args.retries,
             check_domains=args.with_domains,
+            checker=checker,
         )
 
         errs = errors.notify_about_errors(
@@ -737,6 +752,8 @@ async def main():
                 f'JSON {args.json} report for {username} saved in {filename}'
             )
 
+    await checker.close()
+
     # reporting for all the result
     if general_results:
         if args.html or args.pdf:
@@ -0,0 +1,123 @@
+"""Maigret body matching: finding a site's detection strings in responses"""
+from itertools import chain
+from typing import Dict, List, Set
+
+from . import errors
+
+
+class SiteMarkers:
+    """
+    Every string the checks of a site look for in a response body: its error
+    strings (engine ones included), the common errors, activation marks,
+    presence and absence strings.
+
+    Collected once per site by MaigretSite.update_detectors(), so at database
+    load time and again whenever the site is updated. find() looks for each
+    distinct string once; process_site_result() then only tests membership
+    of the found set.
+
+    That is one substring search per string, not a single pass: with the
+    ~18 strings a site has, CPython's substring search beats a combined
+    regex alternation (see utils/bench_matching.py).
+    """
+
+    def __init__(self, site):
+        self.site_errors: Dict[str, str] = site.errors_dict
+        self.activation_marks: List[str] = list(site.activation.get("marks", []))
+        self.presence: List[str] = list(site.presense_strs)
+        self.absence: List[str] = list(site.absence_strs)
+
+        self.strings = tuple(
+            dict.fromkeys(
+                chain(
+                    self.site_errors,
+                    errors.COMMON_ERRORS,
+                    self.activation_marks,
+                    self.presence,
+                    self.absence,
+                )
+            )
+        )
+        # how much of already seen text a new chunk must be matched with,
+        # so strings split between chunks are found
+        self.overlap = max(map(len, self.strings), default=1) - 1
+
+    def find(self, text: str, known: Set[str] = frozenset()) -> Set[str]:
+        """The strings found in text, besides those already known."""
+        return {s for s in self.strings if s not in known and s in text}
+
+
+class BodyMatcher:
+    """
+    Matches one response body against the site markers as it streams in,
+    and tells the checker when the rest of the body cannot change the
+    verdict, so it can stop reading.
+
+    The verdict counts as decided once the body shows:
+    - an error marker (site-specific or a common one, e.g. a captcha page);
+    - an absence marker of a "message" site;
+    - a presence marker, when nothing later can turn the profile into
+      "not found" and the page is not needed in full for extracting ids.
+
+    Error markers are the exception the early stop accepts: one appearing
+    after a decisive absence or presence marker is not seen. Sites with
+    activation marks always get their full body.
+
+    What was found is kept, so process_site_result() does not scan the body again.
+    """
+
+    def __init__(self, site, parsing: bool = True):
+        self.markers: SiteMarkers = site.markers
+        self.fail_flags = list(
+            chain(self.markers.site_errors, errors.COMMON_ERRORS)
+        )
+        self.absence_flags: List[str] = []
+        self.claim_flags: List[str] = []
+
+        if site.check_type == "message":
+            self.absence_flags = self.markers.absence
+            # any absence marker later in the page would still win
+            if not self.absence_flags and not parsing:
+                self.claim_flags = self.markers.presence
+        elif site.check_type == "response_url" and not parsing:
+            self.claim_flags = self.markers.presence
+
+        self.enabled = not self.markers.activation_marks
+        self.max_bytes = site.max_bytes
+
+        self.found: Set[str] = set()
+        # characters of the body fed so far
+        self.seen = 0
+        self._tail = ""
+
+    def feed(self, text: str, status_code: int) -> bool:
+        """Match the next piece of the body; returns whether the verdict is decided."""
+        window = self._tail + text
+        self.found |= self.markers.find(window, self.found)
+        self.seen += len(text)
+        overlap = self.markers.overlap
+        self._tail = window[-overlap:] if overlap else ""
+        return self.decided(status_code)
+
+    def decided(self, status_code: int) -> bool:
+        if not self.enabled:
+            return False
+
+        if any(flag in self.found for flag in self.fail_flags):
+            return True
+
+        if any(flag in self.found for flag in self.absence_flags):
+            return True
+
+        # other responses may still turn out to be errors (403, 5xx)
+        # or, for response_url checks, not found
+        if not 200 <= status_code < 300:
+            return False
+
+        return any(flag in self.found for flag in self.claim_flags)
+
+    def found_in(self, text: str) -> Set[str]:
+        """The markers in text: the ones found while feeding, if text is what was fed."""
+        if self.seen == len(text):
+            return self.found
+        return self.markers.find(text)
@@ -14,6 +14,7 @@ class Settings:
     # main maigret setting
     retries_count: int
     sites_db_path: str
+    sites_db_snapshot_path: str
     timeout: int
     max_connections: int
     recursive_search: bool
@@ -1,12 +1,20 @@
 # ****************************** -*-
 """Maigret Sites Information"""
 import copy
+import hashlib
 import json
+import os
+import pickle
+import re
 import sys
-from typing import Optional, List, Dict, Any, Tuple
+from typing import Optional, List, Dict, Any, Set, Tuple
 
+from .matching import SiteMarkers
 from .utils import CaseConverter, URLMatcher, is_country_tag
 
+# bumped whenever what a database snapshot stores changes
+SNAPSHOT_FORMAT = 1
+
 
 class MaigretEngine:
     site: Dict[str, Any] = {}
@@ -30,6 +38,8 @@ class MaigretSite:
         "engineObj",
         "stats",
         "urlRegexp",
+        "urlRegexpStr",
+        "markers",
     ]
 
     # Username known to exist on the site
@@ -69,6 +79,8 @@ class MaigretSite:
     request_head_only = ""
     # GET parameters to include in requests
     get_params: Dict[str, Any] = {}
+    # Most bytes of a response body to read (the checker's limit if not set)
+    max_bytes: Optional[int] = None
 
     # Substrings in HTML response that indicate profile exists
     presense_strs: List[str] = []
@@ -83,6 +95,8 @@ class MaigretSite:
     engine_data: Dict[str, Any] = {}
     # Engine instance
     engine_obj: Optional["MaigretEngine"] = None
+    # Also compiled on first use (see __getattr__): url_regexp, the
+    # profile URL regexp, and markers, the detection strings for matching
     # Future for async requests
     request_future = None
     # Alexa traffic rank
@@ -158,16 +172,51 @@ class MaigretSite:
         return False
 
     def update_detectors(self):
-        if "url" in self.__dict__:
-            url = self.url
-            for group in ["urlMain", "urlSubpath"]:
-                if group in url:
-                    url = url.replace(
-                        "{" + group + "}",
-                        self.__dict__[CaseConverter.camel_to_snake(group)],
-                    )
+        # dropped detectors are compiled again on first use
+        self.__dict__.pop("url_regexp", None)
+        self.__dict__.pop("markers", None)
+
+        url = self.url_template()
+        if url is not None:
+            self.url_regexp_str = URLMatcher.make_profile_url_regexp_str(
+                url, self.regex_check
+            )
 
-            self.url_regexp = URLMatcher.make_profile_url_regexp(url, self.regex_check)
+    def url_template(self) -> Optional[str]:
+        """The profile URL with urlMain and urlSubpath filled in, {username} left."""
+        if "url" not in self.__dict__:
+            return None
+
+        url = self.url
+        for group in ["urlMain", "urlSubpath"]:
+            if group in url:
+                url = url.replace(
+                    "{" + group + "}",
+                    self.__dict__[CaseConverter.camel_to_snake(group)],
+                )
+        return url
+
+    def __getattr__(self, name):
+        # compiling every site's detectors takes most of the database load
+        # time, and a search only needs those of the sites it checks
+        if name == "url_regexp":
+            regexp_str = self.__dict__.get("url_regexp_str")
+            value = re.compile(regexp_str, re.IGNORECASE) if regexp_str else None
+        elif name == "markers":
+            value = SiteMarkers(self)
+        else:
+            raise AttributeError(
+                f"'{type(self).__name__}' object has no attribute '{name}'"
+            )
+        self.__dict__[name] = value
+        return value
+
+    def __getstate__(self):
+        # compiled detectors are not pickled, see __getattr__
+        state = self.__dict__.copy()
+        state.pop("url_regexp", None)
+        state.pop("markers", None)
+        return state
 
     def detect_username(self, url: str) -> Optional[str]:
         if self.url_regexp:
@@ -290,21 +339,146 @@ class MaigretSite:
         return self_copy
 
 
+class SitesIndex:
+    """
+    Lookups over a list of sites, for the ranked_sites_dict() filters:
+    sites by name, inverted indexes (by tag, engine, protocol, identifier
+    type, and lowercased name and source) of site positions in the list,
+    and the positions in rank order.
+
+    Built from the list when first needed, and built again after the list
+    or its sites change, see MaigretDatabase.update_site().
+    """
+
+    def __init__(self, sites: List[MaigretSite]):
+        self.names: Dict[str, MaigretSite] = {site.name: site for site in sites}
+        self.by_tag: Dict[str, Set[int]] = {}
+        self.by_engine: Dict[str, Set[int]] = {}
+        self.by_protocol: Dict[str, Set[int]] = {}
+        self.by_type: Dict[str, Set[int]] = {}
+        self.by_name: Dict[str, Set[int]] = {}
+
+        for position, site in enumerate(sites):
+            for tag in site.tags:
+                self.by_tag.setdefault(tag, set()).add(position)
+            if isinstance(site.engine, str):
+                self.by_engine.setdefault(site.engine.lower(), set()).add(position)
+            if site.protocol:
+                self.by_protocol.setdefault(site.protocol, set()).add(position)
+            self.by_type.setdefault(site.type, set()).add(position)
+            self.by_name.setdefault(site.name.lower(), set()).add(position)
+            if site.source:
+                self.by_name.setdefault(site.source.lower(), set()).add(position)
+
+        self._sites = sites
+        self._ranked: Dict[bool, List[int]] = {}
+        self._rank_of: Dict[bool, List[int]] = {}
+        # for extract_ids_from_url(), built on first use: profile URL hosts,
+        # host suffixes of {username}.example.com URLs, and sites with URLs
+        # matched otherwise
+        self._by_host: Optional[Dict[str, Set[int]]] = None
+        self._by_host_suffix: Dict[str, Set[int]] = {}
+        self._any_host: Set[int] = set()
+
+    def ranked(self, reverse: bool = False) -> List[int]:
+        """Site positions sorted by rank, like sorted() would sort the sites."""
+        if reverse not in self._ranked:
+            order = sorted(
+                range(len(self._sites)),
+                key=lambda i: self._sites[i].alexa_rank,
+                reverse=reverse,
+            )
+            rank_of = [0] * len(order)
+            for rank, position in enumerate(order):
+                rank_of[position] = rank
+            self._ranked[reverse] = order
+            self._rank_of[reverse] = rank_of
+        return self._ranked[reverse]
+
+    def rank_of(self, reverse: bool = False) -> List[int]:
+        """Where each site position is in ranked()."""
+        self.ranked(reverse)
+        return self._rank_of[reverse]
+
+    def _index_hosts(self):
+        self._by_host = {}
+        for position, site in enumerate(self._sites):
+            url = site.url_template()
+            if url is None:
+                continue
+            kind, host = URLMatcher.profile_url_host(url)
+            if kind == "host":
+                self._by_host.setdefault(host, set()).add(position)
+            elif kind == "suffix":
+                self._by_host_suffix.setdefault(host, set()).add(position)
+            else:
+                self._any_host.add(position)
+
+    def url_candidates(self, link: str) -> Set[int]:
+        """Positions of the sites whose profile URL regexp may match link."""
+        if self._by_host is None:
+            self._index_hosts()
+
+        candidates = set(self._any_host)
+        for part in URLMatcher.link_host_parts(link):
+            candidates.update(self._by_host.get(part.split("/")[0], ()))
+            # the username before a host suffix may have dots, or more, in it
+            dot = part.find(".")
+            while dot != -1:
+                suffix = part[dot:].split("/")[0]
+                candidates.update(self._by_host_suffix.get(suffix, ()))
+                dot = part.find(".", dot + 1)
+        return candidates
+
+    @staticmethod
+    def lookup(index: Dict[str, Set[int]], keys: List[str]) -> Set[int]:
+        return set().union(*(index.get(key, ()) for key in keys))
+
+
 class MaigretDatabase:
     def __init__(self):
         self._tags: list = []
         self._sites: list = []
         self._engines: list = []
+        self._index: Optional[SitesIndex] = None
+        # first position of every site name, kept up to date by update_site()
+        self._positions: Optional[Dict[str, int]] = None
+        self._engines_dict: Optional[Dict[str, MaigretEngine]] = None
 
     @property
     def sites(self):
         return self._sites
 
+    @property
+    def index(self) -> SitesIndex:
+        if self._index is None:
+            self._index = SitesIndex(self._sites)
+        return self._index
+
     @property
     def sites_dict(self):
-        return {site.name: site for site in self._sites}
+        """Sites by name; shared between calls, so not to be changed."""
+        return self.index.names
+
+    def _sites_changed(self):
+        self._index = None
+        self._positions = None
 
     def has_site(self, site: MaigretSite):
+        # a site only equals sites of the same name, and strings of its name
+        # or matching its URLs (see MaigretSite.__eq__)
+        if isinstance(site, (MaigretSite, str)):
+            name = (site.name if isinstance(site, MaigretSite) else site).lower()
+            same_name = [
+                self._sites[position]
+                for position in self.index.by_name.get(name, ())
+                if self._sites[position].name.lower() == name
+            ]
+            if isinstance(site, MaigretSite):
+                return any(site == s for s in same_name)
+            if same_name:
+                return True
+
         for s in self._sites:
             if site == s:
                 return True
@@ -338,40 +512,36 @@ class MaigretDatabase:
         """
         normalized_names = list(map(str.lower, names))
         normalized_tags = list(map(str.lower, tags))
+        show_disabled = "disabled" in tags or disabled
+
+        index = self.index
+        candidates = index.by_type.get(id_type, set())
+        if not tags and not names and len(candidates) > len(self._sites) // 2:
+            # walk the rank order until there are enough sites
+            selected = []
+            for position in index.ranked(reverse):
+                if len(selected) >= top:
+                    break
+                site = self._sites[position]
+                if site.type == id_type and (show_disabled or not site.disabled):
+                    selected.append(site)
+            return {site.name: site for site in selected}
+
+        if tags:
+            candidates = candidates & (
+                index.lookup(index.by_tag, normalized_tags)
+                | index.lookup(index.by_engine, normalized_tags)
+                | index.lookup(index.by_protocol, normalized_tags)
+            )
+        if names:
+            candidates = candidates & index.lookup(index.by_name, normalized_names)
 
-        is_name_ok = lambda x: x.name.lower() in normalized_names
-        is_source_ok = lambda x: x.source and x.source.lower() in normalized_names
-        is_engine_ok = (
-            lambda x: isinstance(x.engine, str) and x.engine.lower() in normalized_tags
-        )
-        is_tags_ok = lambda x: set(x.tags).intersection(set(normalized_tags))
-        is_protocol_in_tags = lambda x: x.protocol and x.protocol in normalized_tags
-        is_disabled_needed = lambda x: not x.disabled or (
-            "disabled" in tags or disabled
-        )
-        is_id_type_ok = lambda x: x.type == id_type
-
-        filter_tags_engines_fun = (
-            lambda x: not tags
-            or is_engine_ok(x)
-            or is_tags_ok(x)
-            or is_protocol_in_tags(x)
-        )
-        filter_names_fun = lambda x: not names or is_name_ok(x) or is_source_ok(x)
-
-        filter_fun = (
-            lambda x: filter_tags_engines_fun(x)
-            and filter_names_fun(x)
-            and is_disabled_needed(x)
-            and is_id_type_ok(x)
-        )
-
-        filtered_list = [s for s in self.sites if filter_fun(s)]
-
-        sorted_list = sorted(
-            filtered_list, key=lambda x: x.alexa_rank, reverse=reverse
-        )[:top]
-        return {site.name: site for site in sorted_list}
+        selected = [
+            self._sites[position]
+            for position in sorted(candidates, key=index.rank_of(reverse).__getitem__)
+        ]
+        selected = [site for site in selected if show_disabled or not site.disabled]
+        return {site.name: site for site in selected[:top]}
 
     @property
     def engines(self):
@@ -379,15 +549,33 @@ class MaigretDatabase:
 
     @property
     def engines_dict(self):
-        return {engine.name: engine for engine in self._engines}
+        if self._engines_dict is None:
+            self._engines_dict = {engine.name: engine for engine in self._engines}
+        return self._engines_dict
+
+    def _name_positions(self) -> Dict[str, int]:
+        if self._positions is None:
+            self._positions = {}
+            for position, site in enumerate(self._sites):
+                self._positions.setdefault(site.name, position)
+        return self._positions
 
     def update_site(self, site: MaigretSite) -> "MaigretDatabase":
-        for s in self._sites:
-            if s.name == site.name:
-                s = site
-                return self
+        """
+        Add a site, or replace the site of the same name.
 
-        self._sites.append(site)
+        Changes to the tags, engine, protocol, type, name, source or rank of
+        a site already in the database must also be passed here, so the
+        indexes of ranked_sites_dict() are built again.
+        """
+        positions = self._name_positions()
+        if site.name in positions:
+            self._sites[positions[site.name]] = site
+        else:
+            positions[site.name] = len(self._sites)
+            self._sites.append(site)
+
+        self._index = None
         return self
 
     def save_to_file(self, filename: str) -> "MaigretDatabase":
@@ -417,6 +605,7 @@ class MaigretDatabase:
 
         for engine_name in engines_data:
             self._engines.append(MaigretEngine(engine_name, engines_data[engine_name]))
+        self._engines_dict = None
 
         for site_name in site_data:
             try:
@@ -433,6 +622,7 @@ class MaigretDatabase:
                     f"Missing attribute {str(error)}."
                 )
 
+        self._sites_changed()
         return self
 
     def load_from_str(self, db_str: "str") -> "MaigretDatabase":
@@ -446,11 +636,13 @@ class MaigretDatabase:
 
         return self.load_from_json(data)
 
-    def load_from_path(self, path: str) -> "MaigretDatabase":
+    def load_from_path(
+        self, path: str, snapshot_path: Optional[str] = None
+    ) -> "MaigretDatabase":
         if '://' in path:
             return self.load_from_http(path)
         else:
-            return self.load_from_file(path)
+            return self.load_from_file(path, snapshot_path)
 
     def load_from_http(self, url: str) -> "MaigretDatabase":
         is_url_valid = url.startswith("http://") or url.startswith("https://")
@@ -483,22 +675,111 @@ class MaigretDatabase:
 
         return self.load_from_json(data)
 
-    def load_from_file(self, filename: "str") -> "MaigretDatabase":
+    def load_from_file(
+        self, filename: "str", snapshot_path: Optional[str] = None
+    ) -> "MaigretDatabase":
+        """
+        Load sites from a JSON database file.
+
+        With snapshot_path, a directory, the loaded database is also kept there
+        as a snapshot, which later loads of the same unchanged file read instead
+        of parsing and preparing every site again.
+        """
         try:
-            with open(filename, "r", encoding="utf-8") as file:
-                try:
-                    data = json.load(file)
-                except Exception as error:
-                    raise ValueError(
-                        f"Problem parsing json contents from "
-                        f"file '{filename}':  {str(error)}."
-                    )
+            with open(filename, "rb") as file:
+                content = file.read()
         except FileNotFoundError as error:
             raise FileNotFoundError(
                 f"Problem while attempting to access " f"data file '{filename}'."
             ) from error
 
-        return self.load_from_json(data)
+        snapshot_file = None
+        # a snapshot only replaces loading into an empty database
+        if snapshot_path and not (self._sites or self._engines or self._tags):
+            name = hashlib.sha256(os.path.abspath(filename).encode()).hexdigest()
+            snapshot_file = os.path.join(
+                os.path.expanduser(snapshot_path), f"{name[:16]}.pickle"
+            )
+            key = f"{SNAPSHOT_FORMAT}:{hashlib.sha256(content).hexdigest()}"
+            if self.load_snapshot(snapshot_file, key):
+                return self
+
+        try:
+            data = json.loads(content)
+        except Exception as error:
+            raise ValueError(
+                f"Problem parsing json contents from "
+                f"file '{filename}':  {str(error)}."
+            )
+
+        self.load_from_json(data)
+        if snapshot_file:
+            self.save_snapshot(snapshot_file, key)
+
+        return self
+
+    def save_snapshot(self, filename: str, key: str) -> bool:
+        """
+        Save the database as plain data: site attributes as loaded, with the
+        engine of a site kept by name. The compiled detectors of sites are
+        left out, they are compiled on first use.
+        """
+        sites = []
+        for site in self._sites:
+            state = site.__getstate__()
+            if state.get("engine_obj"):
+                state["engine_obj"] = state["engine_obj"].name
+            sites.append(state)
+
+        snapshot = {
+            "key": key,
+            "tags": self._tags,
+            "engines": {engine.name: engine.json for engine in self._engines},
+            "sites": sites,
+        }
+
+        try:
+            os.makedirs(os.path.dirname(filename), exist_ok=True)
+            # written aside and moved, so readers never see half a snapshot
+            with open(f"{filename}.{os.getpid()}", "wb") as file:
+                pickle.dump(snapshot, file, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(f"{filename}.{os.getpid()}", filename)
+        except OSError:
+            return False
+
+        return True
+
+    def load_snapshot(self, filename: str, key: str) -> bool:
+        """Load a snapshot saved with the same key; False if there is none."""
+        try:
+            with open(filename, "rb") as file:
+                snapshot = pickle.load(file)
+        except Exception:
+            # missing, unreadable or from another version: it is saved again
+            return False
+
+        if not isinstance(snapshot, dict) or snapshot.get("key") != key:
+            return False
+
+        engines = {
+            name: MaigretEngine(name, data)
+            for name, data in snapshot["engines"].items()
+        }
+        sites = []
+        for state in snapshot["sites"]:
+            site = MaigretSite.__new__(MaigretSite)
+            if state.get("engine_obj"):
+                state["engine_obj"] = engines[state["engine_obj"]]
+            site.__dict__ = state
+            sites.append(site)
+
+        self._tags += snapshot["tags"]
+        self._engines += engines.values()
+        self._sites += sites
+        self._engines_dict = None
+        self._sites_changed()
+
+        return True
 
     def get_scan_stats(self, sites_dict):
         sites = sites_dict or self.sites_dict
@@ -512,8 +793,9 @@ class MaigretDatabase:
 
     def extract_ids_from_url(self, url: str) -> dict:
         results = {}
-        for s in self._sites:
-            result = s.extract_id_from_url(url)
+        # only sites a profile URL of which the link can be, in database order
+        for position in sorted(self.index.url_candidates(url)):
+            result = self._sites[position].extract_id_from_url(url)
             if not result:
                 continue
             _id, _type = result
@@ -382,6 +382,7 @@ class Submitter:
 
                 if new_value:
                     setattr(site, field, new_value)
+                    site.update_detectors()
                     print(f"Updated {field} to: {new_value}")
 
         self.logger.info(site.json)
@@ -4,7 +4,7 @@ import difflib
 import re
 import random
 import string
-from typing import Any
+from typing import Any, List, Tuple
 
 
 DEFAULT_USER_AGENTS = [
@@ -45,7 +45,10 @@ def enrich_link_str(link: str) -> str:
 class URLMatcher:
     _HTTP_URL_RE_STR = "^https?://(www.|m.)?(.+)$"
     HTTP_URL_RE = re.compile(_HTTP_URL_RE_STR)
+    HTTP_SCHEME_RE = re.compile("^https?://", re.IGNORECASE)
     UNSAFE_SYMBOLS = ".?"
+    # characters that keep a host in a URL template from being matched literally
+    HOST_SPECIAL = "\\^$*+?{}[]|()"
 
     @classmethod
     def extract_main_part(self, url: str) -> str:
@@ -55,8 +58,54 @@ class URLMatcher:
 
         return ""
 
+    @classmethod
+    def profile_url_host(self, url: str) -> Tuple[str, str]:
+        """
+        What the profile URLs of a URL template can be told apart by:
+        ("host", host) when the host is fixed, ("suffix", ".example.com") for
+        {username}.example.com, and ("any", "") otherwise. The host is what
+        the profile URL regexp expects after the optional "www."/"m." prefix.
+        """
+        host = self.extract_main_part(url).split("/")[0]
+        if host.startswith("{username}"):
+            kind, host = "suffix", host[len("{username}") :]
+        else:
+            kind = "host"
+
+        if not host or not host.isascii() or any(c in host for c in self.HOST_SPECIAL):
+            return "any", ""
+
+        return kind, host.lower()
+
+    @classmethod
+    def link_host_parts(self, link: str) -> List[str]:
+        """
+        What a profile URL regexp may match in a link after the scheme, host
+        first, lowercased: one for every way the regexp can take the
+        optional "www."/"m." prefix.
+        """
+        match = self.HTTP_SCHEME_RE.match(link)
+        if not match:
+            return []
+
+        rest = link[match.end() :]
+        starts = [0]
+        # "." of the prefix is the regexp's any character
+        if rest[:3].lower() == "www" and rest[3:4] not in ("", "\n"):
+            starts.append(4)
+        if rest[:1].lower() == "m" and rest[1:2] not in ("", "\n"):
+            starts.append(2)
+
+        return [rest[start:].lower() for start in starts]
+
     @classmethod
     def make_profile_url_regexp(self, url: str, username_regexp: str = ""):
+        return re.compile(
+            self.make_profile_url_regexp_str(url, username_regexp), re.IGNORECASE
+        )
+
+    @classmethod
+    def make_profile_url_regexp_str(self, url: str, username_regexp: str = "") -> str:
         url_main_part = self.extract_main_part(url)
         for c in self.UNSAFE_SYMBOLS:
             url_main_part = url_main_part.replace(c, f"\\{c}")
@@ -65,9 +114,7 @@ class URLMatcher:
         url_regexp = url_main_part.replace(
             "{username}", f"({prepared_username_regexp})"
         )
-        regexp_str = self._HTTP_URL_RE_STR.replace("(.+)", url_regexp)
-
-        return re.compile(regexp_str, re.IGNORECASE)
+        return self._HTTP_URL_RE_STR.replace("(.+)", url_regexp)
 
 
 def ascii_data_display(data: str) -> Any:
@@ -28,6 +28,7 @@ job_results = {}
 
 # Configuration
 app.config["MAIGRET_DB_FILE"] = os.path.join('maigret', 'resources', 'data.json')
+app.config["MAIGRET_DB_SNAPSHOT_PATH"] = os.path.expanduser('~/.maigret/snapshots')
 app.config["COOKIES_FILE"] = "cookies.txt"
 app.config["UPLOAD_FOLDER"] = 'uploads'
 app.config["REPORTS_FOLDER"] = os.path.abspath('/tmp/maigret_reports')
@@ -42,7 +43,9 @@ def setup_logger(log_level, name):
 async def maigret_search(username, options):
     logger = setup_logger(logging.WARNING, 'maigret')
     try:
-        db = MaigretDatabase().load_from_path(app.config["MAIGRET_DB_FILE"])
+        db = MaigretDatabase().load_from_path(
+            app.config["MAIGRET_DB_FILE"], app.config["MAIGRET_DB_SNAPSHOT_PATH"]
+        )
 
         top_sites = int(options.get('top_sites') or 500)
         if options.get('all_sites'):
@@ -114,7 +117,9 @@ def process_search_task(usernames, options, timestamp):
         maigret.report.save_graph_report(
             graph_path,
             general_results,
-            MaigretDatabase().load_from_path(app.config["MAIGRET_DB_FILE"]),
+            MaigretDatabase().load_from_path(
+                app.config["MAIGRET_DB_FILE"], app.config["MAIGRET_DB_SNAPSHOT_PATH"]
+            ),
         )
 
         individual_reports = []
@@ -192,7 +197,9 @@ def process_search_task(usernames, options, timestamp):
 @app.route('/')
 def index():
     # load site data for autocomplete
-    db = MaigretDatabase().load_from_path(app.config["MAIGRET_DB_FILE"])
+    db = MaigretDatabase().load_from_path(
+        app.config["MAIGRET_DB_FILE"], app.config["MAIGRET_DB_SNAPSHOT_PATH"]
+    )
     site_options = []
 
     for site in db.sites:
@@ -1,7 +1,16 @@
+import asyncio
+import threading
+
 from mock import Mock
 import pytest
+from werkzeug import Response
 
 from maigret import search
+from maigret.checking import SimpleAiohttpChecker, is_throttled, site_concurrency_keys
+from maigret.matching import BodyMatcher
+from maigret.errors import CheckError
+from maigret.result import MaigretCheckResult, MaigretCheckStatus
+from maigret.sites import MaigretSite
 
 
 def site_result_except(server, username, **kwargs):
@@ -67,3 +76,200 @@ async def test_checking_by_message_negative(httpserver, local_test_db):
 
     result = await search('unclaimed', site_dict=sites_dict, logger=Mock())
     assert result['Message']['status'].is_found() is True
+
+
+class RecordingChecker:
+    def __init__(self, responses):
+        self.responses = responses
+        self.urls = []
+        self.closed = False
+
+    def prepare(
+        self,
+        url,
+        headers=None,
+        allow_redirects=True,
+        timeout=0,
+        method='get',
+        matcher=None,
+    ):
+        self.url = url
+
+    async def check(self):
+        self.urls.append(self.url)
+        return self.responses[self.url], 200, None
+
+    async def close(self):
+        self.closed = True
+
+
+@pytest.mark.asyncio
+async def test_checking_with_custom_checker(local_test_db):
+    sites_dict = local_test_db.sites_dict
+    checker = RecordingChecker(
+        {'http://localhost:8989/url?id=claimed': 'user profile'}
+    )
+
+    result = await search(
+        'claimed', site_dict=sites_dict, logger=Mock(), checker=checker
+    )
+
+    assert result['Message']['status'].is_found() is True
+    assert result['StatusCode']['status'].is_found() is True
+    assert checker.urls == ['http://localhost:8989/url?id=claimed'] * 2
+    # the caller owns the checker and may keep using it
+    assert checker.closed is False
+
+
+@pytest.mark.slow
+@pytest.mark.asyncio
+async def test_checking_with_pooled_checker(httpserver, local_test_db):
+    sites_dict = local_test_db.sites_dict
+    checker = SimpleAiohttpChecker(logger=Mock())
+
+    site_result_except(httpserver, 'claimed', status=200)
+    site_result_except(httpserver, 'unclaimed', status=404)
+
+    result = await search(
+        'claimed', site_dict=sites_dict, logger=Mock(), checker=checker
+    )
+    assert result['StatusCode']['status'].is_found() is True
+    session = checker._session
+
+    result = await search(
+        'unclaimed', site_dict=sites_dict, logger=Mock(), checker=checker
+    )
+    assert result['StatusCode']['status'].is_found() is False
+    # both searches went through the same session
+    assert checker._session is session
+    assert not session.closed
+
+    await checker.close()
+    assert session.closed
+
+
+def test_site_concurrency_keys():
+    site = MaigretSite(
+        'Forum',
+        {
+            'urlMain': 'https://WWW.Forum.example/',
+            'url': '{urlMain}{urlSubpath}/members/?username={username}',
+            'engine': 'vBulletin',
+        },
+    )
+    assert site_concurrency_keys((None, [site], {})) == (('host', 'forum.example'),)
+
+    site = MaigretSite(
+        'Probed',
+        {
+            'urlMain': 'https://probed.example',
+            'url': '{urlMain}/{username}',
+            'urlProbe': 'https://api.probed.example/users/{username}',
+        },
+    )
+    assert site_concurrency_keys((None, [site], {})) == (('host', 'api.probed.example'),)
+
+
+def test_site_concurrency_keys_without_url_main():
+    site = MaigretSite('NoMain', {'url': 'https://www.nomain.example/u/{username}'})
+    assert site_concurrency_keys((None, [site], {})) == (('host', 'nomain.example'),)
+
+    site = MaigretSite('NoUrls', {})
+    other = MaigretSite('OtherNoUrls', {})
+    assert site_concurrency_keys((None, [site], {})) == (('site', 'NoUrls'),)
+    assert site_concurrency_keys((None, [site], {})) != site_concurrency_keys(
+        (None, [other], {})
+    )
+
+
+def test_is_throttled():
+    def result(status=None, error=None, http_status=200):
+        check = MaigretCheckResult('user', 'site', '', status, error=error) if status else None
+        return 'site', {'status': check, 'http_status': http_status}
+
+    assert is_throttled(result(MaigretCheckStatus.CLAIMED)) is False
+    assert is_throttled(result(MaigretCheckStatus.AVAILABLE, http_status=429)) is True
+    assert is_throttled(result(MaigretCheckStatus.UNKNOWN, CheckError('Captcha'))) is True
+    assert is_throttled(result(MaigretCheckStatus.UNKNOWN, CheckError('Request timeout'))) is None
+    assert is_throttled(result()) is None
+
+
+@pytest.mark.asyncio
+async def test_checker_stops_reading_once_decided(httpserver):
+    padding = 'x' * 1024 * 1024
+    httpserver.expect_request('/url').respond_with_data('<p>No such user</p>' + padding)
+    site = MaigretSite('Message', {'checkType': 'message', 'absenceStrs': ['No such user']})
+
+    checker = SimpleAiohttpChecker()
+    checker.prepare(url=httpserver.url_for('/url'), matcher=BodyMatcher(site))
+    text, status, error = await checker.check()
+    await checker.close()
+
+    assert status == 200 and error is None
+    assert text.startswith('<p>No such user</p>')
+    assert len(text) < len(padding)
+
+
+@pytest.mark.asyncio
+async def test_checker_body_size_limit(httpserver):
+    httpserver.expect_request('/url').respond_with_data('y' * 100000)
+    site = MaigretSite('Big', {'checkType': 'status_code', 'maxBytes': 1000})
+
+    checker = SimpleAiohttpChecker(max_bytes=50000)
+    checker.prepare(url=httpserver.url_for('/url'))
+    text, _, _ = await checker.check()
+    assert text == 'y' * 50000
+
+    # a site limit overrides the checker one
+    checker.prepare(url=httpserver.url_for('/url'), matcher=BodyMatcher(site))
+    text, _, _ = await checker.check()
+    assert text == 'y' * 1000
+    await checker.close()
+
+
+@pytest.mark.asyncio
+async def test_checker_does_not_keep_cookies(httpserver):
+    httpserver.expect_request('/set').respond_with_data(
+        'set', headers={'Set-Cookie': 'sid=1; Path=/'}
+    )
+    httpserver.expect_request('/echo').respond_with_handler(
+        lambda request: Response(request.headers.get('Cookie', 'no cookies'))
+    )
+
+    checker = SimpleAiohttpChecker()
+    checker.prepare(url=httpserver.url_for('/set'))
+    await checker.check()
+    checker.prepare(url=httpserver.url_for('/echo'))
+    text, _, _ = await checker.check()
+    assert text == 'no cookies'
+    await checker.close()
+
+
+def test_checker_closes_session_of_another_loop(httpserver):
+    httpserver.expect_request('/url').respond_with_data('ok')
+    checker = SimpleAiohttpChecker()
+
+    async def check():
+        checker.prepare(url=httpserver.url_for('/url'))
+        return await checker.check()
+
+    # a loop that is gone
+    asyncio.run(check())
+    session = checker._session
+    asyncio.run(check())
+    assert session.closed
+
+    # a loop still running in another thread
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever)
+    thread.start()
+    try:
+        asyncio.run_coroutine_threadsafe(check(), loop).result(5)
+        session = checker._session
+        asyncio.run(check())
+        asyncio.run_coroutine_threadsafe(asyncio.sleep(0.1), loop).result(5)
+        assert session.closed
+    finally:
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.close()
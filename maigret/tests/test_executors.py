@@ -2,6 +2,7 @@
 
 import pytest
 import asyncio
+import time
 import logging
 from maigret.executors import (
     AsyncioSimpleExecutor,
@@ -9,6 +10,8 @@ from maigret.executors import (
     AsyncioProgressbarSemaphoreExecutor,
     AsyncioProgressbarQueueExecutor,
     AsyncioQueueGeneratorExecutor,
+    AsyncioAdaptiveQueueGeneratorExecutor,
+    AIMDLimiter,
 )
 
 logger = logging.getLogger(__name__)
@@ -109,3 +112,107 @@ async def test_asyncio_queue_generator_executor():
     assert results == [0, 3, 6, 9, 1, 4, 7, 2, 5, 8]
     assert executor.execution_time > 0.2
     assert executor.execution_time < 0.3
+
+
+@pytest.mark.asyncio
+async def test_asyncio_queue_generator_executor_cancel():
+    started = []
+
+    async def slow(n):
+        started.append(n)
+        await asyncio.sleep(10)
+        return n
+
+    tasks = [(slow, [n], {}) for n in range(10)]
+    executor = AsyncioQueueGeneratorExecutor(logger=logger, in_parallel=2)
+
+    async def consume():
+        return [result async for result in executor.run(tasks)]
+
+    consumer = asyncio.create_task(consume())
+    await asyncio.sleep(0.1)
+    consumer.cancel()
+    # the workers are cancelled too instead of draining the queue
+    await asyncio.wait_for(asyncio.gather(consumer, return_exceptions=True), 1)
+    assert started == [0, 1]
+
+
+@pytest.mark.asyncio
+async def test_asyncio_queue_generator_executor_deadline():
+    async def check(n):
+        await asyncio.sleep(0.2)
+        return n
+
+    tasks = [(check, [n], {}) for n in range(10)]
+    # two rounds of tasks can start in time to finish before the deadline
+    executor = AsyncioQueueGeneratorExecutor(
+        logger=logger,
+        in_parallel=2,
+        timeout=0.3,
+        deadline=time.monotonic() + 0.65,
+    )
+    results = [result async for result in executor.run(tasks)]
+    assert sorted(results) == [0, 1, 2, 3]
+    assert executor.skipped == 6
+
+
+def test_aimd_limiter():
+    limiter = AIMDLimiter(initial=2)
+    key = ('host', 'example.com')
+
+    limiter.start([key])
+    assert limiter.saturated([key]) is None
+    limiter.start([key])
+    assert limiter.saturated([key]) == key
+
+    # slow start: one more per success
+    limiter.finish([key], throttled=False)
+    assert limiter.window(key) == 3
+    # a throttled response halves the window
+    limiter.finish([key], throttled=True)
+    assert limiter.window(key) == 1.5
+    assert limiter.throttled == 1
+    # then it grows by 1/window per success
+    limiter.start([key])
+    limiter.finish([key], throttled=False)
+    assert limiter.window(key) == 1.5 + 1 / 1.5
+    # outcomes saying nothing about load leave it alone
+    limiter.start([key])
+    limiter.finish([key], throttled=None)
+    assert limiter.window(key) == 1.5 + 1 / 1.5
+    assert limiter.running == {}
+
+
+@pytest.mark.asyncio
+async def test_asyncio_adaptive_queue_generator_executor():
+    running = {'slow': 0, 'fast': 0}
+    most = {'slow': 0, 'fast': 0}
+    finished = []
+
+    async def check(host, n):
+        running[host] += 1
+        most[host] = max(most[host], running[host])
+        await asyncio.sleep(0.05)
+        running[host] -= 1
+        finished.append(host)
+        # the slow host answers every request with a rate limit
+        return host, n
+
+    tasks = [(check, ['slow', n], {}) for n in range(6)]
+    tasks += [(check, ['fast', n], {}) for n in range(6)]
+    executor = AsyncioAdaptiveQueueGeneratorExecutor(
+        logger=logger,
+        in_parallel=6,
+        key=lambda task: [task[1][0]],
+        feedback=lambda result: result[0] == 'slow',
+        limiter=AIMDLimiter(initial=2),
+    )
+    results = [result async for result in executor.run(tasks)]
+
+    assert sorted(results) == sorted((task[1][0], task[1][1]) for task in tasks)
+    assert most['slow'] == 2
+    assert executor.limiter.window('slow') == 1
+    assert executor.limiter.window('fast') > 2
+    # the throttled host's queue did not hold up the other one
+    assert finished.index('fast') < finished.index('slow') + 2
+    assert finished[-1] == 'slow'
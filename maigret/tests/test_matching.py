@@ -0,0 +1,107 @@
+"""Maigret body matching test functions"""
+
+from maigret import errors
+from maigret.matching import BodyMatcher
+from maigret.sites import MaigretDatabase, MaigretSite
+
+
+def make_site(**data):
+    return MaigretSite('Test', data)
+
+
+def test_site_markers():
+    db = MaigretDatabase().load_from_json(
+        {
+            'engines': {
+                'Forum': {
+                    'site': {
+                        'errors': {'Too many requests': 'Rate limited'},
+                        'absenceStrs': ['No such member'],
+                    }
+                }
+            },
+            'sites': {
+                'Board': {
+                    'engine': 'Forum',
+                    'url': 'https://board.example/{username}',
+                    'urlMain': 'https://board.example',
+                    'checkType': 'message',
+                    'presenseStrs': ['Member profile', 'html'],
+                    'absenceStrs': ['html'],
+                }
+            },
+        }
+    )
+    markers = db.sites_dict['Board'].markers
+
+    assert markers.site_errors == {'Too many requests': 'Rate limited'}
+    assert markers.absence == ['html', 'No such member']
+    assert set(errors.COMMON_ERRORS) < set(markers.strings)
+    # every distinct string is looked for once
+    assert len(markers.strings) == len(set(markers.strings))
+    assert markers.find('<html>Too many requests</html>') == {'html', 'Too many requests'}
+    assert markers.find('<html>', known={'html'}) == set()
+
+
+def test_site_markers_follow_updates():
+    site = make_site(checkType='message', absenceStrs=['Not found'])
+    assert site.markers.find('Gone') == set()
+
+    site.update({'absence_strs': ['Gone']})
+    assert site.markers.find('Gone') == {'Gone'}
+    assert 'markers' not in site.json
+
+
+def test_matcher_message_absence():
+    site = make_site(
+        checkType='message', absenceStrs=['Not found'], presenseStrs=['Profile']
+    )
+
+    assert BodyMatcher(site).feed('<h1>Not found</h1>', 404) is True
+    assert BodyMatcher(site).feed('<h1>Not found</h1>', 200) is True
+    # a presence marker alone decides nothing: absence may follow
+    matcher = BodyMatcher(site)
+    assert matcher.feed('<h1>Profile</h1>', 200) is False
+    assert matcher.found == {'Profile'}
+
+
+def test_matcher_errors():
+    site = make_site(checkType='status_code', errors={'Rate limited': 'Too many requests'})
+
+    assert BodyMatcher(site).feed('Rate limited, try again', 200) is True
+    assert BodyMatcher(site).feed('Incapsula incident ID', 200) is True
+    assert BodyMatcher(site).feed('<html>a profile</html>', 200) is False
+
+
+def test_matcher_presence_without_parsing():
+    site = make_site(checkType='message', presenseStrs=['Profile'])
+
+    assert BodyMatcher(site).feed('<h1>Profile</h1>', 200) is False
+    assert BodyMatcher(site, parsing=False).feed('<h1>Profile</h1>', 200) is True
+    assert BodyMatcher(site, parsing=False).feed('<h1>Profile</h1>', 500) is False
+
+    site = make_site(checkType='response_url', presenseStrs=['Profile'])
+    assert BodyMatcher(site, parsing=False).feed('<h1>Profile</h1>', 200) is True
+
+
+def test_matcher_with_activation():
+    site = make_site(
+        checkType='message',
+        absenceStrs=['Not found'],
+        activation={'marks': ['Login'], 'method': 'twitter'},
+    )
+
+    assert BodyMatcher(site).feed('Not found', 200) is False
+
+
+def test_matcher_chunks():
+    site = make_site(checkType='message', absenceStrs=['No such user'])
+    matcher = BodyMatcher(site)
+    text = '<p>No such user</p>'
+
+    # a marker split between two chunks is found in the second one
+    assert matcher.feed(text[:8], 200) is False
+    assert matcher.feed(text[8:], 200) is True
+    assert matcher.found_in(text) == {'No such user'}
+    # text that was not what the matcher was fed is scanned anew
+    assert matcher.found_in('<p>Hello</p>') == set()
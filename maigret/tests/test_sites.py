@@ -1,4 +1,5 @@
 """Maigret Database test functions"""
+import json
 
 from maigret.sites import MaigretDatabase, MaigretSite
 
@@ -220,3 +221,145 @@ def test_has_site_url_or_name(default_db):
     # false
     assert default_db.has_site("https://aeifgoai3h4g8a3u4g5") == False
     assert default_db.has_site("aeifgoai3h4g8a3u4g5") == False
+
+
+def test_site_detectors_compiled_on_use():
+    db = MaigretDatabase()
+    db.load_from_json(EXAMPLE_DB)
+    amperka = db.sites[0]
+
+    assert 'url_regexp' not in amperka.__dict__
+    assert amperka.detect_username('http://forum.amperka.ru/members/?username=test') == 'test'
+    assert 'url_regexp' in amperka.__dict__
+
+    # updates drop what was compiled before
+    amperka.update({'url_main': 'http://amperka.example'})
+    assert amperka.detect_username('http://amperka.example/members/?username=test') == 'test'
+
+
+def test_load_from_file_snapshot(tmp_path, monkeypatch):
+    db_file = tmp_path / 'data.json'
+    db_file.write_text(json.dumps(EXAMPLE_DB))
+    snapshots = tmp_path / 'snapshots'
+
+    db = MaigretDatabase().load_from_file(str(db_file), snapshot_path=str(snapshots))
+    assert len(list(snapshots.iterdir())) == 1
+
+    def no_parsing(*args, **kwargs):
+        raise AssertionError('the snapshot was not used')
+
+    with monkeypatch.context() as m:
+        m.setattr(MaigretDatabase, 'load_from_json', no_parsing)
+        cached = MaigretDatabase().load_from_file(
+            str(db_file), snapshot_path=str(snapshots)
+        )
+
+    assert cached.sites == db.sites
+    assert [e.name for e in cached.engines] == ['XenForo']
+    amperka = cached.sites[0]
+    assert amperka.engine_obj is cached.engines[0]
+    assert amperka.errors_dict == db.sites[0].errors_dict
+    assert amperka.detect_username('http://forum.amperka.ru/members/?username=test') == 'test'
+    assert amperka.markers.strings == db.sites[0].markers.strings
+
+    # a changed file is parsed again
+    changed = dict(EXAMPLE_DB, sites={'Amperka2': EXAMPLE_DB['sites']['Amperka']})
+    db_file.write_text(json.dumps(changed))
+    db = MaigretDatabase().load_from_file(str(db_file), snapshot_path=str(snapshots))
+    assert [site.name for site in db.sites] == ['Amperka2']
+
+
+def test_load_from_file_broken_snapshot(tmp_path):
+    db_file = tmp_path / 'data.json'
+    db_file.write_text(json.dumps(EXAMPLE_DB))
+    snapshots = tmp_path / 'snapshots'
+    MaigretDatabase().load_from_file(str(db_file), snapshot_path=str(snapshots))
+
+    for snapshot in snapshots.iterdir():
+        snapshot.write_bytes(b'not a pickle')
+
+    db = MaigretDatabase().load_from_file(str(db_file), snapshot_path=str(snapshots))
+    assert [site.name for site in db.sites] == ['Amperka']
+
+
+def test_ranked_sites_dict_indexes():
+    db = MaigretDatabase()
+    db.update_site(MaigretSite('3', {'alexaRank': 1000, 'engine': 'uCoz'}))
+    db.update_site(MaigretSite('1', {'alexaRank': 2, 'tags': ['forum']}))
+    db.update_site(MaigretSite('2', {'alexaRank': 10, 'tags': ['ru', 'forum']}))
+    db.update_site(MaigretSite('4', {'alexaRank': 5, 'protocol': 'tor', 'source': '1'}))
+
+    assert list(db.ranked_sites_dict(tags=['ucoz', 'ru']).keys()) == ['2', '3']
+    assert list(db.ranked_sites_dict(tags=['tor']).keys()) == ['4']
+    assert list(db.ranked_sites_dict(names=['1']).keys()) == ['1', '4']
+    assert list(db.ranked_sites_dict(tags=['forum'], names=['1']).keys()) == ['1']
+    assert list(db.ranked_sites_dict(tags=['forum'], reverse=True).keys()) == ['2', '1']
+
+    # changed sites are indexed again once passed to update_site
+    site = db.sites_dict['3']
+    site.tags = ['forum']
+    db.update_site(site)
+    assert list(db.ranked_sites_dict(tags=['forum']).keys()) == ['1', '2', '3']
+
+    # disabling needs no update
+    db.sites_dict['1'].disabled = True
+    assert list(db.ranked_sites_dict(tags=['forum'], disabled=False).keys()) == ['2', '3']
+
+
+def test_update_site_replaces_site_with_same_name():
+    db = MaigretDatabase()
+    db.load_from_json(EXAMPLE_DB)
+    replacement = MaigretSite('Amperka', {'alexaRank': 1, 'tags': ['forum']})
+
+    db.update_site(replacement)
+
+    assert db.sites == [replacement]
+    assert db.sites_dict['Amperka'] is replacement
+    assert list(db.ranked_sites_dict(tags=['forum']).keys()) == ['Amperka']
+
+
+def test_has_site_by_name():
+    db = MaigretDatabase()
+    db.load_from_json(EXAMPLE_DB)
+    amperka = db.sites[0]
+
+    assert db.has_site(amperka)
+    assert db.has_site('amperka')
+    assert db.has_site('http://forum.amperka.ru')
+    assert not db.has_site(MaigretSite('Amperka', {}))
+    assert not db.has_site('XenForo')
+
+
+def test_extract_ids_from_url():
+    db = MaigretDatabase()
+    db.load_from_json(
+        {
+            'engines': {},
+            'sites': {
+                'Flickr': {'url': 'https://www.flickr.com/photos/{username}'},
+                'FlickrId': {
+                    'url': 'https://www.flickr.com/photos/{username}',
+                    'regexCheck': '^[0-9]+$',
+                    'type': 'flickr_id',
+                },
+                'Tumblr': {'url': 'https://{username}.tumblr.com/'},
+                'Anywhere': {'url': '{username}'},
+            },
+        }
+    )
+
+    assert db.extract_ids_from_url('https://flickr.com/photos/alex') == {
+        'alex': 'username'
+    }
+    # the later site in the database wins, as when every site was tried
+    assert db.extract_ids_from_url('http://www.Flickr.com/photos/123') == {
+        '123': 'flickr_id'
+    }
+    assert db.extract_ids_from_url('https://alex.smith.tumblr.com') == {
+        'alex.smith': 'username'
+    }
+    assert db.extract_ids_from_url('https://tumblr.com') == {}
+    assert db.extract_ids_from_url('https://example.com/alex') == {}
+
+    db.update_site(MaigretSite('Tumblr', {'url': 'https://tumblr.com/{username}'}))
+    assert db.extract_ids_from_url('https://tumblr.com/alex') == {'alex': 'username'}
@@ -103,6 +103,39 @@ def test_url_make_profile_url_regexp():
         )
 
 
+def test_url_profile_url_host():
+    assert URLMatcher.profile_url_host('https://www.Flickr.com/photos/{username}') == (
+        'host',
+        'flickr.com',
+    )
+    assert URLMatcher.profile_url_host('https://my.mail.ru/mail/{username}') == (
+        'host',
+        '.mail.ru',
+    )
+    assert URLMatcher.profile_url_host('https://{username}.tumblr.com/') == (
+        'suffix',
+        '.tumblr.com',
+    )
+    assert URLMatcher.profile_url_host('https://a.com?user={username}') == ('any', '')
+    assert URLMatcher.profile_url_host('{username}') == ('any', '')
+
+
+def test_url_link_host_parts():
+    assert URLMatcher.link_host_parts('HTTPS://Flickr.com/photos/Alex') == [
+        'flickr.com/photos/alex'
+    ]
+    assert URLMatcher.link_host_parts('http://www.flickr.com') == [
+        'www.flickr.com',
+        'flickr.com',
+    ]
+    assert URLMatcher.link_host_parts('https://my.mail.ru/x') == [
+        'my.mail.ru/x',
+        '.mail.ru/x',
+    ]
+    assert URLMatcher.link_host_parts('https://m') == ['m']
+    assert URLMatcher.link_host_parts('flickr.com/photos/alex') == []
+
+
 def test_get_dict_ascii_tree():
     data = {
         'uid': 'dXJpOm5vZGU6VXNlcjoyNjQwMzQxNQ==',
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""Maigret: detection strings matching micro-benchmark
+Times finding the detection strings of every site of the database in a
+page of a given size, the way checks did it before compiled site markers
+(one scan per string of every list, then again over the whole page after
+streaming), the way they do it now, and in a single pass with one regex
+alternation of a site's strings.
+"""
+import os
+import random
+import re
+import timeit
+from argparse import ArgumentParser, RawDescriptionHelpFormatter
+
+from maigret import errors
+from maigret.matching import BodyMatcher
+from maigret.sites import MaigretDatabase
+
+CHUNK_SIZE = 16 * 1024
+
+
+def make_page(size):
+    random.seed(0)
+    words = ['<div class="item">', '</div>', '<a href="/user/1">', 'profile', 'comment', '\n']
+    parts, length = [], 0
+    while length < size:
+        word = random.choice(words)
+        parts.append(word)
+        length += len(word)
+    return ''.join(parts)[:size]
+
+
+def legacy_detection(site, text):
+    """What process_site_result() scanned for, list by list."""
+    for flag in site.errors_dict:
+        if flag in text:
+            break
+    errors.detect(text)
+    any([s for s in site.activation.get("marks", []) if s in text])
+    for flag in site.presense_strs:
+        if flag in text:
+            break
+    any([(flag in text) for flag in site.absence_strs])
+
+
+def legacy_streamed(site, chunks, text):
+    """Chunks matched for an early stop, then the whole page scanned again."""
+    flags = list(site.errors_dict) + list(errors.COMMON_ERRORS) + site.absence_strs
+    for chunk in chunks:
+        any(flag in chunk for flag in flags)
+    legacy_detection(site, text)
+
+
+def single_pass(site):
+    """A regex alternation of the site's strings, longest first."""
+    strings = sorted(filter(None, site.markers.strings), key=len, reverse=True)
+    return re.compile('|'.join(map(re.escape, strings)))
+
+
+def single_pass_find(pattern, text):
+    """The strings in text, overlapping ones too: each search resumes one character
+    after the last match. Timing only; a string that is a prefix of a longer one
+    found at the same place is not reported."""
+    found, match = set(), pattern.search(text)
+    while match:
+        found.add(match.group())
+        match = pattern.search(text, match.start() + 1)
+    return found
+
+
+def collected_streamed(site, chunks, text):
+    matcher = BodyMatcher(site)
+    for chunk in chunks:
+        matcher.feed(chunk, 200)
+    matcher.found_in(text)
+
+
+if __name__ == '__main__':
+    parser = ArgumentParser(
+        formatter_class=RawDescriptionHelpFormatter, description=__doc__
+    )
+    parser.add_argument("--size", type=int, default=200 * 1024, help="page size in characters")
+    parser.add_argument("--repeat", type=int, default=5, help="runs of every benchmark")
+    args = parser.parse_args()
+
+    db_path = os.path.join(os.path.dirname(__file__), '..', 'maigret', 'resources', 'data.json')
+    sites = MaigretDatabase().load_from_file(db_path).sites
+    text = make_page(args.size)
+    chunks = [text[i : i + CHUNK_SIZE] for i in range(0, len(text), CHUNK_SIZE)]
+    started = timeit.default_timer()
+    patterns = [single_pass(s) for s in sites]
+    compile_time = timeit.default_timer() - started
+
+    benchmarks = {
+        'whole page, one scan per list': lambda: [legacy_detection(s, text) for s in sites],
+        'whole page, collected markers': lambda: [s.markers.find(text) for s in sites],
+        'whole page, one regex alternation': lambda: [single_pass_find(p, text) for p in patterns],
+        'streamed, chunks then page again': lambda: [legacy_streamed(s, chunks, text) for s in sites],
+        'streamed, collected markers': lambda: [collected_streamed(s, chunks, text) for s in sites],
+    }
+
+    strings = sum(len(s.markers.strings) for s in sites)
+    print(f'{len(sites)} sites, {strings / len(sites):.1f} distinct strings per site, page of {len(text)} characters')
+    for name, benchmark in benchmarks.items():
+        best = min(timeit.repeat(benchmark, number=1, repeat=args.repeat))
+        print(f'{name:35} {best / len(sites) * 1e6:8.1f} us per check')
+    print(f'{"compiling the alternations":35} {compile_time / len(sites) * 1e6:8.1f} us per site, at load time')
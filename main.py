@@ -1,16 +1,87 @@
 #!/usr/bin/env python3
+import asyncio
+import io
+import tempfile
 import subprocess
-import json
-import re
 import os
+import sqlite3
 import sys
-from typing import Dict, List
-from fastapi import FastAPI, HTTPException, Query
+from contextlib import AsyncExitStack
+from datetime import datetime
+from typing import Dict, List, Literal, Optional
+from fastapi import FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from starlette.requests import ClientDisconnect
+from pydantic import BaseModel
 import uvicorn
 
+from gateway import admission, engines, metrics, workers
+from gateway.admission import Rejected, client_limits, tool_slots
+from gateway.batch import BatchScan
+from gateway.cli import run_cli_tool
+from gateway.cache import normalize_target, scan_cache
+from gateway.config import EXECUTION_MODE, HISTORY_RETENTION_DAYS, PIVOT_MAX_DEPTH, PIVOT_MAX_TARGETS, PRELOAD_ENGINES
+from gateway.deadline import Deadline
+from gateway.history import ScanHistory, scan_history
+from gateway.jobs import JobQueue
+from gateway.orchestrator import fan_out
+from gateway.pivot import PivotScan
+from gateway.probes import shared_probes
+from gateway.resolver import tool_resolver
+from gateway.singleflight import SingleFlight
+from gateway.streaming import stream_scan
+
 app = FastAPI(title="OSINT Tools API", version="1.0.0")
 
+# Identical scans that arrive while one is already running wait for its result.
+scans_in_flight = SingleFlight()
+
+job_queue = JobQueue()
+
+# Drops history older than OSINT_HISTORY_RETENTION_DAYS at startup and then daily.
+HISTORY_PRUNE_INTERVAL = 86400
+history_pruning: Optional[asyncio.Task] = None
+
+def _cache_ratio():
+    stats = scan_cache.stats
+    lookups = sum(stats.values())
+    return {(): (stats["hit"] + stats["stale"]) / lookups if lookups else 0}
+
+metrics.collected("osint_scans_in_flight", "Coalesced /scan/* executions running.", lambda: {(): scans_in_flight.in_flight()})
+metrics.collected("osint_scans_coalesced_total", "Scan requests served by an execution that was already running.", lambda: {(): scans_in_flight.stats["coalesced"]}, kind="counter")
+metrics.collected("osint_job_queue_depth", "Jobs waiting for a worker.", lambda: {(): job_queue.stats()["queue_depth"]})
+metrics.collected("osint_job_workers", "Job workers by state.", lambda: {(("state", "busy"),): job_queue.stats()["workers"]["busy"], (("state", "total"),): job_queue.workers})
+metrics.collected("osint_job_tool_slots", "Per-tool job concurrency in use and its limit.", lambda: {
+    ((("state", state), ("tool", tool))): usage[state]
+    for tool, usage in job_queue.stats()["tools"].items()
+    for state in ("running", "limit")
+})
+metrics.collected("osint_engine_pool", "In-process engine worker threads and tasks waiting for one.", lambda: {
+    (("state", "threads"),): engines._pool._max_workers,
+    (("state", "started"),): len(engines._pool._threads),
+    (("state", "queued"),): engines._pool._work_queue.qsize(),
+})
+metrics.collected("osint_worker_processes", "Pre-forked engine workers alive and running a scan.", lambda: {
+    (("state", "alive"),): workers.stats()["processes"],
+    (("state", "busy"),): workers.stats()["running"],
+})
+metrics.collected("osint_tool_slots", "Global tool run slots in use by priority class, and the capacity.", lambda: {
+    **{(("state", priority),): used for priority, used in tool_slots.in_use.items()},
+    (("state", "capacity"),): tool_slots.capacity,
+})
+metrics.collected("osint_rejected_requests_total", "Requests answered with 429, by reason.", lambda: {
+    **{(("reason", reason),): count for reason, count in client_limits.rejected.items()},
+    (("reason", "capacity"),): tool_slots.rejected,
+}, kind="counter")
+metrics.collected("osint_site_probes_total", "Site requests the in-process engines asked for, and how many were actually sent.", lambda: {
+    (("result", "requested"),): shared_probes.stats["probes"],
+    (("result", "fetched"),): shared_probes.stats["fetched"],
+}, kind="counter")
+if scan_cache is not None:
+    metrics.collected("osint_cache_lookups_total", "Scan cache lookups by result (hit, stale, miss).", lambda: {(("result", k),): v for k, v in scan_cache.stats.items()}, kind="counter")
+    metrics.collected("osint_cache_hit_ratio", "Share of cache lookups answered from the cache, fresh or stale.", _cache_ratio)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -19,175 +90,96 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-def run_cli_tool(tool: str, args: List[str], timeout: int = 30) -> Dict:
-    """Run CLI tool with multiple fallback methods for Render environment"""
-    
-    # Method 1: Try direct execution with common paths
-    candidates = [
-        f"/opt/render/.local/bin/{tool}",
-        f"/home/render/.local/bin/{tool}",
-        f"/usr/local/bin/{tool}",
-        f"/usr/bin/{tool}",
-        tool  # Try as-is
-    ]
-    
-    for candidate in candidates:
-        try:
-            result = subprocess.run(
-                [candidate] + args,
-                capture_output=True,
-                text=True,
-                timeout=timeout,
-                cwd="/",
-                env={**os.environ, "PATH": "/opt/render/.local/bin:/home/render/.local/bin:/usr/local/bin:/usr/bin:/bin"}
-            )
-            if result.returncode == 0 or result.stdout.strip():
-                return {
-                    "success": result.returncode == 0,
-                    "stdout": result.stdout,
-                    "stderr": result.stderr,
-                    "return_code": result.returncode,
-                    "tool": tool,
-                    "args": args,
-                    "method": f"direct: {candidate}"
-                }
-        except Exception:
-            continue
-    
-    # Method 2: Try pipx run
-    try:
-        result = subprocess.run(
-            ["pipx", "run", tool] + args,
-            capture_output=True,
-            text=True,
-            timeout=timeout,
-            cwd="/",
-            env={**os.environ, "PATH": "/opt/render/.local/bin:/home/render/.local/bin:/usr/local/bin:/usr/bin:/bin"}
-        )
-        return {
-            "success": result.returncode == 0,
-            "stdout": result.stdout,
-            "stderr": result.stderr,
-            "return_code": result.returncode,
-            "tool": tool,
-            "args": args,
-            "method": "pipx run"
-        }
-    except Exception:
+@app.exception_handler(Rejected)
+async def rejected(request: Request, exc: Rejected):
+    return JSONResponse(
+        status_code=429,
+        content={"detail": exc.reason, "retry_after": exc.retry_after},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+def client_key(request: Request) -> str:
+    """Who a request is counted against, see gateway.admission.client_key."""
+    return admission.client_key(
+        request.headers.get("x-api-key"),
+        request.client.host if request.client else None,
+        request.headers.get("x-forwarded-for"),
+    )
+
+@app.exception_handler(ClientDisconnect)
+async def client_disconnected(request: Request, exc: ClientDisconnect):
+    # Nobody reads this; 499 is what proxies log for "client closed request".
+    return Response(status_code=499)
+
+async def wait_for_disconnect(request: Request):
+    while (await request.receive())["type"] != "http.disconnect":
         pass
-    
-    # Method 3: Try python -m for Python tools
-    if tool in ["ghunt", "holehe", "sherlock", "maigret"]:
-        module_map = {
-            "ghunt": "ghunt",
-            "holehe": "holehe",
-            "sherlock": "sherlock",
-            "maigret": "maigret"
-        }
-        
-        for python_cmd in ["python3", "python", "/usr/bin/python3"]:
-            try:
-                result = subprocess.run(
-                    [python_cmd, "-m", module_map[tool]] + args,
-                    capture_output=True,
-                    text=True,
-                    timeout=timeout,
-                    cwd="/",
-                    env={**os.environ, "PATH": "/opt/render/.local/bin:/home/render/.local/bin:/usr/local/bin:/usr/bin:/bin"}
-                )
-                if result.returncode == 0 or result.stdout.strip():
-                    return {
-                        "success": result.returncode == 0,
-                        "stdout": result.stdout,
-                        "stderr": result.stderr,
-                        "return_code": result.returncode,
-                        "tool": tool,
-                        "args": args,
-                        "method": f"python -m: {python_cmd}"
-                    }
-            except Exception:
-                continue
-    
-    # Method 4: Try shell execution with PATH
+
+async def until_disconnect(request: Request, awaitable):
+    """Await awaitable, cancelling it (and the tools under it) if the client goes away first."""
+    task = asyncio.ensure_future(awaitable)
+    watcher = asyncio.create_task(wait_for_disconnect(request))
     try:
-        cmd = f"export PATH='/opt/render/.local/bin:/home/render/.local/bin:/usr/local/bin:/usr/bin:/bin:$PATH' && {tool} {' '.join(args)}"
-        result = subprocess.run(
-            cmd,
-            shell=True,
-            capture_output=True,
-            text=True,
-            timeout=timeout,
-            cwd="/"
-        )
-        return {
-            "success": result.returncode == 0,
-            "stdout": result.stdout,
-            "stderr": result.stderr,
-            "return_code": result.returncode,
-            "tool": tool,
-            "args": args,
-            "method": "shell with PATH"
-        }
-    except Exception as e:
-        pass
-    
-    # All methods failed
-    return {
-        "success": False,
-        "stdout": "",
-        "stderr": f"All execution methods failed for {tool}",
-        "return_code": -1,
-        "tool": tool,
-        "args": args,
-        "method": "none"
-    }
+        done, _ = await asyncio.wait({task, watcher}, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        watcher.cancel()
+        if not task.done():
+            task.cancel()
+    if task not in done:
+        print(f"🔌 Client disconnected from {request.url.path}, scan cancelled")
+        raise ClientDisconnect()
+    return task.result()
+
+@app.on_event("startup")
+async def load_engines():
+    if EXECUTION_MODE == "workers":
+        print("🍴 Starting worker pool...")
+        await asyncio.get_running_loop().run_in_executor(None, workers.start)
+    elif EXECUTION_MODE != "subprocess" and PRELOAD_ENGINES:
+        print(f"🔥 Loading in-process engines (mode: {EXECUTION_MODE})...")
+        print(f"🔥 Engines ready: {await engines.warm_up()}")
+
+@app.on_event("startup")
+async def resolve_tools():
+    # In the background: probing spawns every CLI once and must not hold up startup.
+    if EXECUTION_MODE != "inprocess":
+        asyncio.get_running_loop().run_in_executor(None, tool_resolver.probe_all)
+
+@app.on_event("startup")
+async def purge_scan_cache():
+    if scan_cache is not None:
+        print(f"🗑️ Dropped {scan_cache.purge_expired()} expired cache entries")
+
+@app.on_event("startup")
+async def start_history_pruning():
+    global history_pruning
+    if scan_history is not None and HISTORY_RETENTION_DAYS > 0:
+        history_pruning = asyncio.create_task(prune_history())
 
-def parse_holehe_output(stdout: str) -> Dict:
-    results = []
-    lines = stdout.split('\n')
-    for line in lines:
-        if '[' in line and ']' in line:
-            match = re.search(r'\[([^\]]+)\]\s+(.+)', line)
-            if match:
-                site = match.group(1).strip()
-                status = match.group(2).strip()
-                exists = 'exists' in status.lower() or 'found' in status.lower()
-                results.append({"site": site, "exists": exists, "status": status})
-    return {"accounts": results, "total": len(results)}
-
-def parse_sherlock_output(stdout: str) -> Dict:
-    profiles = []
-    lines = stdout.split('\n')
-    for line in lines:
-        if 'http' in line and '[' in line and ']' in line:
-            match = re.search(r'\[([^\]]+)\]\s+(https?://[^\s]+)', line)
-            if match:
-                site = match.group(1).strip()
-                url = match.group(2).strip()
-                profiles.append({"site": site, "url": url})
-    return {"profiles": profiles, "total": len(profiles)}
-
-def parse_maigret_output(stdout: str) -> Dict:
-    profiles = []
-    lines = stdout.split('\n')
-    for line in lines:
-        if 'http' in line:
-            urls = re.findall(r'https?://[^\s]+', line)
-            for url in urls:
-                profiles.append({"url": url})
-    return {"profiles": profiles, "total": len(profiles)}
-
-def parse_ghunt_output(stdout: str) -> Dict:
-    info = {}
-    lines = stdout.split('\n')
-    for line in lines:
-        if ':' in line:
-            parts = line.split(':', 1)
-            if len(parts) == 2:
-                key = parts[0].strip()
-                value = parts[1].strip()
-                info[key] = value
-    return {"google_info": info}
+async def prune_history():
+    loop = asyncio.get_running_loop()
+    while True:
+        try:
+            removed = await loop.run_in_executor(None, scan_history.prune, days_ago(HISTORY_RETENTION_DAYS))
+            if removed:
+                print(f"🗑️ Dropped {removed} scans older than {HISTORY_RETENTION_DAYS:g} days from the history")
+        except sqlite3.Error as e:
+            print(f"⚠️ Pruning the scan history failed: {e}")
+        await asyncio.sleep(HISTORY_PRUNE_INTERVAL)
+
+@app.on_event("startup")
+async def start_jobs():
+    await job_queue.start()
+
+@app.on_event("shutdown")
+async def stop_jobs():
+    await job_queue.stop()
+    if history_pruning is not None:
+        history_pruning.cancel()
+    workers.stop()
+    await shared_probes.close()
+    for engine in engines.ENGINES.values():
+        await engine.close()
 
 @app.get("/")
 async def root():
@@ -199,7 +191,24 @@ async def test():
 
 @app.get("/health")
 async def health():
-    return {"status": "healthy", "tools": ["ghunt", "holehe", "sherlock", "maigret"]}
+    tools = {}
+    for tool in ["ghunt", "holehe", "sherlock", "maigret"]:
+        engine = engines.get_engine(tool)
+        tools[tool] = {
+            # warm: resident in this process or its workers; cold: every scan starts the CLI
+            "state": "warm" if engine.loaded or workers.loaded.get(tool) else "cold",
+            "engine_load_time": engine.load_time,
+            "engine_error": engine.load_error,
+            "cli": tool_resolver.entries[tool].json(),
+        }
+    health = {"status": "healthy", "execution_mode": EXECUTION_MODE, "tools": tools}
+    if EXECUTION_MODE == "workers":
+        health["workers"] = workers.stats()
+    return health
+
+@app.get("/metrics")
+async def prometheus_metrics():
+    return Response(metrics.render(), media_type=metrics.CONTENT_TYPE)
 
 @app.get("/test-tool")
 async def test_tool(tool: str = Query(...), value: str = Query(...)):
@@ -263,73 +272,81 @@ async def debug_tools():
         "timestamp": "now"
     }
 
+def timestamp() -> str:
+    return datetime.now().astimezone().isoformat(timespec="seconds")
+
+def timed_out(results: Dict) -> List[str]:
+    return [tool for tool, section in results.items() if section.get("status") == "timeout"]
+
+def partial(results: Dict) -> List[str]:
+    """Tools that ran out of budget and returned only the sites they checked."""
+    return [tool for tool, section in results.items() if section.get("partial")]
+
+def full_scan_plan(value: str) -> Dict[str, str]:
+    """Tools to run for a value: holehe and ghunt for emails, sherlock and maigret for the username part."""
+    is_email = '@' in value
+    username = value.split('@')[0] if is_email else value
+    plan = {"holehe": value, "ghunt": value} if is_email else {}
+    plan.update({"sherlock": username, "maigret": username})
+    return plan
+
+async def scan_once(endpoint: str, value: str, plan: Dict[str, str], refresh: bool, budget: Optional[float] = None) -> Dict[str, Dict]:
+    """fan_out, shared by all concurrent requests for the same endpoint, value and options."""
+    deadline = Deadline(budget) if budget else None
+
+    async def run():
+        # Only the execution that actually starts needs tool slots; callers
+        # joining it cost nothing.
+        async with tool_slots.reserve(len(plan)):
+            return await fan_out(plan, refresh=refresh, deadline=deadline)
+
+    key = (endpoint, normalize_target(value), refresh, budget)
+    return await scans_in_flight.run(key, run)
+
 @app.get("/scan/email")
-async def scan_email(value: str = Query(..., description="Email address to scan")):
+async def scan_email(
+    request: Request,
+    value: str = Query(..., description="Email address to scan"),
+    refresh: bool = Query(False, description="Ignore cached results and run the tools again"),
+    budget: Optional[float] = Query(None, gt=0, description="Seconds to answer within; tools return the sites they checked by then"),
+):
     if not value or '@' not in value:
         raise HTTPException(status_code=400, detail="Invalid email address")
     
-    results = {"email": value, "holehe": None, "ghunt": None, "timestamp": None}
-    
-    print(f"🔍 Running holehe on: {value}")
-    holehe_result = run_cli_tool("holehe", [value])
-    print(f"🔧 Holehe result: success={holehe_result['success']}, method={holehe_result.get('method', 'unknown')}")
-    print(f"🔧 Holehe stdout: {holehe_result['stdout'][:200]}...")
-    print(f"🔧 Holehe stderr: {holehe_result['stderr'][:200]}...")
-    if holehe_result["success"]:
-        results["holehe"] = parse_holehe_output(holehe_result["stdout"])
-    else:
-        results["holehe"] = {"error": holehe_result["stderr"]}
-    
-    print(f"🔍 Running ghunt on: {value}")
-    ghunt_result = run_cli_tool("ghunt", ["email", value])
-    print(f"🔧 Ghunt result: success={ghunt_result['success']}, method={ghunt_result.get('method', 'unknown')}")
-    print(f"🔧 Ghunt stdout: {ghunt_result['stdout'][:200]}...")
-    print(f"🔧 Ghunt stderr: {ghunt_result['stderr'][:200]}...")
-    if ghunt_result["success"]:
-        results["ghunt"] = parse_ghunt_output(ghunt_result["stdout"])
-    else:
-        results["ghunt"] = {"error": ghunt_result["stderr"]}
-    
-    results["timestamp"] = subprocess.run(["date", "-Iseconds"], capture_output=True, text=True).stdout.strip()
+    async with client_limits.scan(client_key(request)):
+        sections = await until_disconnect(request, scan_once("email", value, {"holehe": value, "ghunt": value}, refresh, budget))
+    results = {"email": value, **sections, "timed_out": timed_out(sections), "partial": partial(sections), "timestamp": timestamp()}
     return results
 
 @app.get("/scan/username")
-async def scan_username(value: str = Query(..., description="Username to scan")):
+async def scan_username(
+    request: Request,
+    value: str = Query(..., description="Username to scan"),
+    refresh: bool = Query(False, description="Ignore cached results and run the tools again"),
+    budget: Optional[float] = Query(None, gt=0, description="Seconds to answer within; tools return the sites they checked by then"),
+):
     if not value:
         raise HTTPException(status_code=400, detail="Username required")
     
-    results = {"username": value, "sherlock": None, "maigret": None, "timestamp": None}
-    
-    print(f"🔍 Running sherlock on: {value}")
-    sherlock_result = run_cli_tool("sherlock", [value])
-    print(f"🔧 Sherlock result: success={sherlock_result['success']}, method={sherlock_result.get('method', 'unknown')}")
-    print(f"🔧 Sherlock stdout: {sherlock_result['stdout'][:200]}...")
-    print(f"🔧 Sherlock stderr: {sherlock_result['stderr'][:200]}...")
-    if sherlock_result["success"]:
-        results["sherlock"] = parse_sherlock_output(sherlock_result["stdout"])
-    else:
-        results["sherlock"] = {"error": sherlock_result["stderr"]}
-    
-    print(f"🔍 Running maigret on: {value}")
-    maigret_result = run_cli_tool("maigret", [value])
-    print(f"🔧 Maigret result: success={maigret_result['success']}, method={maigret_result.get('method', 'unknown')}")
-    print(f"🔧 Maigret stdout: {maigret_result['stdout'][:200]}...")
-    print(f"🔧 Maigret stderr: {maigret_result['stderr'][:200]}...")
-    if maigret_result["success"]:
-        results["maigret"] = parse_maigret_output(maigret_result["stdout"])
-    else:
-        results["maigret"] = {"error": maigret_result["stderr"]}
-    
-    results["timestamp"] = subprocess.run(["date", "-Iseconds"], capture_output=True, text=True).stdout.strip()
+    async with client_limits.scan(client_key(request)):
+        sections = await until_disconnect(request, scan_once("username", value, {"sherlock": value, "maigret": value}, refresh, budget))
+    results = {"username": value, **sections, "timed_out": timed_out(sections), "partial": partial(sections), "timestamp": timestamp()}
     return results
 
 @app.get("/scan/full")
-async def scan_full(value: str = Query(..., description="Email or username to scan with all tools")):
+async def scan_full(
+    request: Request,
+    value: str = Query(..., description="Email or username to scan with all tools"),
+    refresh: bool = Query(False, description="Ignore cached results and run the tools again"),
+    budget: Optional[float] = Query(None, gt=0, description="Seconds to answer within; tools return the sites they checked by then"),
+):
     if not value:
         raise HTTPException(status_code=400, detail="Value required")
     
     is_email = '@' in value
     username = value.split('@')[0] if is_email else value
+    async with client_limits.scan(client_key(request)):
+        sections = await until_disconnect(request, scan_once("full", value, full_scan_plan(value), refresh, budget))
     
     results = {
         "input": value,
@@ -339,52 +356,174 @@ async def scan_full(value: str = Query(..., description="Email or username to sc
         "ghunt": None,
         "sherlock": None,
         "maigret": None,
-        "timestamp": None
+        "timed_out": timed_out(sections),
+        "partial": partial(sections),
+        "timestamp": timestamp()
     }
+    results.update(sections)
+    return results
+
+@app.get("/scan/stream")
+async def scan_stream(
+    request: Request,
+    value: str = Query(..., description="Email or username to scan, results are streamed as server-sent events"),
+    refresh: bool = Query(False, description="Ignore cached results and run the tools again"),
+    budget: Optional[float] = Query(None, gt=0, description="Seconds to answer within; tools return the sites they checked by then"),
+):
+    if not value:
+        raise HTTPException(status_code=400, detail="Value required")
     
-    if is_email:
-        print(f"🔍 Running holehe on: {value}")
-        holehe_result = run_cli_tool("holehe", [value])
-        print(f"🔧 Holehe result: success={holehe_result['success']}, method={holehe_result.get('method', 'unknown')}")
-        print(f"🔧 Holehe stdout: {holehe_result['stdout'][:200]}...")
-        print(f"🔧 Holehe stderr: {holehe_result['stderr'][:200]}...")
-        if holehe_result["success"]:
-            results["holehe"] = parse_holehe_output(holehe_result["stdout"])
-        else:
-            results["holehe"] = {"error": holehe_result["stderr"]}
-        
-        print(f"🔍 Running ghunt on: {value}")
-        ghunt_result = run_cli_tool("ghunt", ["email", value])
-        print(f"🔧 Ghunt result: success={ghunt_result['success']}, method={ghunt_result.get('method', 'unknown')}")
-        print(f"🔧 Ghunt stdout: {ghunt_result['stdout'][:200]}...")
-        print(f"🔧 Ghunt stderr: {ghunt_result['stderr'][:200]}...")
-        if ghunt_result["success"]:
-            results["ghunt"] = parse_ghunt_output(ghunt_result["stdout"])
-        else:
-            results["ghunt"] = {"error": ghunt_result["stderr"]}
-    
-    print(f"🔍 Running sherlock on: {username}")
-    sherlock_result = run_cli_tool("sherlock", [username])
-    print(f"🔧 Sherlock result: success={sherlock_result['success']}, method={sherlock_result.get('method', 'unknown')}")
-    print(f"🔧 Sherlock stdout: {sherlock_result['stdout'][:200]}...")
-    print(f"🔧 Sherlock stderr: {sherlock_result['stderr'][:200]}...")
-    if sherlock_result["success"]:
-        results["sherlock"] = parse_sherlock_output(sherlock_result["stdout"])
-    else:
-        results["sherlock"] = {"error": sherlock_result["stderr"]}
-    
-    print(f"🔍 Running maigret on: {username}")
-    maigret_result = run_cli_tool("maigret", [username])
-    print(f"🔧 Maigret result: success={maigret_result['success']}, method={maigret_result.get('method', 'unknown')}")
-    print(f"🔧 Maigret stdout: {maigret_result['stdout'][:200]}...")
-    print(f"🔧 Maigret stderr: {maigret_result['stderr'][:200]}...")
-    if maigret_result["success"]:
-        results["maigret"] = parse_maigret_output(maigret_result["stdout"])
-    else:
-        results["maigret"] = {"error": maigret_result["stderr"]}
+    plan = full_scan_plan(value)
+    # Admission is checked before the response starts, so a rejection is still a plain 429.
+    admitted = AsyncExitStack()
+    try:
+        await admitted.enter_async_context(client_limits.scan(client_key(request)))
+        await admitted.enter_async_context(tool_slots.reserve(len(plan)))
+    except Rejected:
+        await admitted.aclose()
+        raise
+
+    deadline = Deadline(budget) if budget else None
+
+    async def events():
+        async with admitted:
+            async for message in stream_scan(plan, refresh=refresh, deadline=deadline):
+                yield message
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@app.post("/scan/batch")
+async def scan_batch(
+    request: Request,
+    refresh: bool = Query(False, description="Ignore cached results and run the tools again"),
+):
+    """One email or username per line in the request body; one NDJSON result line per target."""
+    client_limits.check_rate(client_key(request))
+    # The body is spooled first (to disk past 1 MiB) so reading it never
+    # competes with the response for the connection.
+    body = tempfile.SpooledTemporaryFile(max_size=1 << 20)
+    async for chunk in request.stream():
+        body.write(chunk)
+    body.seek(0)
+    targets = io.TextIOWrapper(body, encoding="utf-8", errors="replace")
+
+    async def results():
+        try:
+            async for line in BatchScan(refresh=refresh).run(targets):
+                yield line
+        finally:
+            targets.close()
+
+    return StreamingResponse(results(), media_type="application/x-ndjson")
+
+@app.get("/scan/pivot")
+async def scan_pivot(
+    request: Request,
+    value: str = Query(..., description="Email or username to start from"),
+    depth: int = Query(1, ge=0, le=PIVOT_MAX_DEPTH, description="How many hops of found identifiers to follow"),
+    max_targets: int = Query(PIVOT_MAX_TARGETS, ge=1, le=PIVOT_MAX_TARGETS, description="Most identifiers to scan"),
+    refresh: bool = Query(False, description="Ignore cached results and run the tools again"),
+):
+    """Scan value, then the identifiers the tools find (emails, usernames, Gaia IDs...); one NDJSON line per identifier."""
+    client_limits.check_rate(client_key(request))
+    pivot = PivotScan(refresh=refresh, max_depth=depth, max_targets=max_targets)
+    return StreamingResponse(pivot.run(value), media_type="application/x-ndjson")
+
+class JobRequest(BaseModel):
+    value: str
+    scan: Literal["full", "email", "username"] = "full"
+    refresh: bool = False
+    deadlines: Optional[Dict[str, float]] = None
+
+def job_plan(request: JobRequest) -> Dict[str, str]:
+    if not request.value:
+        raise HTTPException(status_code=400, detail="Value required")
+    if request.scan == "email":
+        if '@' not in request.value:
+            raise HTTPException(status_code=400, detail="Invalid email address")
+        return {"holehe": request.value, "ghunt": request.value}
+    if request.scan == "username":
+        return {"sherlock": request.value, "maigret": request.value}
+    return full_scan_plan(request.value)
+
+@app.post("/jobs", status_code=202)
+async def create_job(request: JobRequest, http_request: Request):
+    client_limits.check_rate(client_key(http_request))
+    job = job_queue.submit(job_plan(request), refresh=request.refresh, deadlines=request.deadlines)
+    return {**job, "url": f"/jobs/{job['id']}", "stream": f"/jobs/{job['id']}/stream"}
+
+@app.get("/jobs/stats")
+async def job_stats():
+    return job_queue.stats()
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    job = job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@app.get("/jobs/{job_id}/stream")
+async def stream_job(job_id: str):
+    if job_queue.get(job_id) is None:
+        raise HTTPException(status_code=404, detail="Job not found")
     
-    results["timestamp"] = subprocess.run(["date", "-Iseconds"], capture_output=True, text=True).stdout.strip()
-    return results
+    return StreamingResponse(
+        job_queue.events(job_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+def history() -> ScanHistory:
+    if scan_history is None:
+        raise HTTPException(status_code=503, detail="Scan history is disabled")
+    return scan_history
+
+def days_ago(days: float) -> float:
+    return datetime.now().timestamp() - days * 86400
+
+@app.get("/history/sites/{site}")
+def history_site(
+    site: str,
+    outcome: str = Query("claimed", description="claimed, available, unknown, illegal, waf, rate_limited or error"),
+    days: float = Query(30, gt=0, description="Only scans from the last N days"),
+    limit: int = Query(100, ge=1, le=1000),
+):
+    targets = history().targets_on_site(site, outcome, since=days_ago(days), limit=limit)
+    return {"site": site, "outcome": outcome, "days": days, "targets": targets}
+
+@app.get("/history/targets/{value}")
+def history_target(
+    value: str,
+    tool: Optional[str] = Query(None),
+    limit: int = Query(5, ge=1, le=100, description="Most recent scans to return, with their sites"),
+):
+    scans = history().scans(value, tool=tool, limit=limit)
+    for scan in scans:
+        scan["sites"] = history().sites(scan["id"])
+    return {"target": value, "scans": scans}
+
+@app.get("/history/search")
+def history_search(
+    q: str = Query(..., description="Full-text query over extracted profile ids (names, uids, links)"),
+    limit: int = Query(50, ge=1, le=500),
+):
+    try:
+        matches = history().search(q, limit=limit)
+    except sqlite3.OperationalError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid search query: {e}")
+    return {"query": q, "matches": matches}
+
+@app.get("/history/diff")
+def history_diff(
+    value: str = Query(...),
+    days: float = Query(7, gt=0, description="Compare the latest scan with the last one at least N days old"),
+):
+    return {"target": value, "days": days, "tools": history().diff(value, since=days_ago(days))}
 
 if __name__ == "__main__":
     port = int(os.getenv("FASTAPI_PORT", 8000))
@@ -231,6 +231,15 @@ app.use(express.static('public'));
 const FASTAPI_PORT = process.env.FASTAPI_PORT || 8000;
 const FASTAPI_URL = `http://127.0.0.1:${FASTAPI_PORT}`;
 
+// The gateway limits scans per client IP and trusts loopback to say who the
+// client is, so pass the browser's address on instead of every scan counting
+// against 127.0.0.1. Behind another proxy, add its IP to OSINT_TRUSTED_PROXIES.
+function gatewayHeaders(req) {
+    const peer = req.socket?.remoteAddress || 'unknown';
+    const forwarded = req.headers['x-forwarded-for'];
+    return { 'X-Forwarded-For': forwarded ? `${forwarded}, ${peer}` : peer };
+}
+
 // Start FastAPI as a child process
 let fastapiProcess = null;
 
@@ -350,7 +359,7 @@ app.get('/api/scan/email', async (req, res) => {
         const { value } = req.query;
         if (!value) return res.status(400).json({ error: 'Email required' });
 
-        const response = await axios.get(`${FASTAPI_URL}/scan/email?value=${encodeURIComponent(value)}`);
+        const response = await axios.get(`${FASTAPI_URL}/scan/email?value=${encodeURIComponent(value)}`, { headers: gatewayHeaders(req) });
         res.json(response.data);
     } catch (error) {
         console.error('FastAPI proxy error:', error.message);
@@ -375,7 +384,7 @@ app.get('/api/scan/username', async (req, res) => {
         const { value } = req.query;
         if (!value) return res.status(400).json({ error: 'Username required' });
         
-        const response = await axios.get(`${FASTAPI_URL}/scan/username?value=${encodeURIComponent(value)}`);
+        const response = await axios.get(`${FASTAPI_URL}/scan/username?value=${encodeURIComponent(value)}`, { headers: gatewayHeaders(req) });
         res.json(response.data);
     } catch (error) {
         console.error('FastAPI proxy error:', error.message);
@@ -388,7 +397,7 @@ app.get('/api/scan/full', async (req, res) => {
         const { value } = req.query;
         if (!value) return res.status(400).json({ error: 'Value required' });
         
-        const response = await axios.get(`${FASTAPI_URL}/scan/full?value=${encodeURIComponent(value)}`);
+        const response = await axios.get(`${FASTAPI_URL}/scan/full?value=${encodeURIComponent(value)}`, { headers: gatewayHeaders(req) });
         res.json(response.data);
     } catch (error) {
         console.error('FastAPI proxy error:', error.message);
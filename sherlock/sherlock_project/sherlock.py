@@ -22,6 +22,7 @@ import pandas as pd
 import os
 import re
 from argparse import ArgumentParser, RawDescriptionHelpFormatter
+from concurrent.futures import CancelledError
 from json import loads as json_loads
 from time import monotonic
 from typing import Optional
@@ -136,6 +137,9 @@ def get_response(request_future, error_type, social_network):
     except requests.exceptions.RequestException as err:
         error_context = "Unknown Error"
         exception_text = str(err)
+    except CancelledError:
+        # The caller dropped the request before it was sent.
+        error_context = "Request Cancelled"
 
     return response, error_context, exception_text
 
@@ -176,6 +180,7 @@ def sherlock(
     dump_response: bool = False,
     proxy: Optional[str] = None,
     timeout: int = 60,
+    session=None,
 ):
     """Run Sherlock Analysis.
 
@@ -193,6 +198,10 @@ def sherlock(
     proxy                  -- String indicating the proxy URL
     timeout                -- Time in seconds to wait before timing out request.
                               Default is 60 seconds.
+    session                -- Optional session to send all requests through
+                              instead of a new SherlockFuturesSession. Its
+                              get/head/post/put methods must return futures
+                              of requests.Response objects.
 
     Return Value:
     Dictionary containing results from report. Key of dictionary is the name
@@ -210,44 +219,45 @@ def sherlock(
 
     # Notify caller that we are starting the query.
     query_notify.start(username)
-    # Create session based on request methodology
-    if tor or unique_tor:
-        try:
-            from torrequest import TorRequest  # noqa: E402
-        except ImportError:
+    # Create session based on request methodology, unless the caller gave one
+    if session is None:
+        if tor or unique_tor:
+            try:
+                from torrequest import TorRequest  # noqa: E402
+            except ImportError:
+                print("Important!")
+                print("> --tor and --unique-tor are now DEPRECATED, and may be removed in a future release of Sherlock.")
+                print("> If you've installed Sherlock via pip, you can include the optional dependency via `pip install 'sherlock-project[tor]'`.")
+                print("> Other packages should refer to their documentation, or install it separately with `pip install torrequest`.\n")
+                sys.exit(query_notify.finish())
+
             print("Important!")
             print("> --tor and --unique-tor are now DEPRECATED, and may be removed in a future release of Sherlock.")
-            print("> If you've installed Sherlock via pip, you can include the optional dependency via `pip install 'sherlock-project[tor]'`.")
-            print("> Other packages should refer to their documentation, or install it separately with `pip install torrequest`.\n")
-            sys.exit(query_notify.finish())
 
-        print("Important!")
-        print("> --tor and --unique-tor are now DEPRECATED, and may be removed in a future release of Sherlock.")
-
-        # Requests using Tor obfuscation
-        try:
-            underlying_request = TorRequest()
-        except OSError:
-            print("Tor not found in system path. Unable to continue.\n")
-            sys.exit(query_notify.finish())
+            # Requests using Tor obfuscation
+            try:
+                underlying_request = TorRequest()
+            except OSError:
+                print("Tor not found in system path. Unable to continue.\n")
+                sys.exit(query_notify.finish())
 
-        underlying_session = underlying_request.session
-    else:
-        # Normal requests
-        underlying_session = requests.session()
-        underlying_request = requests.Request()
-
-    # Limit number of workers to 20.
-    # This is probably vastly overkill.
-    if len(site_data) >= 20:
-        max_workers = 20
-    else:
-        max_workers = len(site_data)
+            underlying_session = underlying_request.session
+        else:
+            # Normal requests
+            underlying_session = requests.session()
+            underlying_request = requests.Request()
+
+        # Limit number of workers to 20.
+        # This is probably vastly overkill.
+        if len(site_data) >= 20:
+            max_workers = 20
+        else:
+            max_workers = len(site_data)
 
-    # Create multi-threaded session for all requests.
-    session = SherlockFuturesSession(
-        max_workers=max_workers, session=underlying_session
-    )
+        # Create multi-threaded session for all requests.
+        session = SherlockFuturesSession(
+            max_workers=max_workers, session=underlying_session
+        )
 
     # Results from analysis of all sites
     results_total = {}
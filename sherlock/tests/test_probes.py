@@ -103,3 +103,64 @@ def test_username_illegal_regex(sites_info):
     assert pattern.match(invalid_handle) is None
     assert simple_query(sites_info=sites_info, site=site, username=invalid_handle) is QueryStatus.ILLEGAL
 
+
+
+class FakeSession:
+    """Answers every request itself, the way a caller-provided session would."""
+    def __init__(self, status_code: int):
+        self.status_code = status_code
+        self.requests = []
+
+    def get(self, url, **kwargs):
+        from concurrent.futures import Future
+        import requests
+        self.requests.append(url)
+        response = requests.Response()
+        response.status_code = self.status_code
+        response._content = b''
+        future = Future()
+        future.set_result(response)
+        return future
+
+    head = get
+
+
+@pytest.mark.parametrize('status_code,expected', [
+    (200, QueryStatus.CLAIMED),
+    (404, QueryStatus.AVAILABLE),
+])
+def test_caller_session(sites_info, status_code, expected):
+    session = FakeSession(status_code)
+    site_data = {'GitHub': sites_info['GitHub']}
+    results = sherlock(
+        username='ppfeister',
+        site_data=site_data,
+        query_notify=QueryNotify(),
+        session=session,
+    )
+    assert session.requests == ['https://www.github.com/ppfeister']
+    assert results['GitHub']['status'].status is expected
+
+
+class CancellingSession(FakeSession):
+    """Drops every request before sending it, like a caller out of time."""
+    def get(self, url, **kwargs):
+        from concurrent.futures import Future
+        self.requests.append(url)
+        future = Future()
+        future.cancel()
+        return future
+
+    head = get
+
+
+def test_cancelled_request(sites_info):
+    site_data = {'GitHub': sites_info['GitHub']}
+    results = sherlock(
+        username='ppfeister',
+        site_data=site_data,
+        query_notify=QueryNotify(),
+        session=CancellingSession(404),
+    )
+    assert results['GitHub']['status'].status is QueryStatus.UNKNOWN
+    assert results['GitHub']['status'].context == 'Request Cancelled'
@@ -0,0 +1,13 @@
+"""Gateway tests run against throwaway copies of every SQLite file the gateway keeps."""
+import os
+import sys
+import tempfile
+
+# gateway.config reads these once, when the gateway is first imported.
+_data = tempfile.mkdtemp(prefix="osint_gateway_tests_")
+os.environ["OSINT_CACHE_DB"] = os.path.join(_data, "cache.db")
+os.environ["OSINT_JOB_DB"] = os.path.join(_data, "jobs.db")
+os.environ["OSINT_HISTORY_DB"] = os.path.join(_data, "history.db")
+os.environ["OSINT_PRELOAD_ENGINES"] = "0"
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,98 @@
+import asyncio
+
+import pytest
+
+from gateway.admission import BATCH, INTERACTIVE, ClientLimits, Rejected, TokenBucket, ToolSlots, client_key
+
+
+def test_token_bucket():
+    bucket = TokenBucket(rate=1, burst=2)
+    assert bucket.take() == 0
+    assert bucket.take() == 0
+    assert 0 < bucket.take() <= 1
+
+
+@pytest.mark.asyncio
+async def test_tool_slots_reject_interactive_when_full():
+    slots = ToolSlots(capacity=2)
+    async with slots.reserve(2):
+        with pytest.raises(Rejected):
+            async with slots.reserve(1):
+                pass
+    assert slots.rejected == 1
+    assert slots.in_use == {INTERACTIVE: 0, BATCH: 0}
+
+
+@pytest.mark.asyncio
+async def test_tool_slots_batch_waits_within_its_share():
+    slots = ToolSlots(capacity=4, batch_share=0.5)
+    order = []
+
+    async def batch(name):
+        async with slots.hold(1, BATCH):
+            order.append(name)
+            await asyncio.sleep(0.05)
+
+    await asyncio.gather(*(batch(i) for i in range(4)))
+    assert sorted(order) == [0, 1, 2, 3]
+    assert slots.in_use == {INTERACTIVE: 0, BATCH: 0}
+
+    async with slots.hold(2, BATCH):
+        # interactive work still finds the other half
+        async with slots.reserve(2):
+            pass
+
+
+@pytest.mark.asyncio
+async def test_client_limits():
+    limits = ClientLimits(rate_per_minute=60, burst=2, max_scans=1)
+    async with limits.scan("ip:1.2.3.4"):
+        with pytest.raises(Rejected):
+            async with limits.scan("ip:1.2.3.4"):
+                pass
+        async with limits.scan("ip:5.6.7.8"):
+            pass
+    with pytest.raises(Rejected) as rejected:
+        limits.check_rate("ip:1.2.3.4")
+    assert rejected.value.reason == "Rate limit exceeded"
+    assert limits.rejected == {"rate": 1, "concurrency": 1}
+
+
+def test_client_key():
+    keys, proxies = frozenset({"secret"}), frozenset({"10.0.0.1"})
+
+    assert client_key("secret", "1.2.3.4", api_keys=keys) == "key:secret"
+    # unknown keys and forwarded addresses from untrusted peers count for nothing
+    assert client_key("made-up", "1.2.3.4", api_keys=keys) == "ip:1.2.3.4"
+    assert client_key(None, "1.2.3.4", "9.9.9.9", trusted_proxies=proxies) == "ip:1.2.3.4"
+    # behind a trusted proxy, the hop it appended; what the client sent is ignored
+    assert client_key(None, "10.0.0.1", "9.9.9.9, 1.2.3.4", trusted_proxies=proxies) == "ip:1.2.3.4"
+    assert client_key(None, "10.0.0.1", "1.2.3.4, 10.0.0.1", trusted_proxies=proxies) == "ip:1.2.3.4"
+    assert client_key(None, None) == "ip:unknown"
+
+
+def test_browsers_behind_the_bundled_server_get_their_own_bucket():
+    # server.js calls the API over loopback and appends the browser's address
+    assert client_key(None, "127.0.0.1", "198.51.100.1") == "ip:198.51.100.1"
+    assert client_key(None, "::1", "9.9.9.9, 198.51.100.2") == "ip:198.51.100.2"
+
+
+def test_spoofed_headers_do_not_get_a_new_bucket(monkeypatch):
+    from fastapi.testclient import TestClient
+
+    import main
+
+    monkeypatch.setattr(main, "client_limits", ClientLimits(rate_per_minute=1, burst=1))
+    submitted = []
+    monkeypatch.setattr(main.job_queue, "submit", lambda plan, **kwargs: submitted.append(plan) or {"id": "1"})
+    client = TestClient(main.app)
+
+    assert client.post("/jobs", json={"value": "someuser"}).status_code == 202
+    response = client.post(
+        "/jobs",
+        json={"value": "someuser"},
+        headers={"X-API-Key": "made-up", "X-Forwarded-For": "203.0.113.7"},
+    )
+    assert response.status_code == 429
+    assert response.headers["Retry-After"]
+    assert len(submitted) == 1
@@ -0,0 +1,78 @@
+import asyncio
+import json
+
+import pytest
+
+from gateway import batch
+from gateway.batch import BatchScan, iter_targets
+
+
+@pytest.fixture
+def runs(monkeypatch):
+    """Tool runs the batch made; run_tool answers without running anything, and fails for "broken"."""
+    made = []
+
+    async def run_tool(tool, value, deadline, refresh=False):
+        made.append((tool, value))
+        if value == "broken":
+            raise RuntimeError("database is locked")
+        return {"status": "ok", "profiles": [], "total": 0}
+
+    monkeypatch.setattr(batch, "run_tool", run_tool)
+    return made
+
+
+async def collect(scan: BatchScan, lines):
+    return [json.loads(line) async for line in scan.run(lines)]
+
+
+def test_iter_targets():
+    assert list(iter_targets(["  alice \n", "\n", "# comment\n", "bob@example.com"])) == ["alice", "bob@example.com"]
+
+
+@pytest.mark.asyncio
+async def test_batch_dedupes_and_shares_usernames(runs):
+    lines = await collect(BatchScan(concurrency=2), ["alice", "Alice", "alice@example.com"])
+
+    by_index = {line["index"]: line for line in lines if "index" in line}
+    assert by_index[1] == {"index": 1, "input": "Alice", "duplicate_of": 0}
+    assert by_index[2]["type"] == "email"
+    # the email's username part was scanned once for both targets
+    assert sorted(runs) == [
+        ("ghunt", "alice@example.com"),
+        ("holehe", "alice@example.com"),
+        ("maigret", "alice"),
+        ("sherlock", "alice"),
+    ]
+    assert lines[-1]["summary"]["targets"] == 3
+    assert lines[-1]["summary"]["duplicates"] == 1
+
+
+@pytest.mark.asyncio
+async def test_batch_scans_a_username_once_however_far_apart(runs):
+    # one at a time, so the second email starts after the first one's scans are over
+    await collect(BatchScan(concurrency=1), ["alice@example.com", "bob", "alice@example.org"])
+
+    assert runs.count(("sherlock", "alice")) == runs.count(("maigret", "alice")) == 1
+
+
+@pytest.mark.asyncio
+async def test_batch_reports_failed_targets_and_finishes(runs):
+    lines = await asyncio.wait_for(collect(BatchScan(concurrency=1), ["broken", "alice"]), 5)
+
+    assert lines[0] == {"index": 0, "input": "broken", "error": "RuntimeError: database is locked"}
+    assert lines[1]["input"] == "alice"
+    assert lines[-1]["summary"]["errors"] == 1
+    assert lines[-1]["summary"]["scanned"] == 1
+
+
+@pytest.mark.asyncio
+async def test_batch_finishes_when_reading_targets_fails(runs):
+    def targets():
+        yield "alice"
+        raise UnicodeDecodeError("utf-8", b"", 0, 1, "bad body")
+
+    lines = await asyncio.wait_for(collect(BatchScan(concurrency=1), targets()), 5)
+
+    assert any(line.get("error", "").startswith("UnicodeDecodeError") for line in lines)
+    assert "summary" in lines[-1]
@@ -0,0 +1,123 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from gateway import orchestrator
+from gateway.admission import BATCH, ToolSlots
+from gateway.cache import ScanCache
+
+
+def make_cache(tmp_path, **kwargs) -> ScanCache:
+    kwargs.setdefault("ttls", {"sherlock": 60})
+    kwargs.setdefault("stale_ttl", 60)
+    return ScanCache(str(tmp_path / "cache.db"), **kwargs)
+
+
+def test_make_key_normalizes_target():
+    assert ScanCache.make_key("sherlock", " Alice ") == ScanCache.make_key("sherlock", "alice")
+    assert ScanCache.make_key("maigret", "alice", {"id_type": "gaia_id"}) != ScanCache.make_key("maigret", "alice")
+
+
+def test_entries_survive_a_restart(tmp_path):
+    key = ScanCache.make_key("sherlock", "alice")
+    make_cache(tmp_path).put("sherlock", key, {"status": "ok", "total": 1})
+
+    entry = make_cache(tmp_path).get("sherlock", key)
+    assert entry.section == {"status": "ok", "total": 1}
+    assert entry.fresh
+
+
+def test_memory_tier_is_bounded(tmp_path):
+    cache = make_cache(tmp_path, max_entries=2)
+    for name in ("a", "b", "c"):
+        cache.put("sherlock", name, {"name": name})
+    assert list(cache._memory) == ["b", "c"]
+    # evicted from memory, still in SQLite
+    assert cache.get("sherlock", "a").section == {"name": "a"}
+
+
+def test_stale_window(tmp_path):
+    cache = make_cache(tmp_path, ttls={"sherlock": 10}, stale_ttl=10)
+    cache._remember("stale", (time.time() - 15, {}))
+    cache._remember("expired", (time.time() - 25, {}))
+
+    assert not cache.get("sherlock", "stale").fresh
+    assert cache.get("sherlock", "expired") is None
+
+
+@pytest.mark.asyncio
+async def test_refresh_runs_once_per_key(tmp_path):
+    cache = make_cache(tmp_path)
+    release = asyncio.Event()
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await release.wait()
+        return {}
+
+    cache.refresh("k", compute)
+    cache.refresh("k", compute)
+    release.set()
+    await asyncio.gather(*cache._refreshing.values())
+    await asyncio.sleep(0)
+    assert calls == [1]
+    assert not cache._refreshing
+
+
+@pytest.fixture
+def cached_run(tmp_path, monkeypatch):
+    """run_tool over a throwaway cache; tool runs are recorded with the slots they held.
+
+    Cache lookups from the event loop's thread fail, as they would block it on SQLite.
+    """
+    cache = make_cache(tmp_path)
+    slots = ToolSlots(capacity=4, batch_share=0.5)
+    runs = []
+
+    async def run_with_deadline(tool, value, deadline, emit=None, options=None):
+        runs.append(dict(slots.in_use))
+        return {"status": "ok", "profiles": []}
+
+    get, put = cache.get, cache.put
+
+    def off_loop(method):
+        def call(*args):
+            assert threading.current_thread() is not threading.main_thread()
+            return method(*args)
+        return call
+
+    monkeypatch.setattr(cache, "get", off_loop(get))
+    monkeypatch.setattr(cache, "put", off_loop(put))
+    monkeypatch.setattr(orchestrator, "scan_cache", cache)
+    monkeypatch.setattr(orchestrator, "tool_slots", slots)
+    monkeypatch.setattr(orchestrator, "run_with_deadline", run_with_deadline)
+    return cache, runs
+
+
+@pytest.mark.asyncio
+async def test_run_tool_caches_sections(cached_run):
+    cache, runs = cached_run
+
+    first = await orchestrator.run_tool("sherlock", "alice", 10)
+    second = await orchestrator.run_tool("sherlock", "Alice", 10)
+
+    assert first["cache"] == {"state": "miss"}
+    assert second["cache"]["state"] == "hit"
+    assert len(runs) == 1
+
+
+@pytest.mark.asyncio
+async def test_stale_refresh_holds_a_batch_slot(cached_run):
+    cache, runs = cached_run
+    key = cache.make_key("sherlock", "alice")
+    cache._remember(key, (time.time() - 90, {"status": "ok", "profiles": []}))
+
+    section = await orchestrator.run_tool("sherlock", "alice", 10)
+    assert section["cache"]["state"] == "stale"
+    await asyncio.gather(*cache._refreshing.values())
+
+    assert runs == [{"interactive": 0, BATCH: 1}]
+    assert time.time() - cache._memory[key][0] < 5
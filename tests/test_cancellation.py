@@ -0,0 +1,84 @@
+import asyncio
+import threading
+import time
+
+import pytest
+from starlette.requests import ClientDisconnect, Request
+
+from gateway import cli, orchestrator, resolver
+from gateway.cli import run_cli_tool
+from gateway.resolver import ToolResolver
+
+
+def request_that_disconnects(after: float) -> Request:
+    async def receive():
+        await asyncio.sleep(after)
+        return {"type": "http.disconnect"}
+
+    return Request({"type": "http", "method": "GET", "path": "/scan/username", "headers": []}, receive)
+
+
+@pytest.mark.asyncio
+async def test_until_disconnect_cancels_the_scan():
+    import main
+
+    cancelled = asyncio.Event()
+
+    async def scan():
+        try:
+            await asyncio.sleep(30)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    with pytest.raises(ClientDisconnect):
+        await asyncio.wait_for(main.until_disconnect(request_that_disconnects(0.05), scan()), 5)
+    assert cancelled.is_set()
+
+
+@pytest.mark.asyncio
+async def test_until_disconnect_returns_the_result():
+    import main
+
+    async def scan():
+        return {"sherlock": {"status": "ok"}}
+
+    assert await main.until_disconnect(request_that_disconnects(30), scan()) == {"sherlock": {"status": "ok"}}
+
+
+def test_cancelled_cli_run_is_killed(monkeypatch):
+    monkeypatch.setattr(resolver, "candidates", lambda tool: [("direct: /bin/sleep", ["/bin/sleep"])])
+    monkeypatch.setattr(cli, "tool_resolver", ToolResolver(tools=("sherlock",)))
+    cancelled = threading.Event()
+    threading.Timer(0.3, cancelled.set).start()
+
+    started = time.monotonic()
+    result = run_cli_tool("sherlock", ["30"], timeout=30, cancelled=cancelled)
+
+    assert time.monotonic() - started < 5
+    assert not result["success"]
+    assert result["stderr"] == "sherlock was cancelled"
+
+
+@pytest.mark.asyncio
+async def test_cancelled_scan_cancels_its_tools(monkeypatch):
+    cancelled = asyncio.Event()
+
+    async def execute_tool(tool, value, options=None, emit=None, timeout=None):
+        try:
+            await asyncio.sleep(30)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    monkeypatch.setattr(orchestrator, "execute_tool", execute_tool)
+    monkeypatch.setattr(orchestrator, "scan_cache", None)
+    monkeypatch.setattr(orchestrator, "scan_history", None)
+
+    scan = asyncio.create_task(orchestrator.fan_out({"sherlock": "alice"}, {"sherlock": 60}))
+    await asyncio.sleep(0.05)
+    scan.cancel()
+
+    await asyncio.wait_for(cancelled.wait(), 1)
+    with pytest.raises(asyncio.CancelledError):
+        await scan
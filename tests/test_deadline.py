@@ -0,0 +1,88 @@
+import asyncio
+import time
+
+import pytest
+
+from gateway import engines, orchestrator
+from gateway.deadline import Deadline, engine_deadline
+from gateway.engines import MaigretEngine, SherlockEngine
+from gateway.probes import ProbeError
+from test_engines import StubProbes
+
+
+class SlowProbes(StubProbes):
+    """Sites that take `delay` seconds to answer, or time out first."""
+
+    def __init__(self, delay: float):
+        super().__init__()
+        self.delay = delay
+
+    async def _fetch(self, key, method, url, headers, allow_redirects, timeout, payload, body):
+        if timeout < self.delay:
+            await asyncio.sleep(timeout)
+            raise ProbeError("timeout", f"No response within {timeout}s")
+        await asyncio.sleep(self.delay)
+        return await super()._fetch(key, method, url, headers, allow_redirects, timeout, payload, body)
+
+
+def test_deadline():
+    deadline = Deadline(10)
+    assert 9 < deadline.remaining() <= 10 and not deadline.expired
+    assert deadline.cap(60) <= 10 and deadline.cap(1) == 1
+    # at most half of what is left, never less than 0.1s
+    assert 4 < deadline.request_timeout(30) <= 5
+    assert Deadline(0).request_timeout(30) == 0.1
+    assert Deadline(-1).expired
+
+
+def test_engine_deadline_comes_early():
+    assert 7 < engine_deadline(10, 2).remaining() <= 8
+    # never more than half the run early
+    assert 1 < engine_deadline(3, 2).remaining() <= 1.5
+
+
+@pytest.mark.asyncio
+async def test_request_deadline_caps_every_tool(monkeypatch):
+    given = {}
+
+    async def execute_tool(tool, value, options=None, emit=None, timeout=None):
+        given[tool] = options["deadline"]
+        if tool == "sherlock":
+            await asyncio.sleep(30)
+        return {"profiles": [], "total": 0}
+
+    monkeypatch.setattr(orchestrator, "execute_tool", execute_tool)
+    monkeypatch.setattr(orchestrator, "scan_cache", None)
+    monkeypatch.setattr(orchestrator, "scan_history", None)
+
+    started = time.monotonic()
+    results = await orchestrator.fan_out(
+        {"sherlock": "alice", "maigret": "alice"}, {"sherlock": 60, "maigret": 60}, deadline=Deadline(0.3)
+    )
+
+    assert time.monotonic() - started < 1
+    assert results["sherlock"]["status"] == "timeout"
+    assert results["maigret"]["status"] == "ok"
+    # the engines were given less than the request has left
+    assert all(deadline.remaining() < 0.3 for deadline in given.values())
+
+
+@pytest.mark.asyncio
+async def test_engine_returns_what_it_checked_by_the_deadline():
+    started = time.monotonic()
+    section = await MaigretEngine().run("someuser", {"probes": SlowProbes(5), "top_sites": 20, "deadline": Deadline(1)})
+
+    assert time.monotonic() - started < 3
+    assert section["partial"]
+    assert section["checked"] + section["unchecked"] == 20
+
+
+@pytest.mark.asyncio
+async def test_shared_probes_in_flight_are_not_dropped_at_the_deadline(monkeypatch):
+    dropped = []
+    monkeypatch.setattr(engines, "_drop_requests", dropped.append)
+
+    section = await SherlockEngine().run("someuser", {"probes": SlowProbes(0.1), "deadline": Deadline(0.5)})
+
+    assert dropped == []
+    assert not section.get("partial")
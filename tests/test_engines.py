@@ -0,0 +1,185 @@
+import threading
+
+import pytest
+
+from gateway.engines import (
+    EngineUnavailable,
+    MaigretEngine,
+    ScanCancelled,
+    SherlockEngine,
+    ToolEngine,
+    _NotifyAdapter,
+    _ProbeChecker,
+    ghunt_summary,
+    holehe_account,
+)
+from gateway.probes import ProbeResponse, SharedProbes
+
+
+class StubProbes(SharedProbes):
+    """Answers every probe with the same page instead of going to the site."""
+
+    def __init__(self, page: bytes = b"<html>nothing here</html>", status: int = 200):
+        super().__init__()
+        self.page = page
+        self.status = status
+        self.urls = []
+
+    async def _fetch(self, key, method, url, headers, allow_redirects, timeout, payload, body):
+        self.stats["fetched"] += 1
+        self.urls.append(url)
+        body.start(self.status, "utf-8")
+        truncated = False
+        for start in range(0, len(self.page), 16):
+            if body.feed(self.page[start:start + 16]):
+                truncated = start + 16 < len(self.page)
+                break
+        else:
+            body.finish()
+        response = ProbeResponse(self.status, url, {}, b"".join(body.chunks), "utf-8", 0.01, truncated)
+        self._remember(key, response)
+        return response
+
+
+class BrokenEngine(ToolEngine):
+    name = "broken"
+
+    def _load(self):
+        raise ImportError("No module named 'broken'")
+
+
+@pytest.mark.asyncio
+async def test_engine_that_fails_to_load_is_unavailable():
+    engine = BrokenEngine()
+    with pytest.raises(EngineUnavailable, match="No module named 'broken'"):
+        await engine.run("alice")
+    assert not engine.load()
+    assert engine.load_error == "ImportError: No module named 'broken'"
+
+
+def test_sherlock_engine_keeps_its_site_data():
+    engine = SherlockEngine()
+    assert engine.load()
+    assert engine.load() and engine.load_time is not None
+    assert "GitHub" in engine.site_data
+    # NSFW sites are left out, as in the CLI's default run
+    assert not any(info.get("isNSFW") for info in engine.site_data.values())
+
+
+def test_sherlock_engine_needs_the_bundled_sherlock(monkeypatch):
+    import sherlock_project.sherlock
+
+    def released_sherlock(username, site_data, query_notify, tor=False, unique_tor=False, proxy=None, timeout=60):
+        return {}
+
+    monkeypatch.setattr(sherlock_project.sherlock, "sherlock", released_sherlock)
+    engine = SherlockEngine()
+    assert not engine.load()
+    assert engine.load_error.startswith("EngineUnavailable: the installed sherlock_project takes no session")
+
+
+def test_maigret_engine_needs_the_bundled_maigret(monkeypatch):
+    import maigret.checking
+
+    async def released_maigret(username, site_dict, logger, timeout=3, *args, **kwargs):
+        return {}
+
+    monkeypatch.setattr(maigret.checking, "maigret", released_maigret)
+    engine = MaigretEngine()
+    assert not engine.load()
+    assert engine.load_error == (
+        "EngineUnavailable: the installed maigret has no maigret(checker=), maigret(deadline=);"
+        " install the bundled one (pip install -e ./maigret)"
+    )
+
+
+def test_sherlock_scan_without_probes_passes_no_session():
+    engine = SherlockEngine()
+    assert engine.load()
+    calls = []
+    engine.search = lambda username, site_data, query_notify, **kwargs: calls.append(kwargs) or {}
+
+    engine._scan("alice", {}, 5, None, threading.Event())
+    assert calls == [{"timeout": 5}]
+
+
+def test_notify_adapter_stops_a_cancelled_scan():
+    seen = []
+    cancelled = threading.Event()
+    notify = _NotifyAdapter(seen.append, cancelled)
+
+    notify.update("first")
+    cancelled.set()
+    with pytest.raises(ScanCancelled):
+        notify.update("second")
+    assert seen == ["first"]
+
+
+def test_holehe_account():
+    assert holehe_account({"domain": "x.com", "exists": True, "rateLimit": False}) == {
+        "site": "x.com", "status": "used", "domain": "x.com", "exists": True, "rateLimit": False,
+    }
+    assert holehe_account({"domain": "y.com", "exists": None, "rateLimit": True})["status"] == "rate limit"
+    assert holehe_account({"domain": "z.com", "error": True})["exists"] is False
+
+
+def test_ghunt_summary():
+    data = {
+        "PROFILE_CONTAINER": {
+            "profile": {
+                "personId": "1234",
+                "names": {"PROFILE": {"fullname": "Alice Example"}},
+                "profilePhotos": {"PROFILE": {"url": "https://lh3/photo", "isDefault": False}},
+                "coverPhotos": {"PROFILE": {"url": "https://lh3/cover", "isDefault": True}},
+                "inAppReachability": {"PROFILE": {"apps": ["Maps", "YouTube"]}},
+            },
+            "maps": {"reviews": [{}, {}]},
+        }
+    }
+    assert ghunt_summary(data) == {
+        "Gaia ID": "1234",
+        "Name": "Alice Example",
+        "Profile picture": "https://lh3/photo",
+        "Activated Google services": "Maps, YouTube",
+        "Maps reviews": 2,
+    }
+
+
+@pytest.mark.asyncio
+async def test_maigret_engine_through_shared_probes():
+    probes = StubProbes()
+    section = await MaigretEngine().run("someuser", {"probes": probes, "top_sites": 5})
+
+    assert section["checked"] == 5
+    assert len(section["checks"]) == 5
+    assert "partial" not in section
+    assert probes.urls
+    assert all(check["status"] for check in section["checks"])
+
+
+@pytest.mark.asyncio
+async def test_probe_checker_feeds_site_matcher():
+    from maigret.errors import CheckError
+    from maigret.matching import BodyMatcher
+    from maigret.sites import MaigretSite
+
+    site = MaigretSite(
+        "Example",
+        {
+            "url": "https://example.com/{username}",
+            "checkType": "message",
+            "absenceStrs": ["No such user"],
+            "presenseStrs": ["profile-card"],
+        },
+    )
+    matcher = BodyMatcher(site)
+    page = b"<p>No such user</p>" + b"<p>padding</p>" * 100
+    checker = _ProbeChecker(StubProbes(page), CheckError)
+
+    checker.prepare("https://example.com/someuser", matcher=matcher)
+    text, status, error = await checker.check()
+
+    # read in 16-byte chunks, and no further than the one with the absence marker
+    assert (text, status, error) == ("<p>No such user<", 200, None)
+    assert matcher.found_in(text) == {"No such user"}
+    assert matcher.decided(status)
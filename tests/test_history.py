@@ -0,0 +1,119 @@
+import asyncio
+
+import pytest
+
+from gateway import orchestrator
+from gateway.history import ScanHistory
+
+
+@pytest.fixture
+def history(tmp_path):
+    return ScanHistory(str(tmp_path / "history.db"))
+
+
+def sherlock_section(*claimed):
+    return {"status": "ok", "elapsed": 1.5, "profiles": [
+        {"site": site, "url": f"https://{site.lower()}.com/alice", "status": "Claimed"} for site in claimed
+    ]}
+
+
+def test_record_and_read_back_a_scan(history):
+    history.record("sherlock", " Alice ", sherlock_section("GitHub", "GitLab"), scanned_at=100)
+
+    [scan] = history.scans("alice")
+    assert (scan["tool"], scan["scanned_at"], scan["elapsed"], scan["sites"]) == ("sherlock", 100, 1.5, 2)
+    [github, gitlab] = history.sites(scan["id"])
+    assert github == {
+        "site": "GitHub",
+        "outcome": "claimed",
+        "status": "Claimed",
+        "url": "https://github.com/alice",
+        "http_status": None,
+        "checked_at": 100,
+        "ids": None,
+    }
+    assert gitlab["site"] == "GitLab"
+
+
+def test_checks_replace_the_section_sites(history):
+    checks = [{"site": "GitHub", "status": "Claimed"}, {"site": "Reddit", "status": "Available", "http_status": 404}]
+    history.record("maigret", "alice", sherlock_section("GitHub"), checks)
+
+    sites = history.sites(history.scans("alice")[0]["id"])
+    assert [(row["site"], row["outcome"], row["http_status"]) for row in sites] == [
+        ("GitHub", "claimed", None),
+        ("Reddit", "available", 404),
+    ]
+
+
+def test_targets_on_site(history):
+    history.record("sherlock", "alice", sherlock_section("GitHub"), scanned_at=100)
+    history.record("sherlock", "alice", sherlock_section("GitHub"), scanned_at=200)
+    history.record("sherlock", "bob", sherlock_section("GitHub"), scanned_at=150)
+    history.record("sherlock", "carol", sherlock_section("GitLab"), scanned_at=300)
+
+    rows = history.targets_on_site("GitHub")
+    assert [(row["target"], row["last_seen"], row["times"]) for row in rows] == [("alice", 200, 2), ("bob", 150, 1)]
+    assert [row["target"] for row in history.targets_on_site("GitHub", since=175)] == ["alice"]
+
+
+def test_diff_between_scans(history):
+    history.record("sherlock", "alice", sherlock_section("GitHub", "GitLab"), scanned_at=100)
+    history.record("sherlock", "alice", {"profiles": [
+        {"site": "GitHub", "status": "Available"},
+        {"site": "Reddit", "status": "Claimed"},
+    ]}, scanned_at=200)
+
+    change = history.diff("alice", since=150)["sherlock"]
+    assert [row["site"] for row in change["added"]] == ["Reddit"]
+    assert [row["site"] for row in change["removed"]] == ["GitLab"]
+    assert change["changed"] == [{"site": "GitHub", "from": "claimed", "to": "available"}]
+    # nothing newer than the last scan
+    assert history.diff("alice", since=250) == {}
+
+
+def test_search_extracted_ids(history):
+    history.record("maigret", "alice", {"profiles": [
+        {"site": "GitHub", "status": "Claimed", "ids": {"fullname": "Alice Example", "uid": "4242"}},
+        {"site": "GitLab", "status": "Claimed"},
+    ]})
+
+    [row] = history.search("4242")
+    assert (row["target"], row["site"]) == ("alice", "GitHub")
+    assert row["ids"]["fullname"] == "Alice Example"
+    assert history.search("nobody") == []
+
+
+def test_prune_drops_old_scans(history):
+    old = {"profiles": [{"site": "GitHub", "status": "Claimed", "ids": {"uid": "4242"}}]}
+    history.record("maigret", "alice", old, scanned_at=100)
+    history.record("maigret", "alice", sherlock_section("GitLab"), scanned_at=300)
+
+    assert history.prune(older_than=200) == 1
+    assert [scan["scanned_at"] for scan in history.scans("alice")] == [300]
+    assert history.targets_on_site("GitHub") == []
+    assert history.search("4242") == []
+
+
+@pytest.mark.asyncio
+async def test_complete_scans_are_recorded(history, monkeypatch):
+    async def execute_tool(tool, value, options=None, emit=None, timeout=None):
+        section = {"profiles": [{"site": "GitHub", "status": "Claimed"}], "total": 1}
+        if value == "slow":
+            section.update(partial=True, unchecked=10)
+        return section
+
+    monkeypatch.setattr(orchestrator, "execute_tool", execute_tool)
+    monkeypatch.setattr(orchestrator, "scan_history", history)
+    monkeypatch.setattr(orchestrator, "INCREMENTAL_ENABLED", False)
+
+    await orchestrator.run_with_deadline("sherlock", "alice", 5)
+    await orchestrator.run_with_deadline("sherlock", "slow", 5)
+    for _ in range(100):
+        if history.scans("alice"):
+            break
+        await asyncio.sleep(0.01)
+
+    assert history.scans("alice")[0]["sites"] == 1
+    # a partial scan would show its unchecked sites as gone
+    assert history.scans("slow") == []
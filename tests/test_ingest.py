@@ -0,0 +1,88 @@
+import json
+import os
+import sys
+import tempfile
+
+import pytest
+
+from gateway import ingest
+from gateway.ingest import iter_ndjson, read_report, run_structured
+from gateway.resolver import Resolution
+
+# Stands in for sherlock: writes a one-row --csv report named after the target into --folderoutput.
+FAKE_SHERLOCK = """
+import os, sys
+outdir = sys.argv[sys.argv.index("--folderoutput") + 1]
+with open(os.path.join(outdir, sys.argv[1] + ".csv"), "w") as f:
+    f.write("username,name,url_main,url_user,exists,http_status,response_time_s\\n")
+    f.write(sys.argv[1] + ",GitHub,https://github.com/,https://github.com/x,Claimed,200,0.5\\n")
+"""
+
+
+@pytest.fixture
+def fake_sherlock(monkeypatch):
+    entry = Resolution("sherlock")
+    entry.invocation = [sys.executable, "-c", FAKE_SHERLOCK]
+    monkeypatch.setattr(ingest.tool_resolver, "resolve", lambda tool: entry)
+
+
+def test_read_sherlock_report(tmp_path):
+    path = tmp_path / "alice.csv"
+    path.write_text(
+        "username,name,url_main,url_user,exists,http_status,response_time_s\n"
+        "alice,GitHub,https://github.com/,https://github.com/alice,Claimed,200,0.41\n"
+        "alice,GitLab,https://gitlab.com/,https://gitlab.com/alice,Available,404,\n"
+    )
+    emitted = []
+
+    section = read_report("sherlock", str(path), emitted.append)
+
+    assert section["checked"] == 2
+    assert section["profiles"] == [{
+        "site": "GitHub",
+        "url": "https://github.com/alice",
+        "status": "Claimed",
+        "query_time": 0.41,
+        "url_main": "https://github.com/",
+        "http_status": 200,
+    }]
+    assert [item["site"] for item in emitted] == ["GitHub", "GitLab"]
+
+
+def test_read_maigret_report(tmp_path):
+    path = tmp_path / "report_alice_ndjson.json"
+    row = {"sitename": "GitHub", "url_user": "https://github.com/alice", "http_status": 200,
+           "status": {"status": "Claimed", "ids": {"uid": "1"}}}
+    path.write_text(json.dumps(row) + "\n\n")
+
+    section = read_report("maigret", str(path))
+
+    assert section == {"profiles": [{
+        "site": "GitHub",
+        "url": "https://github.com/alice",
+        "status": "Claimed",
+        "ids": {"uid": "1"},
+        "http_status": 200,
+    }], "total": 1}
+
+
+def test_iter_ndjson_skips_long_lines(tmp_path):
+    path = tmp_path / "report.json"
+    path.write_text(json.dumps({"a": "x" * 100}) + "\n" + json.dumps({"b": 1}) + "\n")
+    assert list(iter_ndjson(str(path), max_line=64)) == [{"b": 1}]
+
+
+@pytest.mark.asyncio
+async def test_report_named_after_a_glob_pattern_is_found(fake_sherlock):
+    section = await run_structured("sherlock", "a[b]", 30)
+    assert section["profiles"][0]["site"] == "GitHub"
+    assert section["method"] == "cli report"
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("value", ["../alice", "a/b", "a\0b"])
+async def test_targets_with_path_separators_are_refused(fake_sherlock, tmp_path, monkeypatch, value):
+    monkeypatch.setattr(tempfile, "tempdir", str(tmp_path))
+    section = await run_structured("sherlock", value, 30)
+    assert section["error"].startswith("sherlock targets can't contain a path separator")
+    assert os.listdir(tmp_path) == []
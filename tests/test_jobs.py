@@ -0,0 +1,125 @@
+import asyncio
+import json
+
+import pytest
+
+from gateway import jobs
+from gateway.admission import ToolSlots
+from gateway.jobs import DONE, FAILED, QUEUED, RUNNING, JobQueue
+
+
+@pytest.fixture
+def runs(monkeypatch):
+    """Tool runs the jobs made, with the tool runs in flight at the time; "broken" fails."""
+    made = []
+    running = []
+
+    async def run_tool(tool, value, deadline, emit=None, refresh=False):
+        running.append(tool)
+        made.append((tool, value, list(running)))
+        try:
+            await asyncio.sleep(0.02)
+        finally:
+            running.remove(tool)
+        if value == "broken":
+            raise RuntimeError("database is locked")
+        emit({"tool": tool, "site": "GitHub", "status": "Claimed"})
+        return {"status": "ok", "profiles": [{"site": "GitHub"}], "total": 1}
+
+    monkeypatch.setattr(jobs, "run_tool", run_tool)
+    monkeypatch.setattr(jobs, "tool_slots", ToolSlots(capacity=8))
+    return made
+
+
+def make_queue(tmp_path, **kwargs) -> JobQueue:
+    kwargs.setdefault("tool_limits", {"sherlock": 1, "maigret": 1})
+    return JobQueue(str(tmp_path / "jobs.db"), **kwargs)
+
+
+async def wait_for_status(queue: JobQueue, job_id: str, *statuses: str) -> dict:
+    for _ in range(200):
+        job = queue.get(job_id)
+        if job["status"] in statuses:
+            return job
+        await asyncio.sleep(0.01)
+    raise AssertionError(f"job stayed {job['status']}")
+
+
+@pytest.mark.asyncio
+async def test_job_runs_to_completion(tmp_path, runs):
+    queue = make_queue(tmp_path)
+    await queue.start()
+    try:
+        job = queue.submit({"sherlock": "alice", "maigret": "alice"}, deadlines={"maigret": 60})
+        assert job["status"] == QUEUED and job["plan"] == {"sherlock": "alice", "maigret": "alice"}
+
+        job = await wait_for_status(queue, job["id"], DONE, FAILED)
+    finally:
+        await queue.stop()
+
+    assert job["status"] == DONE
+    assert job["result"]["maigret"]["total"] == 1
+    assert job["started_at"] <= job["finished_at"]
+    assert queue.stats()["jobs"][DONE] == 1
+
+
+@pytest.mark.asyncio
+async def test_tool_limit_holds_across_jobs(tmp_path, runs):
+    queue = make_queue(tmp_path, workers=3)
+    await queue.start()
+    try:
+        submitted = [queue.submit({"sherlock": name}) for name in ("alice", "bob", "carol")]
+        for job in submitted:
+            await wait_for_status(queue, job["id"], DONE)
+    finally:
+        await queue.stop()
+
+    assert all(in_flight == ["sherlock"] for _, _, in_flight in runs)
+
+
+@pytest.mark.asyncio
+async def test_failed_tool_fails_the_job(tmp_path, runs):
+    queue = make_queue(tmp_path)
+    await queue.start()
+    try:
+        job = await wait_for_status(queue, queue.submit({"sherlock": "broken"})["id"], DONE, FAILED)
+    finally:
+        await queue.stop()
+
+    assert job["status"] == FAILED
+    assert job["error"] == "RuntimeError: database is locked"
+
+
+@pytest.mark.asyncio
+async def test_interrupted_jobs_are_requeued(tmp_path, runs):
+    queue = make_queue(tmp_path)
+    queue._db.execute(
+        "INSERT INTO jobs (id, plan, refresh, deadlines, status, created_at) VALUES (?, ?, 0, '{}', ?, 0)",
+        ("interrupted", json.dumps({"maigret": "alice"}), RUNNING),
+    )
+    queue._db.commit()
+
+    restarted = make_queue(tmp_path)
+    await restarted.start()
+    try:
+        job = await wait_for_status(restarted, "interrupted", DONE)
+    finally:
+        await restarted.stop()
+    assert job["result"]["maigret"]["status"] == "ok"
+
+
+@pytest.mark.asyncio
+async def test_job_events_end_with_done(tmp_path, runs):
+    queue = make_queue(tmp_path)
+    await queue.start()
+    try:
+        job = queue.submit({"sherlock": "alice"})
+        messages = [m async for m in queue.events(job["id"])]
+    finally:
+        await queue.stop()
+
+    events = [m.split("\n", 1)[0] for m in messages if not m.startswith(":")]
+    assert events[0] == "event: job"
+    assert "event: site" in events and "event: tool" in events
+    assert events[-1] == "event: done"
+    assert not queue._listeners
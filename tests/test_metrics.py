@@ -0,0 +1,80 @@
+from gateway import metrics
+from gateway.metrics import Counter, Gauge, Histogram, site_outcome
+
+
+def test_counter_samples():
+    counter = Counter("osint_test_total", "Test.")
+    counter.inc(tool="sherlock", status="ok")
+    counter.inc(2, tool="sherlock", status="ok")
+    counter.inc(site='say "hi"\n')
+    assert counter.samples() == [
+        'osint_test_total{site="say \\"hi\\"\\n"} 1',
+        'osint_test_total{status="ok",tool="sherlock"} 3',
+    ]
+
+
+def test_histogram_samples():
+    histogram = Histogram("osint_test_seconds", "Test.", buckets=(1, 5))
+    histogram.observe(0.5, tool="holehe")
+    histogram.observe(3.0, tool="holehe")
+    assert histogram.samples() == [
+        'osint_test_seconds_bucket{tool="holehe",le="1"} 1',
+        'osint_test_seconds_bucket{tool="holehe",le="5"} 2',
+        'osint_test_seconds_bucket{tool="holehe",le="+Inf"} 2',
+        'osint_test_seconds_sum{tool="holehe"} 3.5',
+        'osint_test_seconds_count{tool="holehe"} 2',
+    ]
+
+
+def test_gauge_collected_at_scrape_time():
+    depth = {"value": 1}
+    gauge = Gauge("osint_test_depth", "Test.", lambda: {(("queue", "jobs"),): depth["value"]})
+    depth["value"] = 4
+    assert gauge.samples() == ['osint_test_depth{queue="jobs"} 4']
+
+
+def test_render_skips_a_failing_metric(monkeypatch):
+    def broken():
+        raise RuntimeError("gone")
+
+    counter = Counter("osint_test_runs_total", "Runs.")
+    counter.inc()
+    monkeypatch.setattr(metrics, "REGISTRY", [Gauge("osint_test_broken", "Broken.", broken), counter])
+    assert metrics.render() == (
+        "# HELP osint_test_runs_total Runs.\n"
+        "# TYPE osint_test_runs_total counter\n"
+        "osint_test_runs_total 1\n"
+    )
+
+
+def test_site_outcome():
+    assert site_outcome({"status": "Claimed"}) == "claimed"
+    assert site_outcome({"status": "used"}) == "claimed"
+    assert site_outcome({"status": "not used"}) == "available"
+    assert site_outcome({"status": "Unknown", "http_status": 429}) == "rate_limited"
+    assert site_outcome({"status": "Unknown", "error": "Captcha detected"}) == "waf"
+    assert site_outcome({"status": "something new"}) == "unknown"
+
+
+def test_record_site(monkeypatch):
+    checks = Counter("osint_site_checks_total", "Test.")
+    seconds = Counter("osint_site_query_seconds_total", "Test.")
+    monkeypatch.setattr(metrics, "site_checks", checks)
+    monkeypatch.setattr(metrics, "site_query_seconds", seconds)
+
+    metrics.record_site("sherlock", {"site": "GitHub", "status": "Claimed", "query_time": 0.25})
+    metrics.record_site("ghunt", {"section": "Name", "value": "Alice"})
+
+    assert checks.values == {(("outcome", "claimed"), ("site", "GitHub"), ("tool", "sherlock")): 1}
+    assert seconds.values == {(("site", "GitHub"), ("tool", "sherlock")): 0.25}
+
+
+def test_metrics_endpoint():
+    from fastapi.testclient import TestClient
+
+    import main
+
+    response = TestClient(main.app).get("/metrics")
+    assert response.headers["content-type"] == metrics.CONTENT_TYPE
+    assert "# TYPE osint_tool_runs_total counter" in response.text
+    assert "# TYPE osint_scans_coalesced_total counter" in response.text
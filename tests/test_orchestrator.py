@@ -0,0 +1,73 @@
+import asyncio
+import time
+
+import pytest
+
+from gateway import orchestrator
+from gateway.orchestrator import fan_out, run_with_deadline
+
+
+@pytest.fixture
+def tools(monkeypatch):
+    """How long each fake tool takes (None: until cancelled); "broken" raises. Runs are recorded."""
+    delays = {}
+    runs = []
+
+    async def execute_tool(tool, value, options=None, emit=None, timeout=None):
+        runs.append({"tool": tool, "deadline": options["deadline"], "cancelled": False})
+        try:
+            if delays.get(tool) is None:
+                await asyncio.Event().wait()
+            await asyncio.sleep(delays[tool])
+        except asyncio.CancelledError:
+            runs[-1]["cancelled"] = True
+            raise
+        if tool == "broken":
+            raise RuntimeError("tool crashed")
+        if emit:
+            emit({"tool": tool, "site": "GitHub", "status": "Claimed"})
+        return {"profiles": [{"site": "GitHub"}], "total": 1}
+
+    monkeypatch.setattr(orchestrator, "execute_tool", execute_tool)
+    monkeypatch.setattr(orchestrator, "scan_cache", None)
+    monkeypatch.setattr(orchestrator, "scan_history", None)
+    return delays, runs
+
+
+@pytest.mark.asyncio
+async def test_fan_out_runs_tools_concurrently(tools):
+    delays, _ = tools
+    delays.update(sherlock=0.3, maigret=0.3)
+
+    started = time.monotonic()
+    results = await fan_out({"sherlock": "alice", "maigret": "alice"}, {"sherlock": 5, "maigret": 5})
+
+    assert time.monotonic() - started < 0.5
+    assert {tool: result["status"] for tool, result in results.items()} == {"sherlock": "ok", "maigret": "ok"}
+    assert results["sherlock"]["total"] == 1
+
+
+@pytest.mark.asyncio
+async def test_tool_past_its_deadline_times_out_alone(tools):
+    delays, runs = tools
+    delays.update(holehe=0.05, ghunt=None)
+
+    started = time.monotonic()
+    results = await fan_out({"holehe": "a@example.com", "ghunt": "a@example.com"}, {"holehe": 5, "ghunt": 0.2})
+
+    assert time.monotonic() - started < 1
+    assert results["holehe"]["status"] == "ok"
+    assert results["ghunt"]["status"] == "timeout"
+    assert results["ghunt"]["error"] == "ghunt did not finish within 0.2s"
+    await asyncio.sleep(0)
+    assert [run["cancelled"] for run in runs if run["tool"] == "ghunt"] == [True]
+
+
+@pytest.mark.asyncio
+async def test_failing_tool_comes_back_as_an_error(tools):
+    delays, _ = tools
+    delays["broken"] = 0
+    result = await run_with_deadline("broken", "alice", 5)
+    assert result["status"] == "error"
+    assert result["error"] == "RuntimeError: tool crashed"
+
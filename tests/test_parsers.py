@@ -0,0 +1,29 @@
+from gateway.parsers import parse_ghunt_output, parse_holehe_output, parse_maigret_output, parse_sherlock_output
+
+
+def test_parse_holehe_output():
+    stdout = "[+] Email used\n[x] twitter.com Rate limit\n[+] github.com\n\nno brackets here\n"
+    assert parse_holehe_output(stdout)["total"] == 3
+
+
+def test_parse_sherlock_output():
+    stdout = "[*] Checking username alice on:\n[GitHub] https://github.com/alice\n[Status] not a url\n"
+    assert parse_sherlock_output(stdout) == {
+        "profiles": [{"site": "GitHub", "url": "https://github.com/alice"}],
+        "total": 1,
+    }
+
+
+def test_parse_maigret_output():
+    stdout = "[+] GitHub: https://github.com/alice\n[+] Reddit: https://www.reddit.com/user/alice\n"
+    assert parse_maigret_output(stdout)["profiles"] == [
+        {"url": "https://github.com/alice"},
+        {"url": "https://www.reddit.com/user/alice"},
+    ]
+
+
+def test_parse_ghunt_output():
+    assert parse_ghunt_output("Gaia ID : 1234\nName: Alice\nno separator")["google_info"] == {
+        "Gaia ID": "1234",
+        "Name": "Alice",
+    }
@@ -0,0 +1,97 @@
+import asyncio
+import json
+
+import pytest
+
+from gateway import pivot
+from gateway.admission import ToolSlots
+from gateway.pivot import PivotScan, found_in, tools_for
+
+SECTIONS = {
+    ("holehe", "alice@example.com"): {"accounts": [
+        {"site": "twitter.com", "emailrecovery": "alice.backup@example.org"},
+        {"site": "x.com", "emailrecovery": "al****@gmail.com"},
+    ]},
+    ("ghunt", "alice@example.com"): {"google_info": {"Gaia ID": "1234", "Name": "Alice"}},
+    ("maigret", "alice"): {"profiles": [{"site": "GitHub", "ids_usernames": {"alice_gh": "username"}}]},
+    ("maigret", "alice_gh"): {"profiles": [{"site": "GitLab", "ids_usernames": {"alice_gl": "username"}}]},
+}
+
+
+@pytest.fixture
+def runs(monkeypatch):
+    """Tool runs the pivot made; sections come from SECTIONS, everything else finds nothing."""
+    made = []
+
+    async def run_tool(tool, value, deadline, refresh=False, options=None):
+        made.append((tool, value, options))
+        return {"status": "ok", **SECTIONS.get((tool, value), {})}
+
+    monkeypatch.setattr(pivot, "run_tool", run_tool)
+    monkeypatch.setattr(pivot, "tool_slots", ToolSlots(capacity=8))
+    return made
+
+
+async def collect(scan: PivotScan, value: str):
+    return [json.loads(line) async for line in scan.run(value)]
+
+
+def test_tools_for():
+    assert tools_for("email") == {"holehe": None, "ghunt": None}
+    assert tools_for("gaia_id") == {"maigret": {"id_type": "gaia_id"}}
+    assert tools_for("phone") == {}
+
+
+def test_found_in():
+    assert found_in("ghunt", SECTIONS[("ghunt", "alice@example.com")]) == [("gaia_id", "1234", "Google")]
+    # masked recovery emails are not followed
+    assert found_in("holehe", SECTIONS[("holehe", "alice@example.com")]) == [
+        ("email", "alice.backup@example.org", "twitter.com")
+    ]
+    assert found_in("maigret", SECTIONS[("maigret", "alice")]) == [("username", "alice_gh", "GitHub")]
+    # without maigret's database, links are read with PROFILE_LINKS
+    section = {"profiles": [{"site": "GitHub", "ids_links": ["https://twitter.com/alice_tw", "https://example.com/x"]}]}
+    assert found_in("maigret", section) == [("username", "alice_tw", "GitHub")]
+
+
+@pytest.mark.asyncio
+async def test_pivot_follows_found_identifiers(runs):
+    lines = await asyncio.wait_for(collect(PivotScan(max_depth=1), "alice@example.com"), 60)
+
+    by_value = {line["value"]: line for line in lines if "value" in line}
+    assert set(by_value) == {"alice@example.com", "alice", "alice.backup@example.org", "alice.backup", "1234", "alice_gh"}
+    # an email's username part is scanned at the email's depth
+    assert by_value["alice"]["depth"] == 0
+    assert by_value["alice.backup"]["depth"] == 1
+    assert by_value["1234"]["via"] == {"from": "alice@example.com", "tool": "ghunt", "site": "Google"}
+    assert ("maigret", "1234", {"id_type": "gaia_id"}) in runs
+    # alice_gl is two hops away
+    assert by_value["alice_gh"]["found"][0]["status"] == "beyond_depth"
+    assert lines[-1]["summary"]["scanned"] == 6
+    assert lines[-1]["summary"]["beyond_depth"] == 1
+
+
+@pytest.mark.asyncio
+async def test_pivot_stops_at_max_targets(runs):
+    lines = await asyncio.wait_for(collect(PivotScan(max_targets=2), "alice@example.com"), 60)
+
+    summary = lines[-1]["summary"]
+    assert summary["identifiers"] == summary["scanned"] == 2
+    # the backup email, the Gaia ID and alice_gh
+    assert summary["over_limit"] == 3
+
+
+@pytest.mark.asyncio
+async def test_pivot_does_not_load_maigret_out_of_process(runs, monkeypatch):
+    class Engine:
+        loaded = False
+
+        async def ensure_loaded(self):
+            raise AssertionError("maigret was loaded in the gateway")
+
+    monkeypatch.setattr(pivot, "EXECUTION_MODE", "subprocess")
+    monkeypatch.setattr(pivot, "get_engine", lambda tool: Engine())
+    scan = PivotScan(max_depth=0)
+    await asyncio.wait_for(collect(scan, "alice@example.com"), 60)
+
+    assert scan.maigret_db is None
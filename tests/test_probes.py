@@ -0,0 +1,136 @@
+import asyncio
+import socket
+
+import pytest
+from werkzeug import Response
+
+from gateway.engines import MaigretEngine, SherlockEngine
+from gateway.probes import ProbeError, SharedProbes, normalize_url, probe_key
+from test_engines import StubProbes
+
+
+def test_probe_key_ignores_what_does_not_change_the_answer():
+    assert normalize_url("HTTPS://GitHub.com:443/alice#top") == "https://github.com/alice"
+    assert normalize_url("http://example.com:8080") == "http://example.com:8080/"
+    assert probe_key("get", "https://github.com/alice", {"User-Agent": "sherlock"}, True) == probe_key(
+        "GET", "https://GITHUB.com/alice", {"user-agent": "maigret", "Accept": "*/*"}, True
+    )
+    assert probe_key("GET", "https://github.com/alice", {"Cookie": "a=1"}, True) != probe_key(
+        "GET", "https://github.com/alice", None, True
+    )
+
+
+@pytest.mark.asyncio
+async def test_identical_probes_share_one_request(httpserver):
+    httpserver.expect_request("/alice").respond_with_data("<h1>alice</h1>", content_type="text/html")
+    probes = SharedProbes()
+    url = httpserver.url_for("/alice")
+    try:
+        responses = await asyncio.gather(*(probes.fetch("GET", url) for _ in range(3)))
+        head = await probes.fetch("HEAD", url)
+    finally:
+        await probes.close()
+
+    assert {r.text for r in responses} == {"<h1>alice</h1>"}
+    assert head.status == 200 and not head.truncated
+    assert probes.stats == {"probes": 4, "fetched": 1}
+    assert len(httpserver.log) == 1
+
+
+@pytest.mark.asyncio
+async def test_bodies_are_read_up_to_the_largest_limit(httpserver):
+    httpserver.expect_request("/big").respond_with_data(b"x" * (1 << 20))
+    probes = SharedProbes(max_bytes=1000)
+    url = httpserver.url_for("/big")
+    try:
+        small, large = await asyncio.gather(probes.fetch("GET", url), probes.fetch("GET", url, max_bytes=200_000))
+        # kept, and enough for another caller with a smaller limit
+        again = await probes.fetch("GET", url, max_bytes=5000)
+    finally:
+        await probes.close()
+
+    assert (len(small.content), small.truncated) == (1000, True)
+    assert (len(large.content), large.truncated) == (200_000, True)
+    assert len(again.content) == 5000
+    assert probes.stats["fetched"] == 1
+    # read a chunk at a time, not the whole megabyte
+    assert len(probes._responses.popitem()[1][1].content) < 300_000
+
+
+class Decides:
+    """A matcher decided once it has seen `marker`."""
+
+    max_bytes = None
+
+    def __init__(self, marker: str):
+        self.marker = marker
+        self.seen = ""
+
+    def feed(self, text: str, status: int) -> bool:
+        self.seen += text
+        return self.marker in self.seen
+
+
+@pytest.mark.asyncio
+async def test_reading_stops_once_every_matcher_is_decided(httpserver):
+    page = b"<p>No such user</p>" + b"." * (1 << 20)
+    httpserver.expect_request("/alice").respond_with_data(page)
+    probes = SharedProbes()
+    url = httpserver.url_for("/alice")
+    early = Decides("No such user")
+    try:
+        response = await probes.fetch("GET", url, matcher=early)
+        # a caller needing more is not given the cut body
+        late = Decides("never there")
+        full = await probes.fetch("GET", url, matcher=late)
+    finally:
+        await probes.close()
+
+    assert response.truncated and len(response.content) < len(page)
+    assert early.seen == response.text
+    assert not full.truncated and full.content == page
+    assert late.seen == full.text
+    assert probes.stats["fetched"] == 2
+
+
+@pytest.mark.asyncio
+async def test_responses_expire(httpserver):
+    httpserver.expect_request("/alice").respond_with_handler(lambda request: Response("ok"))
+    probes = SharedProbes(ttl=0)
+    try:
+        await probes.fetch("GET", httpserver.url_for("/alice"))
+        await asyncio.sleep(0.01)
+        await probes.fetch("GET", httpserver.url_for("/alice"))
+    finally:
+        await probes.close()
+    assert probes.stats["fetched"] == 2
+
+
+@pytest.mark.asyncio
+async def test_failures_are_not_kept():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    probes = SharedProbes()
+    try:
+        for _ in range(2):
+            with pytest.raises(ProbeError) as error:
+                await probes.fetch("GET", f"http://127.0.0.1:{port}/alice", timeout=2)
+            assert error.value.kind == "connect"
+    finally:
+        await probes.close()
+    assert probes.stats["fetched"] == 2
+
+
+@pytest.mark.asyncio
+async def test_sherlock_and_maigret_share_probes():
+    probes = StubProbes(b"<html>Not Found</html>", status=404)
+
+    sherlock, maigret = await asyncio.gather(
+        SherlockEngine().run("someuser", {"probes": probes}),
+        MaigretEngine().run("someuser", {"probes": probes, "top_sites": 50}),
+    )
+
+    assert sherlock["checked"] > 50 and maigret["checked"] == 50
+    # sites both tools check with the same request were fetched once
+    assert probes.stats["fetched"] < probes.stats["probes"]
@@ -0,0 +1,72 @@
+import time
+
+import pytest
+
+from gateway import orchestrator
+from gateway.history import ScanHistory
+
+FRESHNESS = {"claimed": 3600, "available": 3600}
+
+
+@pytest.fixture
+def history(tmp_path, monkeypatch):
+    history = ScanHistory(str(tmp_path / "history.db"))
+    monkeypatch.setattr(orchestrator, "scan_history", history)
+    monkeypatch.setattr(orchestrator, "INCREMENTAL_ENABLED", True)
+    monkeypatch.setattr(orchestrator, "SITE_FRESHNESS", FRESHNESS)
+    return history
+
+
+def record_last_scan(history, checked_at):
+    history.record("sherlock", "alice", {}, [
+        {"site": "GitHub", "status": "Claimed", "url": "https://github.com/alice", "checked_at": checked_at},
+        {"site": "GitLab", "status": "Available", "checked_at": checked_at},
+        {"site": "Reddit", "status": "Unknown", "checked_at": checked_at},
+        {"site": "Twitch", "status": "Available", "checked_at": checked_at - 7200},
+    ])
+
+
+def test_reusable_keeps_fresh_verdicts_of_listed_outcomes(history):
+    record_last_scan(history, time.time())
+    # unknown is not in FRESHNESS, Twitch's verdict is too old
+    assert sorted(history.reusable("sherlock", "alice", FRESHNESS)) == ["GitHub", "GitLab"]
+    assert history.reusable("maigret", "alice", FRESHNESS) == {}
+
+
+@pytest.mark.asyncio
+async def test_rescan_checks_only_stale_sites(history, monkeypatch):
+    record_last_scan(history, time.time() - 60)
+    asked = {}
+    emitted = []
+
+    async def execute_tool(tool, value, options=None, emit=None, timeout=None):
+        asked["skip"] = options.get("skip")
+        check = {"site": "Reddit", "url": "https://reddit.com/alice", "status": "Claimed"}
+        return {"profiles": [check], "total": 1, "checked": 2, "checks": [check, {"site": "Twitch", "status": "Available"}]}
+
+    monkeypatch.setattr(orchestrator, "execute_tool", execute_tool)
+
+    section = await orchestrator.run_with_deadline("sherlock", "alice", 5, emit=emitted.append)
+
+    assert asked["skip"] == ["GitHub", "GitLab"]
+    assert [profile["site"] for profile in section["profiles"]] == ["Reddit", "GitHub"]
+    assert section["total"] == 2
+    assert section["checked"] == 4
+    assert section["incremental"] == {"checked": 2, "reused": 2}
+    assert "checks" not in section
+    assert [item["site"] for item in emitted] == ["GitHub"]
+
+
+@pytest.mark.asyncio
+async def test_rescan_through_the_cli_is_not_merged(history, monkeypatch):
+    record_last_scan(history, time.time() - 60)
+
+    async def execute_tool(tool, value, options=None, emit=None, timeout=None):
+        # the CLIs ignore "skip" and return no checks
+        return {"profiles": [{"site": "GitHub"}], "total": 1, "method": "cli report"}
+
+    monkeypatch.setattr(orchestrator, "execute_tool", execute_tool)
+
+    section = await orchestrator.run_with_deadline("sherlock", "alice", 5)
+    assert section["total"] == 1
+    assert "incremental" not in section
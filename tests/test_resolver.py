@@ -0,0 +1,75 @@
+import threading
+import time
+
+from gateway import cli, resolver
+from gateway.cli import run_cli_tool
+from gateway.resolver import ToolResolver
+
+
+def fake_candidates(monkeypatch, *prefixes):
+    monkeypatch.setattr(resolver, "candidates", lambda tool: [(f"direct: {p[0]}", list(p)) for p in prefixes])
+
+
+def test_resolve_probes_once(monkeypatch):
+    fake_candidates(monkeypatch, ["/nonexistent/sherlock"], ["/bin/echo"])
+    tools = ToolResolver(tools=("sherlock",))
+
+    entry = tools.resolve("sherlock")
+    assert entry.invocation == ["/bin/echo"]
+    assert entry.method == "direct: /bin/echo"
+    assert tools.resolve("sherlock") is entry
+
+
+def test_resolve_reports_why_a_tool_is_unavailable(monkeypatch):
+    fake_candidates(monkeypatch, ["/nonexistent/sherlock"])
+    entry = ToolResolver(tools=("sherlock",)).resolve("sherlock")
+    assert entry.invocation is None
+    assert entry.error == "direct: /nonexistent/sherlock: FileNotFoundError"
+
+
+def test_stale_entry_is_served_while_reprobed(monkeypatch):
+    fake_candidates(monkeypatch, ["/bin/echo"])
+    tools = ToolResolver(tools=("sherlock",), reprobe_interval=0)
+    first = tools.resolve("sherlock")
+
+    probing = threading.Event()
+    release = threading.Event()
+    probe = tools.probe
+
+    def slow_probe(tool):
+        probing.set()
+        release.wait(5)
+        return probe(tool)
+
+    monkeypatch.setattr(tools, "probe", slow_probe)
+    time.sleep(0.01)
+    started = time.monotonic()
+    assert tools.resolve("sherlock") is first
+    assert tools.resolve("sherlock") is first
+    assert time.monotonic() - started < 0.5
+    assert probing.wait(5)
+    assert tools._reprobing == {"sherlock"}
+
+    release.set()
+    for _ in range(100):
+        if not tools._reprobing:
+            break
+        time.sleep(0.01)
+    assert tools.entries["sherlock"] is not first
+    assert tools.entries["sherlock"].invocation == ["/bin/echo"]
+
+
+def test_run_cli_tool_reprobes_a_failing_invocation(monkeypatch):
+    tools = ToolResolver(tools=("sherlock",))
+    monkeypatch.setattr(cli, "tool_resolver", tools)
+    fake_candidates(monkeypatch, ["/bin/echo"])
+    tools.resolve("sherlock")
+    # The recorded invocation stops working, and the tool is now found elsewhere.
+    tools.entries["sherlock"].invocation = ["/bin/false"]
+    fake_candidates(monkeypatch, ["/bin/echo", "found"])
+
+    result = run_cli_tool("sherlock", ["alice"], timeout=5)
+
+    assert result["success"]
+    assert result["stdout"] == "found alice\n"
+    assert tools.entries["sherlock"].invocation == ["/bin/echo", "found"]
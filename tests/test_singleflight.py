@@ -0,0 +1,81 @@
+import asyncio
+
+import pytest
+
+from gateway.singleflight import SingleFlight
+
+
+@pytest.mark.asyncio
+async def test_identical_calls_share_one_run():
+    flights = SingleFlight()
+    release = asyncio.Event()
+    runs = []
+
+    async def scan():
+        runs.append(1)
+        await release.wait()
+        return {"status": "ok"}
+
+    callers = [asyncio.create_task(flights.run("alice", scan)) for _ in range(3)]
+    await asyncio.sleep(0)
+    assert "alice" in flights and flights.in_flight() == 1
+    release.set()
+
+    assert await asyncio.gather(*callers) == [{"status": "ok"}] * 3
+    assert runs == [1]
+    assert flights.stats == {"started": 1, "coalesced": 2}
+    assert flights.in_flight() == 0
+
+
+@pytest.mark.asyncio
+async def test_failure_reaches_every_caller_and_is_not_kept():
+    flights = SingleFlight()
+
+    async def scan():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("tool crashed")
+
+    results = await asyncio.gather(flights.run("alice", scan), flights.run("alice", scan), return_exceptions=True)
+    assert [str(r) for r in results] == ["tool crashed", "tool crashed"]
+    assert "alice" not in flights
+
+
+@pytest.mark.asyncio
+async def test_run_outlives_a_caller_that_leaves():
+    flights = SingleFlight()
+    release = asyncio.Event()
+
+    async def scan():
+        await release.wait()
+        return "done"
+
+    leaving = asyncio.create_task(flights.run("alice", scan))
+    staying = asyncio.create_task(flights.run("alice", scan))
+    await asyncio.sleep(0)
+    leaving.cancel()
+    await asyncio.sleep(0)
+    release.set()
+
+    assert await staying == "done"
+    assert leaving.cancelled()
+
+
+@pytest.mark.asyncio
+async def test_run_is_cancelled_with_its_last_caller():
+    flights = SingleFlight()
+    cancelled = asyncio.Event()
+
+    async def scan():
+        try:
+            await asyncio.Event().wait()
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    caller = asyncio.create_task(flights.run("alice", scan))
+    await asyncio.sleep(0)
+    caller.cancel()
+
+    await asyncio.wait_for(cancelled.wait(), 1)
+    await asyncio.sleep(0)
+    assert flights.in_flight() == 0
@@ -0,0 +1,53 @@
+import asyncio
+import json
+
+import pytest
+
+from gateway import streaming
+from gateway.streaming import stream_scan
+
+
+def parse(message: str):
+    if message.startswith(":"):
+        return None, None
+    event, data = message.strip().split("\n")
+    return event[len("event: "):], json.loads(data[len("data: "):])
+
+
+async def collect(stream):
+    return [parse(message) async for message in stream]
+
+
+@pytest.fixture
+def tools(monkeypatch):
+    """run_tool stand-in: sherlock reports a site then finishes, maigret raises."""
+
+    async def run_tool(tool, value, deadline, emit=None, refresh=False):
+        if tool == "maigret":
+            raise RuntimeError("database is locked")
+        emit({"tool": tool, "site": "GitHub", "status": "Claimed"})
+        await asyncio.sleep(0.01)
+        return {"status": "ok", "profiles": [{"site": "GitHub"}], "total": 1}
+
+    monkeypatch.setattr(streaming, "run_tool", run_tool)
+
+
+@pytest.mark.asyncio
+async def test_stream_scan_events(tools):
+    events = await asyncio.wait_for(collect(stream_scan({"sherlock": "alice"})), 5)
+
+    assert [event for event, _ in events] == ["start", "site", "tool", "done"]
+    assert events[1][1] == {"tool": "sherlock", "site": "GitHub", "status": "Claimed"}
+    assert events[2][1]["tool"] == "sherlock" and events[2][1]["total"] == 1
+    assert events[3][1]["timed_out"] == [] and events[3][1]["failed"] == []
+
+
+@pytest.mark.asyncio
+async def test_stream_scan_reports_failed_tool_and_ends(tools):
+    events = await asyncio.wait_for(collect(stream_scan({"sherlock": "alice", "maigret": "alice"})), 5)
+
+    names = [event for event, _ in events]
+    assert names[0] == "start" and names[-1] == "done"
+    assert ("error", {"tool": "maigret", "error": "RuntimeError: database is locked"}) in events
+    assert any(event == "tool" and data["tool"] == "sherlock" for event, data in events)
+    assert events[-1][1]["failed"] == ["maigret"]
@@ -0,0 +1,31 @@
+import os
+
+import pytest
+
+from gateway import workers
+from gateway.engines import EngineUnavailable
+
+
+@pytest.fixture
+def pool():
+    workers.start(processes=1, max_jobs=2)
+    yield workers
+    workers.stop()
+
+
+@pytest.mark.asyncio
+async def test_workers_start_with_engines_loaded(pool):
+    # loaded in the fork server, as reported by a forked worker
+    assert pool.loaded["sherlock"] and pool.loaded["maigret"]
+    assert pool.stats()["processes"] == 1
+
+    # ghunt is not installed here; its error crosses the process boundary
+    with pytest.raises(EngineUnavailable):
+        await pool.run("ghunt", "alice@example.com")
+    assert pool.stats()["running"] == 0
+
+
+def test_workers_are_recycled(pool):
+    pids = [pool.start().submit(os.getpid).result() for _ in range(3)]
+    # max_jobs=2, and start() already gave the worker one job
+    assert len(set(pids)) == 2